@@ -1,16 +1,19 @@
 import streamlit as st
-from PIL import Image
+
+from nave import arranque
 
 
 st.set_page_config(page_title="Intro")
+# The landing page starts compiling the profile catalog in the background,
+# so it is ready by the time the other pages need it
+arranque.precargar(graficos=False)
 
 st.markdown("<h1 style='text-align: center;'>Presentación de la idea y conclusiones</h1>", unsafe_allow_html=True)
 
-# Load the PNG image using PIL
-image = Image.open("Recursos/naveejemplo.png")
-
-# Display the image using the Streamlit image() function
-st.image(image)
+# Pass a file: its copy at the widest size Streamlit shows is served as it
+# is instead of being decoded, resized and encoded again on every run
+image = arranque.imagen(arranque.IMAGEN_PRESENTACION)
+st.image(str(image))
 st.markdown("<h3 style='text-align: center;'>Introducción</h3>", unsafe_allow_html=True)
 st.text("Esta aplicación es una aproximación para comprobar la viabilidad de crear un programa con Streamlit para\n"
         "realizar el cálculo de la geometría y costes de producción de una nave industrial.\n"
@@ -0,0 +1 @@
+"""Headless helpers shared by the Streamlit pages."""
@@ -0,0 +1,278 @@
+"""
+SQLite store of the profile catalog.
+
+The compiled catalog is copied into one SQLite file with a table per
+family, indexes on the columns the sidebar filters by, and a view that
+joins the shared columns of every family. The page asks the store for one
+page of rows matching the ranges, so filtering, sorting and counting run
+in SQLite and only the visible rows reach pandas and the browser.
+
+The file is rebuilt when the signature of the Excel files changes; it is
+written next to the compiled catalog and swapped in atomically, so other
+processes keep reading the previous copy until the new one is complete.
+"""
+import contextlib
+import json
+import os
+import pathlib
+import sqlite3
+import threading
+import typing
+
+from nave import buscador, catalogo
+
+if typing.TYPE_CHECKING:
+    import pandas as pd
+
+
+# Constants to be used in the module.
+BASE = catalogo.CACHE_FOLDER.parent / "catalogo.sqlite"
+VISTA = "perfiles"
+FAMILIA = buscador.CATALOG_COLUMN
+# Numeric columns the page filters by, shared by (almost) every family.
+FILTROS = ("gk [kg/m]", "Altura h [mm]", "Superficie_revestimiento [m²/m]")
+TAMANO_PAGINA = 50
+# Idle read-only connections kept per store file.
+CONEXIONES_LIBRES = 8
+# Bump when the layout of the tables changes.
+VERSION = 1
+
+# Signature of the catalog the store file was last checked against.
+_comprobada = {"clave": None}
+_lock = threading.Lock()
+# File identity and idle read-only connections of every store path.
+_conexiones = {}
+_lock_conexiones = threading.Lock()
+
+
+def quote(name) -> str:
+    """Quotes a column or table name for SQL."""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _literal(text) -> str:
+    return "'" + text.replace("'", "''") + "'"
+
+
+def _columnas(df) -> list:
+    """
+    Returns (name, SQL type, values) of every column. A column is REAL
+    when most of its values are numbers; repeated header rows and other
+    text in it are stored as NULL.
+    """
+    import pandas as pd
+    columnas = []
+    for name in df.columns:
+        values = df[name]
+        numbers = pd.to_numeric(values, errors="coerce")
+        if name != "Perfil" and numbers.count() * 2 >= values.count() > 0:
+            columnas.append((name, "REAL", [
+                None if value != value else float(value)
+                for value in numbers]))
+        else:
+            columnas.append((name, "TEXT", [
+                None if value is None or value != value else str(value)
+                for value in values]))
+    return columnas
+
+
+def _crear(conexion, dfs) -> None:
+    conexion.execute("CREATE TABLE meta (clave TEXT PRIMARY KEY, valor TEXT)")
+    conexion.execute(
+        "CREATE TABLE familias (orden INTEGER, familia TEXT, columnas TEXT)")
+    selects = []
+    for orden, (name, df) in enumerate(dfs.items()):
+        familia = name.replace(".xlsx", "")
+        columnas = _columnas(df)
+        names = [column for column, _, _ in columnas]
+        conexion.execute("CREATE TABLE {} ({})".format(
+            quote(familia),
+            ", ".join(f"{quote(column)} {kind}"
+                      for column, kind, _ in columnas)))
+        conexion.executemany(
+            "INSERT INTO {} VALUES ({})".format(
+                quote(familia), ", ".join("?" * len(columnas))),
+            zip(*(values for _, _, values in columnas)))
+        for column in FILTROS:
+            if column in names:
+                conexion.execute("CREATE INDEX {} ON {} ({})".format(
+                    quote(f"{familia}:{column}"), quote(familia),
+                    quote(column)))
+        conexion.execute(
+            "INSERT INTO familias VALUES (?, ?, ?)",
+            (orden, familia, json.dumps(names, ensure_ascii=False)))
+        # Families without a filter column show NULL for it in the view
+        compartidas = "".join(
+            ", {} AS {}".format(
+                quote(column) if column in names else "NULL", quote(column))
+            for column in FILTROS)
+        selects.append(
+            f"SELECT {orden} AS orden, rowid AS fila, "
+            f"{_literal(familia)} AS {quote(FAMILIA)}, "
+            f"{quote('Perfil')}{compartidas} FROM {quote(familia)}")
+    conexion.execute("CREATE VIEW {} AS {}".format(
+        quote(VISTA), " UNION ALL ".join(selects)))
+
+
+def _clave(db_folder) -> str:
+    return json.dumps(
+        [VERSION, str(db_folder), catalogo.file_signature(db_folder)])
+
+
+def _clave_guardada(base) -> typing.Optional[str]:
+    try:
+        with _conectar(base) as conexion:
+            row = conexion.execute(
+                "SELECT valor FROM meta WHERE clave = 'firma'").fetchone()
+    except (OSError, sqlite3.Error):
+        return None
+    return row[0] if row else None
+
+
+@contextlib.contextmanager
+def _conectar(base):
+    """
+    Yields a read-only connection to the store, for the calling thread
+    only. Connections are kept in a pool shared by every session of the
+    process, so the schema is parsed once per connection rather than on
+    every query, and concurrent searches run on connections of their own.
+    The pool is emptied when a rebuild replaces the file.
+    """
+    base = pathlib.Path(base)
+    stat = base.stat()
+    clave = (stat.st_ino, stat.st_mtime_ns)
+    conexion = None
+    with _lock_conexiones:
+        libres = _conexiones.get(str(base))
+        if libres is None or libres[0] != clave:
+            for vieja in libres[1] if libres is not None else ():
+                vieja.close()
+            libres = _conexiones[str(base)] = (clave, [])
+        if libres[1]:
+            conexion = libres[1].pop()
+    if conexion is None:
+        conexion = sqlite3.connect(
+            f"{base.resolve().as_uri()}?mode=ro", uri=True,
+            check_same_thread=False)
+    try:
+        yield conexion
+    finally:
+        with _lock_conexiones:
+            libres = _conexiones.get(str(base))
+            if (libres is not None and libres[0] == clave
+                    and len(libres[1]) < CONEXIONES_LIBRES):
+                libres[1].append(conexion)
+                conexion = None
+        if conexion is not None:
+            conexion.close()
+
+
+def actualizar(db_folder=catalogo.DB_FOLDER, base=BASE) -> pathlib.Path:
+    """
+    Makes sure the store matches the Excel files, building it from the
+    compiled catalog if needed, and returns its path.
+    """
+    base = pathlib.Path(base)
+    clave = _clave(db_folder)
+    if _comprobada["clave"] == (clave, str(base)):
+        return base
+    with _lock:
+        if _comprobada["clave"] == (clave, str(base)):
+            return base
+        if _clave_guardada(base) != clave:
+            dfs = catalogo.load_catalog(db_folder)
+            base.parent.mkdir(parents=True, exist_ok=True)
+            tmp = base.with_name(f"{base.name}.{os.getpid()}.tmp")
+            tmp.unlink(missing_ok=True)
+            conexion = sqlite3.connect(tmp)
+            try:
+                with conexion:
+                    _crear(conexion, dfs)
+                    conexion.execute(
+                        "INSERT INTO meta VALUES ('firma', ?)", (clave,))
+            finally:
+                conexion.close()
+            os.replace(tmp, base)
+        _comprobada["clave"] = (clave, str(base))
+    return base
+
+
+def columnas(familia=None, base=BASE) -> list:
+    """Columns of a family, or of the joined view when familia is None."""
+    if familia is None:
+        return [FAMILIA, "Perfil", *FILTROS]
+    with _conectar(base) as conexion:
+        row = conexion.execute(
+            "SELECT columnas FROM familias WHERE familia = ?",
+            (familia,)).fetchone()
+    if row is None:
+        raise KeyError(familia)
+    return json.loads(row[0])
+
+
+def _donde(filtros, disponibles) -> tuple:
+    """WHERE clause and parameters of the (min, max) ranges."""
+    clauses = []
+    params = []
+    for column, (low, high) in (filtros or {}).items():
+        if column not in disponibles:
+            raise KeyError(column)
+        if low is not None:
+            clauses.append(f"{quote(column)} >= ?")
+            params.append(float(low))
+        if high is not None:
+            clauses.append(f"{quote(column)} <= ?")
+            params.append(float(high))
+    where = " WHERE " + " AND ".join(clauses) if clauses else ""
+    return where, params
+
+
+def rangos(familia=None, base=BASE) -> dict:
+    """Returns column -> (min, max) of the filter columns that have data."""
+    disponibles = columnas(familia, base)
+    presentes = [column for column in FILTROS if column in disponibles]
+    if not presentes:
+        return {}
+    with _conectar(base) as conexion:
+        row = conexion.execute("SELECT {} FROM {}".format(
+            ", ".join(f"MIN({quote(c)}), MAX({quote(c)})" for c in presentes),
+            quote(familia or VISTA))).fetchone()
+    return {
+        column: (row[2 * i], row[2 * i + 1])
+        for i, column in enumerate(presentes) if row[2 * i] is not None}
+
+
+def contar(filtros=None, familia=None, base=BASE) -> int:
+    """Number of rows matching the ranges."""
+    where, params = _donde(filtros, columnas(familia, base))
+    with _conectar(base) as conexion:
+        return conexion.execute("SELECT COUNT(*) FROM {}{}".format(
+            quote(familia or VISTA), where), params).fetchone()[0]
+
+
+def consultar(
+    filtros=None, familia=None, columns=None, pagina=0,
+    tamano=TAMANO_PAGINA, base=BASE
+) -> "pd.DataFrame":
+    """
+    Returns one page of the rows matching the (min, max) ranges of
+    filtros, from one family or from every family when familia is None,
+    in catalog order. The index holds the position of each row among all
+    matching rows.
+    """
+    import pandas as pd
+    disponibles = columnas(familia, base)
+    if columns is None:
+        columns = disponibles
+    columns = [column for column in columns if column in disponibles]
+    where, params = _donde(filtros, disponibles)
+    orden = "rowid" if familia else "orden, fila"
+    offset = pagina * tamano
+    with _conectar(base) as conexion:
+        rows = conexion.execute(
+            "SELECT {} FROM {}{} ORDER BY {} LIMIT ? OFFSET ?".format(
+                ", ".join(quote(column) for column in columns) or "NULL",
+                quote(familia or VISTA), where, orden),
+            [*params, tamano, offset]).fetchall()
+    return pd.DataFrame(
+        rows, columns=columns, index=range(offset, offset + len(rows)))
@@ -0,0 +1,183 @@
+"""
+Deferred loading of the heavy parts of the pages.
+
+A page draws its first widgets with nothing but Streamlit and the light
+nave modules, then calls precargar(). That starts background threads
+which load the catalog (importing pandas), import matplotlib and bring
+the SQLite store of the Base de datos page up to date while the widgets
+are being sent, so the first use of any finds it ready or waits for the
+work already in progress instead of starting it again.
+
+The landing page starts the catalog warm-up too, so it is usually done
+before anyone opens the calculator, and shows its picture from a copy
+scaled down once into the cache (imagen()). Excel files that are not
+compiled yet (after a deploy that changed them, or with an empty
+cache) are parsed in a process pool. Sessions that need the catalog
+while it is loading wait on the same future through catalogo_listo(). A
+deploy can also compile the catalog (and scale the picture) before the
+server starts:
+
+    python -m nave.arranque
+"""
+import argparse
+import concurrent.futures
+import importlib
+import os
+import pathlib
+import threading
+import time
+
+from nave import catalogo
+
+
+# Widest size Streamlit shows an image at (px); wider ones are decoded,
+# resized and encoded again on every run.
+ANCHO_IMAGEN = 1460
+IMAGENES_FOLDER = catalogo.CACHE_FOLDER.parent / "imagenes"
+IMAGEN_PRESENTACION = (
+    pathlib.Path(__file__).parent.parent / "Recursos" / "naveejemplo.png")
+
+# Future of every background task, started once per server process.
+_tareas = {}
+_lock = threading.Lock()
+
+
+def _en_segundo_plano(nombre, funcion, *args) -> concurrent.futures.Future:
+    with _lock:
+        if nombre not in _tareas:
+            future = concurrent.futures.Future()
+
+            def objetivo():
+                future.set_running_or_notify_cancel()
+                try:
+                    future.set_result(funcion(*args))
+                except BaseException as error:
+                    future.set_exception(error)
+
+            _tareas[nombre] = future
+            threading.Thread(
+                target=objetivo, name=f"nave-{nombre}", daemon=True).start()
+        return _tareas[nombre]
+
+
+def _tarea_catalogo(db_folder, workers) -> concurrent.futures.Future:
+    return _en_segundo_plano(
+        f"catalogo:{db_folder}", catalogo.load_catalog, db_folder,
+        catalogo.CACHE_FOLDER, workers)
+
+
+def _actualizar_almacen(db_folder, workers):
+    from nave import almacen
+    # The store is built from the catalog the other task is loading
+    _tarea_catalogo(db_folder, workers).exception()
+    return almacen.actualizar(db_folder)
+
+
+def precargar(
+    db_folder=catalogo.DB_FOLDER, graficos=True, workers=None,
+    almacen=False
+) -> None:
+    """
+    Starts loading the catalog, parsing stale files in up to workers
+    processes (all CPUs if None), and, if graficos, importing matplotlib.
+    If almacen, the SQLite store of the Base de datos page is brought up
+    to date with it too.
+    """
+    _tarea_catalogo(db_folder, workers)
+    if graficos:
+        _en_segundo_plano(
+            "graficos", importlib.import_module, "matplotlib.pyplot")
+    if almacen:
+        _en_segundo_plano(
+            f"almacen:{db_folder}", _actualizar_almacen, db_folder, workers)
+
+
+def catalogo_listo(db_folder=catalogo.DB_FOLDER, workers=None) -> dict:
+    """
+    Returns the loaded catalog, waiting for the warm-up if it is still in
+    progress (and starting it if it was not).
+    """
+    try:
+        _tarea_catalogo(db_folder, workers).result()
+    except Exception:
+        # Errors are left to load_catalog, which repeats the work and
+        # raises them where they belong.
+        pass
+    # Stats the files only, and picks up files changed since the warm-up
+    return catalogo.load_catalog(db_folder)
+
+
+def almacen_listo(db_folder=catalogo.DB_FOLDER, workers=None):
+    """
+    Returns the path of the SQLite store, waiting for the warm-up if it
+    is still building it (and starting it if it was not).
+    """
+    from nave import almacen
+    future = _en_segundo_plano(
+        f"almacen:{db_folder}", _actualizar_almacen, db_folder, workers)
+    try:
+        future.result()
+    except Exception:
+        # As in catalogo_listo, the check below raises them
+        pass
+    # Stats the files only, unless they changed since the warm-up
+    return almacen.actualizar(db_folder)
+
+
+def imagen(
+    path, ancho=ANCHO_IMAGEN, cache_folder=IMAGENES_FOLDER
+) -> pathlib.Path:
+    """
+    Returns a copy of the image no wider than ancho, derived into the
+    cache the first time (and again when the original changes), so
+    Streamlit serves its bytes as they are. The original is returned if
+    it is narrow enough or the copy can not be written.
+    """
+    path = pathlib.Path(path)
+    copia = pathlib.Path(cache_folder) / f"{path.stem}_{ancho}{path.suffix}"
+    try:
+        if copia.stat().st_mtime_ns >= path.stat().st_mtime_ns:
+            return copia
+    except FileNotFoundError:
+        pass
+    from PIL import Image
+    with Image.open(path) as original:
+        if original.width <= ancho:
+            return path
+        formato = original.format
+        reducida = original.resize(
+            (ancho, round(original.height * ancho / original.width)),
+            Image.LANCZOS)
+    # Written aside and renamed, so no session reads a partial file
+    temporal = copia.with_name(
+        f".{copia.name}.{os.getpid()}.{threading.get_ident()}")
+    try:
+        copia.parent.mkdir(parents=True, exist_ok=True)
+        reducida.save(temporal, format=formato, optimize=True)
+        os.replace(temporal, copia)
+    except OSError:
+        temporal.unlink(missing_ok=True)
+        return path
+    return copia
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Compila el catálogo de perfiles y reduce la imagen de "
+                    "la presentación antes de arrancar el servidor.")
+    parser.add_argument(
+        "--db-folder", default=catalogo.DB_FOLDER,
+        help="carpeta con los ficheros Excel del catálogo")
+    parser.add_argument(
+        "-j", "--workers", type=int, default=None,
+        help="procesos para leer los ficheros (por defecto, todas las CPU)")
+    args = parser.parse_args(argv)
+    start = time.perf_counter()
+    dfs = catalogo_listo(args.db_folder, args.workers)
+    print(f"{len(dfs)} catálogos listos en "
+          f"{time.perf_counter() - start:.2f} s")
+    print(f"Imagen de la presentación: {imagen(IMAGEN_PRESENTACION)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,389 @@
+"""
+Benchmark suite of the pages, with Streamlit stubbed out.
+
+Times the catalog load, Geometry, the structural model, both views, the
+quote text and the profile search of the Base de datos page over a grid
+of hall sizes, together with the tracemalloc peak of every case. The
+results can be saved as a JSON baseline; later runs are compared with it
+and every case slower (or hungrier) than the threshold is reported as a
+regression, with a non-zero exit code.
+
+    python -m nave.benchmark --guardar          # record the baseline
+    python -m nave.benchmark                    # compare with it
+
+With --arranque it also runs every page in fresh interpreters and reports
+the time to its first visible element (the cold start of a server
+process) and to the end of the script.
+"""
+import argparse
+import datetime
+import functools
+import importlib.util
+import json
+import os
+import pathlib
+import platform
+import runpy
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+import types
+
+from nave import buscador, cache_vistas, catalogo, parametros
+
+
+ROOT = pathlib.Path(__file__).parent.parent
+PAGES_FOLDER = ROOT / "pages"
+CALCULADORA = PAGES_FOLDER / "01_Calculadora estructura.py"
+BASE_DE_DATOS = PAGES_FOLDER / "02_Base de datos.py"
+PAGINAS = (ROOT / "Presentacion.py", CALCULADORA, BASE_DE_DATOS)
+# Calls that do not draw anything by themselves.
+NO_VISIBLES = (
+    "set_page_config", "columns", "expander", "container", "empty",
+    "cache_data", "cache_resource", "cache")
+# Run by a fresh interpreter for every cold start measurement.
+_ARRANQUE = """
+import json, runpy, sys, time
+from nave import benchmark
+stub = benchmark.instalar_stub()
+inicio = time.perf_counter()
+runpy.run_path(sys.argv[1], run_name="__main__")
+fin = time.perf_counter()
+primero = next(
+    t for name, t in stub.llamadas if name not in benchmark.NO_VISIBLES)
+print(json.dumps({
+    "primer_widget_ms": (primero - inicio) * 1000,
+    "total_ms": (fin - inicio) * 1000}))
+"""
+BASELINE = catalogo.CACHE_FOLDER.parent / "benchmark.json"
+ANCHOS = (8.0, 18.0, 26.0)
+PORTICOS = (4, 7, 10)
+BUSQUEDAS = ("IPE", "hea 3", "QR25")
+REPETICIONES = 7
+UMBRAL = 0.2
+# Differences below these are noise, whatever the ratio.
+MINIMO_MS = 0.1
+MINIMO_KB = 64
+# Nodes of the calculator graph whose values the page shows.
+NODOS_PAGINA = (
+    "vista_superior", "vista_frontal", "quote", "lineas", "listado_xlsx",
+    "medicion", "modelo_3d", "planos_cad")
+ETIQUETA_BUSQUEDA = "Escribe el perfil a buscar con al menos dos letras:"
+
+
+class Widgets:
+    """
+    Stand-in for streamlit and its containers. Widgets return their
+    default value (or the one given in valores, by label) and every
+    output call does nothing.
+    """
+
+    def __init__(self, valores=None, llamadas=None) -> None:
+        self.valores = {} if valores is None else valores
+        # (name, perf_counter) of every call, shared by the containers
+        self.llamadas = [] if llamadas is None else llamadas
+        self.session_state = {}
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return functools.partial(self._llamada, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_) -> None:
+        pass
+
+    @property
+    def sidebar(self):
+        return Widgets(self.valores, self.llamadas)
+
+    def _llamada(self, name, *args, **kwargs):
+        self.llamadas.append((name, time.perf_counter()))
+        label = args[0] if args else kwargs.get("label")
+        if isinstance(label, str) and label in self.valores:
+            return self.valores[label]
+        if name in ("slider", "number_input"):
+            return kwargs.get("value", kwargs.get("min_value", 0))
+        if name in ("selectbox", "radio"):
+            options = list(kwargs.get("options", args[1:2] and args[1]))
+            return options[kwargs.get("index", 0)] if options else None
+        if name == "multiselect":
+            return kwargs.get("default", [])
+        if name == "checkbox":
+            return kwargs.get("value", False)
+        if name == "text_input":
+            return kwargs.get("value", "")
+        if name in ("button", "download_button"):
+            return False
+        if name == "columns":
+            spec = args[0] if args else kwargs["spec"]
+            count = spec if isinstance(spec, int) else len(spec)
+            return [
+                Widgets(self.valores, self.llamadas) for _ in range(count)]
+        if name in ("expander", "container", "empty", "spinner", "form"):
+            return Widgets(self.valores, self.llamadas)
+        if name in ("cache_data", "cache_resource", "cache"):
+            # Used bare (@st.cache_data) or with arguments
+            if args and callable(args[0]):
+                return args[0]
+            return lambda function: function
+        return None
+
+
+def instalar_stub(valores=None) -> Widgets:
+    """Replaces the streamlit module with a Widgets stub."""
+    stub = Widgets(valores)
+    modulo = types.ModuleType("streamlit")
+    modulo.__getattr__ = stub.__getattr__
+    modulo.sidebar = stub.sidebar
+    modulo.session_state = stub.session_state
+    sys.modules["streamlit"] = modulo
+    return stub
+
+
+def cargar_pagina(path):
+    """Imports a page as a module, without running its main()."""
+    spec = importlib.util.spec_from_file_location("pagina", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def medir(funcion, repeticiones=REPETICIONES, preparar=None) -> dict:
+    """
+    Runs funcion repeticiones times (calling preparar before each run,
+    untimed) and returns the median and best time and the tracemalloc
+    peak of one more run. An untimed first run pays the lazy imports.
+    """
+    tiempos = []
+    for _ in range(repeticiones + 1):
+        if preparar is not None:
+            preparar()
+        start = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - start) * 1000)
+    tiempos = tiempos[1:]
+    if preparar is not None:
+        preparar()
+    tracemalloc.start()
+    try:
+        funcion()
+        pico = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        "mediana_ms": round(statistics.median(tiempos), 4),
+        "minimo_ms": round(min(tiempos), 4),
+        "pico_kb": round(pico / 1024, 1),
+    }
+
+
+class _UI:
+    """UserInputs without widgets."""
+
+    def __init__(self, **valores) -> None:
+        self.__dict__.update(parametros.valores_por_defecto())
+        self.__dict__.update(valores)
+
+
+def casos(repeticiones=REPETICIONES, anchos=ANCHOS, porticos=PORTICOS):
+    """Yields (name, result) of every benchmark case."""
+    instalar_stub()
+    pagina = cargar_pagina(CALCULADORA)
+    col = Widgets()
+
+    yield "get_data_frames[frio]", medir(
+        pagina.get_data_frames, repeticiones, catalogo.reset)
+    yield "get_data_frames[memo]", medir(
+        pagina.get_data_frames, repeticiones)
+    dfs = pagina.get_data_frames()
+    seleccion = pagina.select_profiles(dfs, col)
+    perfiles = pagina.profile_properties(dfs, seleccion)
+    precios = pagina.CostInputs(col)
+    calculo = pagina.calculation_graph()
+    firma = catalogo.file_signature(pagina.DB_FOLDER)
+
+    def olvidar(*nodos):
+        for nodo in nodos:
+            calculo.nodos[nodo].memo.clear()
+
+    for ancho in anchos:
+        for cantidad in porticos:
+            sufijo = f"[ancho={ancho:g},porticos={cantidad}]"
+            ui = _UI(ancho_nave=ancho, cantidad_porticos=cantidad)
+
+            def ejecucion():
+                return calculo.ejecucion(
+                    firma_catalogo=firma, **vars(ui), **seleccion,
+                    **vars(precios))
+
+            yield "Geometry" + sufijo, medir(
+                lambda: pagina.Geometry(ui), repeticiones)
+            yield "build_model" + sufijo, medir(
+                lambda: pagina.build_model(perfiles, ui), repeticiones)
+            # Rendering without and with the view cache
+            yield "display_vista_superior" + sufijo, medir(
+                lambda: pagina.display_vista_superior(
+                    ejecucion()["vista_superior"], col),
+                repeticiones, cache_vistas.vistas.clear)
+            yield "display_vista_frontal" + sufijo, medir(
+                lambda: pagina.display_vista_frontal(
+                    ejecucion()["vista_frontal"], col),
+                repeticiones, cache_vistas.vistas.clear)
+            yield "display_vista_superior[cache]" + sufijo, medir(
+                lambda: pagina.display_vista_superior(
+                    ejecucion()["vista_superior"], col),
+                repeticiones)
+            def texto():
+                nodos = ejecucion()
+                pagina.display_text(
+                    nodos["quote"], nodos["perfiles_secundarios"],
+                    precios, col)
+
+            yield "display_text" + sufijo, medir(
+                texto, repeticiones,
+                lambda: olvidar("pesos", "costes", "quote"))
+            # A rerun where no input changed: keys only, no node computed
+            yield "grafo[sin cambios]" + sufijo, medir(
+                lambda: [ejecucion()[nodo] for nodo in NODOS_PAGINA],
+                repeticiones)
+
+    yield "SearchIndex", medir(
+        lambda: buscador.SearchIndex(dfs), repeticiones)
+    for query in BUSQUEDAS:
+        instalar_stub({ETIQUETA_BUSQUEDA: query})
+        # The first run builds the shared index
+        runpy.run_path(str(BASE_DE_DATOS))
+        yield f"buscador[{query}]", medir(
+            lambda: runpy.run_path(str(BASE_DE_DATOS)), repeticiones)
+
+
+def arranque(repeticiones=3):
+    """
+    Yields (name, result) of the cold start of every page: the median time
+    to its first visible element and to the end of the script, each run
+    in a new interpreter.
+    """
+    for pagina in PAGINAS:
+        medidas = []
+        for _ in range(repeticiones):
+            salida = subprocess.run(
+                (sys.executable, "-c", _ARRANQUE, str(pagina)), cwd=ROOT,
+                capture_output=True, text=True, check=True,
+                env={**os.environ, "MPLBACKEND": "Agg"})
+            medidas.append(json.loads(salida.stdout.splitlines()[-1]))
+        yield f"arranque[{pagina.stem}]", {
+            campo: round(statistics.median(m[campo] for m in medidas), 1)
+            for campo in ("primer_widget_ms", "total_ms")}
+
+
+def comparar(resultados: dict, baseline: dict, umbral=UMBRAL) -> list:
+    """Returns a description of every regression against the baseline."""
+    regresiones = []
+    for name, actual in resultados.items():
+        anterior = baseline.get(name)
+        if anterior is None:
+            continue
+        for campo, minimo in (("mediana_ms", MINIMO_MS),
+                              ("pico_kb", MINIMO_KB),
+                              ("primer_widget_ms", MINIMO_MS)):
+            if campo not in actual or campo not in anterior:
+                continue
+            diferencia = actual[campo] - anterior[campo]
+            if (diferencia > minimo
+                    and actual[campo] > anterior[campo] * (1 + umbral)):
+                regresiones.append(
+                    f"{name}: {campo} {anterior[campo]} -> {actual[campo]}")
+    return regresiones
+
+
+def metadatos() -> dict:
+    import matplotlib
+    import numpy
+    import pandas
+    return {
+        "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "numpy": numpy.__version__,
+        "pandas": pandas.__version__,
+        "matplotlib": matplotlib.__version__,
+    }
+
+
+def main(argv=None) -> None:
+    """Entry point of the command line."""
+    parser = argparse.ArgumentParser(
+        prog="python -m nave.benchmark",
+        description="Mide tiempos y memoria de las páginas.")
+    parser.add_argument(
+        "--baseline", default=BASELINE, type=pathlib.Path,
+        help="Fichero JSON de referencia")
+    parser.add_argument(
+        "--guardar", action="store_true",
+        help="Guarda los resultados como nueva referencia")
+    parser.add_argument(
+        "--umbral", type=float, default=UMBRAL,
+        help="Empeoramiento relativo que cuenta como regresión")
+    parser.add_argument(
+        "-r", "--repeticiones", type=int, default=REPETICIONES)
+    parser.add_argument(
+        "--rapido", action="store_true",
+        help="Solo la nave por defecto")
+    parser.add_argument(
+        "--arranque", action="store_true",
+        help="Mide también el arranque en frío de cada página")
+    args = parser.parse_args(argv)
+
+    rejilla = {}
+    if args.rapido:
+        rejilla = dict(
+            anchos=(parametros.LIMITES["ancho_nave"]["value"],),
+            porticos=(parametros.LIMITES["cantidad_porticos"]["value"],))
+    import matplotlib
+    matplotlib.use("Agg")
+    streamlit = sys.modules.get("streamlit")
+    resultados = {}
+    try:
+        for name, result in casos(args.repeticiones, **rejilla):
+            resultados[name] = result
+            print(
+                f"{name:60} {result['mediana_ms']:10.3f} ms "
+                f"{result['pico_kb']:10.1f} kB", flush=True)
+    finally:
+        if streamlit is None:
+            sys.modules.pop("streamlit", None)
+        else:
+            sys.modules["streamlit"] = streamlit
+    if args.arranque:
+        for name, result in arranque():
+            resultados[name] = result
+            print(
+                f"{name:60} {result['primer_widget_ms']:10.1f} ms hasta el "
+                f"primer widget, {result['total_ms']:.1f} ms en total",
+                flush=True)
+
+    regresiones = []
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        regresiones = comparar(resultados, baseline["casos"], args.umbral)
+        for regresion in regresiones:
+            print(f"REGRESIÓN {regresion}")
+        if not regresiones:
+            print(f"Sin regresiones respecto a {args.baseline}")
+    if args.guardar:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(
+            {"meta": metadatos(), "casos": resultados}, indent=1),
+            encoding="utf-8")
+        print(f"Referencia guardada en {args.baseline}")
+    if regresiones:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+In-memory search index over every profile name of every catalog.
+
+Names are normalized the same way the search box always treated them
+(case-insensitive, spaces removed) and indexed by their 2- and 3-grams,
+so a query only verifies the few names that share all its n-grams.
+"""
+import bisect
+import typing
+
+import numpy as np
+
+if typing.TYPE_CHECKING:
+    import pandas as pd
+
+
+# Name of the column that tells the source catalog of each hit.
+CATALOG_COLUMN = "Catálogo"
+GRAM_SIZES = (2, 3)
+
+# Index of the last catalog seen, keyed by the identity of its dict.
+_indexes = {"dfs": None, "index": None}
+
+
+def normalize(text) -> str:
+    """Lower case and without spaces, so "IPE 300" matches "IPE300"."""
+    return str(text).lower().replace(" ", "")
+
+
+def grams(text, size) -> set:
+    """Returns the set of substrings of the given size."""
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+class SearchIndex:
+    """Holds the normalized profile names and their n-gram postings."""
+
+    def __init__(self, dfs: dict) -> None:
+        self.catalogs = []
+        self.rows = []
+        self.names = []
+        self.normalized = []
+        # The (shared, read-only) frames the hits are read from
+        self.dfs = dfs
+        self.postings = {}
+        for catalog, df in dfs.items():
+            for row, name in enumerate(df["Perfil"].tolist()):
+                if not isinstance(name, str):
+                    continue
+                entry = len(self.names)
+                norm = normalize(name)
+                self.catalogs.append(catalog)
+                self.rows.append(row)
+                self.names.append(name)
+                self.normalized.append(norm)
+                for size in GRAM_SIZES:
+                    for gram in grams(norm, size):
+                        self.postings.setdefault(gram, []).append(entry)
+        # Sorted normalized names for prefix lookups.
+        self.prefix_keys = sorted(
+            (norm, entry) for entry, norm in enumerate(self.normalized))
+
+    def _candidates(self, query) -> set:
+        """Entries that contain every n-gram of the query."""
+        size = max(s for s in GRAM_SIZES if s <= len(query))
+        lists = sorted(
+            (self.postings.get(gram, ()) for gram in grams(query, size)),
+            key=len)
+        candidates = set(lists[0])
+        for posting in lists[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                break
+        return candidates
+
+    def prefix(self, query) -> list:
+        """Entries whose normalized name starts with the query."""
+        query = normalize(query)
+        start = bisect.bisect_left(self.prefix_keys, (query,))
+        hits = []
+        for norm, entry in self.prefix_keys[start:]:
+            if not norm.startswith(query):
+                break
+            hits.append(entry)
+        return hits
+
+    def search(self, query, limit=None) -> list:
+        """
+        Returns the matching entries ranked: exact match first, then
+        prefix matches, then names that contain the query elsewhere.
+        Shorter names rank first inside each group.
+        """
+        query = normalize(query)
+        if len(query) < min(GRAM_SIZES):
+            return []
+        hits = []
+        for entry in self._candidates(query):
+            norm = self.normalized[entry]
+            position = norm.find(query)
+            if position < 0:
+                continue
+            rank = 0 if norm == query else 1 if position == 0 else 2
+            hits.append((rank, position, len(norm), entry))
+        hits.sort()
+        entries = [hit[-1] for hit in hits]
+        return entries[:limit] if limit is not None else entries
+
+    def table(self, entries, columns) -> "pd.DataFrame":
+        """
+        Builds the results table with one take per catalog and column, so
+        only the cells of the hits are copied out of the catalog. The first
+        column tells the source catalog of each hit; columns missing in a
+        catalog are left empty.
+        """
+        import pandas as pd
+        columns = [CATALOG_COLUMN] + [
+            column for column in columns if column != CATALOG_COLUMN]
+        hits = {}
+        for position, entry in enumerate(entries):
+            positions, rows = hits.setdefault(self.catalogs[entry], ([], []))
+            positions.append(position)
+            rows.append(self.rows[entry])
+        data = {
+            column: np.full(len(entries), None, dtype=object)
+            for column in columns}
+        for catalog, (positions, rows) in hits.items():
+            df = self.dfs[catalog]
+            data[CATALOG_COLUMN][positions] = catalog.replace(".xlsx", "")
+            for column in columns[1:]:
+                if column in df.columns:
+                    data[column][positions] = df[column].to_numpy()[rows]
+        return pd.DataFrame(data, columns=columns).infer_objects()
+
+
+def get_search_index(dfs: dict) -> SearchIndex:
+    """Returns the index for the given catalog, building it only once."""
+    if _indexes["dfs"] is not dfs:
+        _indexes["index"] = SearchIndex(dfs)
+        _indexes["dfs"] = dfs
+    return _indexes["index"]
@@ -0,0 +1,97 @@
+"""
+Bounded LRU cache of the rendered views.
+
+Both views used to be drawn and rasterised on every rerun, even when only
+an unrelated widget moved. The pages now render each figure once to PNG
+(or SVG) bytes, keyed on exactly the inputs the view uses, and reuse the
+bytes until those inputs change. The cache is bounded by the total size
+of the stored images and evicts the least recently used ones first.
+
+The view nodes of the calculation graph (nave.grafo) keep their values in
+the shared cache, vistas; its counters are part of every profiled rerun.
+"""
+import collections
+import io
+import threading
+
+from nave import perfilado
+
+
+# Total size of the cached images (the default PNGs are ~100-200 kB).
+MAX_BYTES = 32 * 1024 * 1024
+# Same output as st.pyplot.
+DPI = 200
+
+
+def render(fig, formato="png", dpi=DPI) -> bytes:
+    """
+    Rasterises a figure the way st.pyplot does and returns the bytes. The
+    figure is closed, so none leaks across reruns.
+    """
+    import matplotlib.pyplot as plt
+    buffer = io.BytesIO()
+    try:
+        fig.savefig(buffer, format=formato, dpi=dpi, bbox_inches="tight")
+        perfilado.figura(fig)
+    finally:
+        plt.close(fig)
+    return buffer.getvalue()
+
+
+class CacheVistas:
+    """LRU cache of image bytes, evicted by total size."""
+
+    def __init__(self, max_bytes=MAX_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.entradas = collections.OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Returns the cached bytes of key, or default."""
+        with self._lock:
+            data = self.entradas.get(key)
+            if data is None:
+                self.misses += 1
+                return default
+            self.entradas.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key, data: bytes) -> None:
+        """Stores data, evicting the oldest entries until it fits."""
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self.entradas.pop(key, None)
+            if old is not None:
+                self.bytes -= len(old)
+            while self.entradas and self.bytes + len(data) > self.max_bytes:
+                _, evicted = self.entradas.popitem(last=False)
+                self.bytes -= len(evicted)
+                self.evictions += 1
+            self.entradas[key] = data
+            self.bytes += len(data)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.entradas.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        """Counters for the debug output."""
+        with self._lock:
+            return {
+                "entradas": len(self.entradas),
+                "bytes": self.bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+# Shared by every session of the server process.
+vistas = CacheVistas()
@@ -0,0 +1,176 @@
+"""
+Load test of the quoting service (nave.servicio).
+
+Opens a number of keep-alive connections and sends requests on all of
+them at once, drawing the halls from a pool of random configurations: a
+small pool measures the cache and the coalescing of identical requests,
+a large one the vectorized engine. Reports the throughput, the latency
+percentiles and the counters of the service.
+
+    python -m nave.servicio --workers 4 &
+    python -m nave.carga --peticiones 20000 --conexiones 64 --distintas 500
+
+With --arrancar the service is started in a child process for the run.
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from nave import catalogo, parametros
+
+
+PETICIONES = 10000
+CONEXIONES = 32
+DISTINTAS = 200
+PERCENTILES = (50, 90, 99)
+
+
+def configuraciones(count, semilla=0) -> list:
+    """Random halls within the bounds of the widgets, as request bodies."""
+    rng = np.random.default_rng(semilla)
+    perfiles = ("IPE300", "IPE360", "IPE400", "HEA300", "HEB240")
+    cuerpos = []
+    for _ in range(count):
+        hall = {
+            name: rng.choice(parametros.rango(name)).item()
+            for name in ("cantidad_porticos", "ancho_nave", "altura_alero",
+                         "inclinacion_tejado")}
+        hall["perfil_pilar"] = str(rng.choice(perfiles))
+        hall["perfil_viga"] = str(rng.choice(perfiles))
+        cuerpos.append(json.dumps(hall).encode())
+    return cuerpos
+
+
+async def _peticion(reader, writer, host, ruta, cuerpo) -> int:
+    writer.write(
+        f"POST /{ruta} HTTP/1.1\r\nhost: {host}\r\n"
+        "content-type: application/json\r\n"
+        f"content-length: {len(cuerpo)}\r\n\r\n".encode() + cuerpo)
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    length = 0
+    for line in head.split(b"\r\n"):
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":", 1)[1])
+    await reader.readexactly(length)
+    return status
+
+
+async def _cliente(host, port, ruta, cuerpos, indices, latencias, errores):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for index in indices:
+            start = time.perf_counter()
+            status = await _peticion(
+                reader, writer, host, ruta, cuerpos[index])
+            latencias.append(time.perf_counter() - start)
+            if status != 200:
+                errores.append(status)
+    finally:
+        writer.close()
+
+
+async def _salud(host, port) -> dict:
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(
+            f"GET /salud HTTP/1.1\r\nhost: {host}\r\n"
+            "connection: close\r\n\r\n".encode())
+        respuesta = await reader.read()
+    finally:
+        writer.close()
+    return json.loads(respuesta.split(b"\r\n\r\n", 1)[1])
+
+
+async def _esperar(host, port, segundos=30.0) -> None:
+    limite = time.monotonic() + segundos
+    while True:
+        try:
+            await _salud(host, port)
+            return
+        except OSError:
+            if time.monotonic() > limite:
+                raise
+            await asyncio.sleep(0.1)
+
+
+async def cargar(
+    host="127.0.0.1", port=8000, ruta="presupuesto", peticiones=PETICIONES,
+    conexiones=CONEXIONES, distintas=DISTINTAS, semilla=0
+) -> dict:
+    """Runs the load test and returns its measurements."""
+    cuerpos = configuraciones(distintas, semilla)
+    rng = np.random.default_rng(semilla + 1)
+    indices = rng.integers(0, distintas, peticiones)
+    latencias = []
+    errores = []
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        _cliente(host, port, ruta, cuerpos, indices[i::conexiones].tolist(),
+                 latencias, errores)
+        for i in range(conexiones)))
+    elapsed = time.perf_counter() - start
+    return {
+        "peticiones": peticiones,
+        "segundos": round(elapsed, 3),
+        "por_segundo": round(peticiones / elapsed, 1),
+        **{f"p{p}_ms": round(float(np.percentile(latencias, p)) * 1000, 3)
+           for p in PERCENTILES},
+        "errores": len(errores),
+        "servicio": await _salud(host, port),
+    }
+
+
+def main(argv=None) -> None:
+    """Entry point of the command line."""
+    parser = argparse.ArgumentParser(
+        prog="python -m nave.carga",
+        description="Prueba de carga del servicio de presupuestos.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--ruta", default="presupuesto",
+        choices=("geometria", "listado", "presupuesto"))
+    parser.add_argument("-n", "--peticiones", type=int, default=PETICIONES)
+    parser.add_argument(
+        "-c", "--conexiones", type=int, default=CONEXIONES,
+        help="Conexiones simultáneas")
+    parser.add_argument(
+        "--distintas", type=int, default=DISTINTAS,
+        help="Naves distintas entre las que se eligen las peticiones")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument(
+        "--arrancar", action="store_true",
+        help="Arranca el servicio durante la prueba")
+    parser.add_argument(
+        "-w", "--workers", type=int, default=1,
+        help="Procesos del servicio arrancado con --arrancar")
+    args = parser.parse_args(argv)
+
+    servidor = None
+    if args.arrancar:
+        # Compiled before the service forks its workers
+        catalogo.load_catalog()
+        servidor = subprocess.Popen(
+            [sys.executable, "-m", "nave.servicio", "--host", args.host,
+             "--port", str(args.port), "--workers", str(args.workers)],
+            stdout=subprocess.DEVNULL)
+    try:
+        asyncio.run(_esperar(args.host, args.port))
+        resultado = asyncio.run(cargar(
+            args.host, args.port, args.ruta, args.peticiones,
+            args.conexiones, args.distintas, args.semilla))
+    finally:
+        if servidor is not None:
+            servidor.terminate()
+            servidor.wait()
+    print(json.dumps(resultado, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Compiled profile catalog.
+
+The Excel files in DBs are parsed once and stored as pickled data frames
+in a cache folder, together with a manifest holding the modification time,
+size and hash of every source file. Only files that changed are parsed
+again; everything else is loaded straight from the compiled artifact.
+
+The compiled frames are also written as one column-oriented file next to
+the cache folder (see nave.mapeado). load_catalog maps that file, so all
+the server processes share one read-only copy of the numbers instead of
+unpickling their own.
+
+pandas is imported on first use, so a page can draw its first widgets
+before it is loaded.
+"""
+import concurrent.futures
+import hashlib
+import json
+import multiprocessing
+import os
+import pathlib
+import pickle
+import threading
+import typing
+
+from nave import mapeado
+
+if typing.TYPE_CHECKING:
+    import pandas as pd
+
+
+# Constants to be used in the module.
+DB_FOLDER = pathlib.Path(__file__).parent.parent / "DBs"
+CACHE_FOLDER = pathlib.Path(__file__).parent.parent / ".cache" / "catalogo"
+MANIFEST = "manifest.json"
+# Families usable for the pillars and beams of the portal frames.
+FAMILIAS_PORTICO = ("HEA", "HEB", "HEM", "I-Profile", "IPE")
+# Bump when the layout of the compiled artifact changes.
+VERSION = 1
+
+# In-process copy of the last loaded catalog, keyed by the file signature.
+_loaded = {"signature": None, "dfs": None}
+_lock = threading.Lock()
+
+
+def read_excel_catalog(path) -> "pd.DataFrame":
+    """Reads one Excel file and returns it with one row per profile."""
+    import pandas as pd
+    df = pd.read_excel(path)
+    # Set first column as index and transpose the DF
+    df = df.set_index(df.columns[0])
+    df = df.T
+    df.rename(
+        columns=lambda column: column.replace("_x000D_", "_"),
+        inplace=True)
+    # Set columns as new index
+    df.index.name = "Perfil"
+    df.reset_index(inplace=True)
+    df.rename(columns={"index": df.index.name}, inplace=True)
+    return df.rename(columns={df.columns[0]: "Perfil"})
+
+
+def file_hash(path) -> str:
+    """Returns the SHA-256 of the file contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_names(db_folder=DB_FOLDER) -> list:
+    """Names of the catalog files, in the order load_catalog returns them."""
+    return [name for name, _, _ in _signature(db_folder)]
+
+
+def file_signature(db_folder=DB_FOLDER) -> tuple:
+    """(name, mtime, size) of every catalog file; changes when any does."""
+    return _signature(db_folder)
+
+
+def _signature(db_folder) -> tuple:
+    """Cheap signature of the source files (name, mtime and size)."""
+    signature = []
+    for entry in sorted(os.scandir(db_folder), key=lambda e: e.name):
+        if entry.name.endswith(".xlsx") and not entry.name.startswith("~$"):
+            stat = entry.stat()
+            signature.append((entry.name, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+def _read_manifest(cache_folder) -> dict:
+    import pandas as pd
+    try:
+        with open(cache_folder / MANIFEST, encoding="utf-8") as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    if (manifest.get("version") != VERSION
+            or manifest.get("pandas") != pd.__version__):
+        return {}
+    return manifest.get("files", {})
+
+
+def _write_manifest(cache_folder, files) -> None:
+    import pandas as pd
+    manifest = {"version": VERSION, "pandas": pd.__version__, "files": files}
+    tmp = cache_folder / f"{MANIFEST}.tmp"
+    with open(tmp, "w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=1, ensure_ascii=False)
+    os.replace(tmp, cache_folder / MANIFEST)
+
+
+def _artifact_name(name) -> str:
+    return f"{pathlib.Path(name).stem}.pkl"
+
+
+def _parse(paths, workers) -> list:
+    """
+    Parses the Excel files, in a process pool of up to workers processes
+    (all CPUs if None) when there is more than one file to parse. The
+    workers import the main module again, so a script that loads the
+    catalog keeps its work under if __name__ == "__main__".
+    """
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    if workers <= 1:
+        return [read_excel_catalog(path) for path in paths]
+    # Spawned, not forked: the pool is started from the warm-up thread of
+    # a server with other threads running, whose locks a fork would copy
+    # in whatever state they are
+    with concurrent.futures.ProcessPoolExecutor(
+        workers, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        return list(executor.map(read_excel_catalog, paths))
+
+
+def compile_catalog(
+    db_folder=DB_FOLDER, cache_folder=CACHE_FOLDER, signature=None,
+    workers=1
+) -> dict:
+    """
+    Brings the compiled artifact up to date and returns the loaded data
+    frames. Files whose mtime and size match the manifest are not touched;
+    files whose mtime changed but whose hash did not are only re-stamped.
+    The files that do have to be parsed again are parsed by up to workers
+    processes.
+    """
+    import pandas as pd
+    db_folder = pathlib.Path(db_folder)
+    cache_folder = pathlib.Path(cache_folder)
+    if signature is None:
+        signature = _signature(db_folder)
+    old_files = _read_manifest(cache_folder)
+    files = {}
+    dfs = {}
+    writable = True
+    try:
+        cache_folder.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        writable = False
+
+    stale = []
+    for name, mtime_ns, size in signature:
+        entry = dict(old_files.get(name) or {})
+        artifact = cache_folder / _artifact_name(name)
+        df = None
+        if entry and artifact.exists():
+            if entry["mtime_ns"] != mtime_ns or entry["size"] != size:
+                digest = file_hash(db_folder / name)
+                if digest != entry["sha256"]:
+                    entry = None
+            if entry:
+                try:
+                    df = pd.read_pickle(artifact)
+                except (OSError, pickle.UnpicklingError, EOFError):
+                    entry = None
+        if df is None:
+            stale.append(name)
+            entry = {"sha256": file_hash(db_folder / name)}
+        entry.update(mtime_ns=mtime_ns, size=size)
+        files[name] = entry
+        dfs[name] = df
+
+    parsed = _parse([db_folder / name for name in stale], workers)
+    for name, df in zip(stale, parsed):
+        dfs[name] = df
+        if writable:
+            try:
+                df.to_pickle(cache_folder / _artifact_name(name))
+            except OSError:
+                writable = False
+
+    if writable:
+        # Drop artifacts of files that no longer exist in DBs.
+        for name in old_files.keys() - files.keys():
+            (cache_folder / _artifact_name(name)).unlink(missing_ok=True)
+        if files != old_files:
+            try:
+                _write_manifest(cache_folder, files)
+            except OSError:
+                pass
+    return dfs
+
+
+def load_catalog(
+    db_folder=DB_FOLDER, cache_folder=CACHE_FOLDER, workers=1
+) -> dict:
+    """
+    Returns a dict of file name -> data frame for every Excel file in DBs.
+    Repeated calls only stat the source files; the frames are shared and
+    read-only (numeric columns are float64 views of the mapped file).
+    Files that changed are parsed by up to workers processes.
+    """
+    signature = _signature(db_folder)
+    key = (str(db_folder), signature)
+    if _loaded["signature"] == key:
+        return _loaded["dfs"]
+    with _lock:
+        if _loaded["signature"] != key:
+            _loaded["dfs"] = _mapear(
+                db_folder, cache_folder, signature, workers)
+            _loaded["signature"] = key
+    return _loaded["dfs"]
+
+
+def mapped_path(cache_folder=CACHE_FOLDER) -> pathlib.Path:
+    """Path of the memory-mapped copy of the compiled catalog."""
+    return pathlib.Path(cache_folder).with_suffix(".col")
+
+
+def _mapear(db_folder, cache_folder, signature, workers) -> dict:
+    """
+    Maps the column file of the catalog, compiling the catalog and writing
+    the file first if it is missing or stale. Falls back to the compiled
+    frames when the file can not be written.
+    """
+    path = mapped_path(cache_folder)
+    clave = json.dumps([VERSION, str(db_folder), signature])
+    dfs = mapeado.abrir(path, clave)
+    if dfs is None:
+        compiled = compile_catalog(db_folder, cache_folder, signature, workers)
+        try:
+            mapeado.escribir(compiled, path, clave)
+        except OSError:
+            return compiled
+        dfs = mapeado.abrir(path, clave) or compiled
+    return dfs
+
+
+def reset() -> None:
+    """
+    Drops the in-process copy, so the next load_catalog reads the compiled
+    cache again (as a fresh server process does).
+    """
+    with _lock:
+        _loaded.update(signature=None, dfs=None)
@@ -0,0 +1,267 @@
+"""
+Structural check of every catalog profile for the current frame.
+
+Takes the section properties of the Excel sheets (area, Iy, Wel,y, radii
+of gyration and buckling curves) of every family that has them into one
+set of arrays, and computes the utilization of every profile under the
+simplified frame loads of nave.optimizador in a single vectorized pass:
+
+    flexion   knee moment q·s·L²/12 over the elastic moment Wel,y·fy
+    flecha    beam deflection 5·q·s·L⁴/(384·E·Iy) over L/200
+    pandeo    pillar axial force over its buckling resistance χ·A·fy
+              (EN 1993-1-1 6.3.1), plus the knee moment as above
+
+The deflection of a simply supported beam is an upper bound for a frame
+with rigid corners. The whole catalog is checked in about a millisecond:
+
+    python -m nave.comprobacion --ancho-nave 18 --altura-alero 6
+"""
+import argparse
+import math
+import typing
+
+import numpy as np
+
+from nave import catalogo, optimizador
+
+if typing.TYPE_CHECKING:
+    import pandas as pd
+
+
+# Steel S235 and the limits of the check.
+MODULO_ELASTICO = 210000  # MPa
+LIMITE_FLECHA = 200  # L/200
+# Buckling length over the eave height: in the plane of a sway frame with
+# pinned bases, and out of it between the foundation and the eave rail.
+PANDEO_Y = 2.0
+PANDEO_Z = 1.0
+# Imperfection factor of every buckling curve; profiles without a curve
+# get the most unfavourable one.
+CURVAS = {"a0": 0.13, "a": 0.21, "b": 0.34, "c": 0.49, "d": 0.76}
+# Checks that decide whether a profile is valid for each member.
+MIEMBROS = {
+    "viga": ("flexion", "flecha"),
+    "pilar": ("pandeo",),
+    None: ("flexion", "flecha", "pandeo"),
+}
+COLUMNAS = (
+    "familia", "perfil", "gk [kg/m]", "flexion", "flecha", "pandeo",
+    "aprovechamiento", "valido")
+
+
+def _buscar(df, final, inicio="") -> typing.Optional[str]:
+    """First column starting with inicio and ending with final."""
+    for column in df.columns:
+        if column.startswith(inicio) and column.endswith(final):
+            return column
+    return None
+
+
+def _curva(df, eje) -> "pd.Series":
+    """Imperfection factor of the S235 buckling curve about an axis."""
+    import pandas as pd
+    column = (_buscar(df, eje, "Knickline S235")
+              or _buscar(df, "jede Achse", "Knickline S235"))
+    if column is None:
+        return pd.Series(CURVAS["d"], index=df.index)
+    return (df[column].astype(str).str.strip().map(CURVAS)
+            .fillna(CURVAS["d"]))
+
+
+def _propiedades(df) -> typing.Optional["pd.DataFrame"]:
+    """
+    Section properties of a family, or None when it lacks any of them.
+    Repeated header rows and other text become NaN.
+    """
+    import pandas as pd
+    area = _buscar(df, "A [cm²]", "Querschnittsfläche")
+    radio_y = _buscar(df, "iy [cm]")
+    modulos = [column for column in df.columns
+               if column.startswith("Wel,y")]
+    if not (area and radio_y and modulos and "Iy [cm]" in df.columns):
+        return None
+
+    def numeros(column):
+        return pd.to_numeric(df[column], errors="coerce")
+
+    radio_z = _buscar(df, "iz [cm]")
+    return pd.DataFrame({
+        "perfil": df["Perfil"],
+        "gk": numeros("gk [kg/m]"),
+        "area": numeros(area),
+        "inercia": numeros("Iy [cm]"),
+        # T sections: the smaller modulus, at the tip of the web (the
+        # sheet gives it as negative)
+        "modulo": pd.concat(
+            [numeros(column).abs() for column in modulos],
+            axis=1).min(axis=1),
+        "radio_y": numeros(radio_y),
+        # Round tubes only give one radius
+        "radio_z": numeros(radio_z or radio_y),
+        "alfa_y": _curva(df, "y-y"),
+        "alfa_z": _curva(df, "z-z"),
+    })
+
+
+class Secciones:
+    """Section properties of every checkable profile, sorted by weight."""
+
+    def __init__(self, dfs: dict, familias=None) -> None:
+        import pandas as pd
+        frames = []
+        for name, df in dfs.items():
+            familia = name.replace(".xlsx", "")
+            if familias is not None and familia not in familias:
+                continue
+            propiedades = _propiedades(df)
+            if propiedades is not None:
+                frames.append(propiedades.assign(familia=familia))
+        tabla = pd.concat(frames, ignore_index=True).dropna()
+        tabla = tabla.sort_values("gk", ignore_index=True, kind="stable")
+        self.familia = tabla["familia"].to_numpy()
+        self.perfil = tabla["perfil"].to_numpy()
+        for name in (
+            "gk", "area", "inercia", "modulo", "radio_y", "radio_z",
+            "alfa_y", "alfa_z"
+        ):
+            setattr(self, name, tabla[name].to_numpy(dtype=float))
+
+    def __len__(self) -> int:
+        return len(self.gk)
+
+
+def reduccion_pandeo(esbeltez, alfa) -> np.ndarray:
+    """Buckling reduction factor χ of EN 1993-1-1 6.3.1.2."""
+    phi = 0.5 * (1 + alfa * (esbeltez - 0.2) + esbeltez ** 2)
+    chi = 1 / (phi + np.sqrt(phi ** 2 - esbeltez ** 2))
+    return np.minimum(chi, 1.0)
+
+
+def aprovechamientos(
+    secciones: Secciones, ancho_nave, altura_alero, separacion,
+    carga=optimizador.CARGA_CUBIERTA
+) -> dict:
+    """
+    Returns check -> utilization of every profile (1 is the limit) for a
+    frame of the given span and eave height (m) carrying separacion (m)
+    of roof.
+    """
+    fy = optimizador.LIMITE_ELASTICO
+    linea = carga * separacion  # kN/m, which is N/mm
+    momento = optimizador.COEFICIENTE_CARGAS * linea * ancho_nave ** 2 / 12
+    # kNm over cm³·MPa
+    flexion = momento * 1000 / (secciones.modulo * fy)
+
+    luz = ancho_nave * 1000  # mm
+    flecha = (5 * linea * luz ** 4
+              / (384 * MODULO_ELASTICO * secciones.inercia * 1e4))
+    flecha = flecha / (luz / LIMITE_FLECHA)
+
+    axil = optimizador.COEFICIENTE_CARGAS * linea * ancho_nave / 2  # kN
+    esbeltez_euler = math.pi * math.sqrt(MODULO_ELASTICO / fy)
+    chi = np.minimum(*(
+        reduccion_pandeo(
+            factor * altura_alero * 100 / (radio * esbeltez_euler), alfa)
+        for factor, radio, alfa in (
+            (PANDEO_Y, secciones.radio_y, secciones.alfa_y),
+            (PANDEO_Z, secciones.radio_z, secciones.alfa_z))))
+    # cm²·MPa over ten is kN
+    pandeo = axil / (chi * secciones.area * fy / 10) + flexion
+    return {"flexion": flexion, "flecha": flecha, "pandeo": pandeo}
+
+
+def capacidad(
+    secciones: Secciones, ancho_nave, altura_alero, miembro
+) -> np.ndarray:
+    """
+    Line load (kN/m of frame, carga·separacion) every profile carries as
+    a beam or a pillar of the frame. Every check grows in proportion to
+    the load, so a profile is valid where it reaches carga·separacion.
+    """
+    if miembro not in ("viga", "pilar"):
+        raise ValueError(f"Miembro desconocido: {miembro}")
+    resultados = aprovechamientos(
+        secciones, ancho_nave, altura_alero, 1.0, 1.0)
+    return 1 / np.max(
+        [resultados[name] for name in MIEMBROS[miembro]], axis=0)
+
+
+def tabla(
+    secciones: Secciones, resultados: dict, miembro=None
+) -> "pd.DataFrame":
+    """
+    Feasibility table of every profile as a beam ("viga"), a pillar
+    ("pilar") or both (None): valid profiles first, lightest first.
+    """
+    import pandas as pd
+    if miembro not in MIEMBROS:
+        raise ValueError(f"Miembro desconocido: {miembro}")
+    aprovechamiento = np.max(
+        [resultados[name] for name in MIEMBROS[miembro]], axis=0)
+    valido = aprovechamiento <= 1
+    # gk is sorted already, so a stable sort on validity keeps it
+    orden = np.argsort(~valido, kind="stable")
+    return pd.DataFrame(dict(zip(COLUMNAS, (
+        secciones.familia[orden], secciones.perfil[orden],
+        secciones.gk[orden], *(
+            np.round(resultados[name][orden], 3)
+            for name in ("flexion", "flecha", "pandeo")),
+        np.round(aprovechamiento[orden], 3), valido[orden]))))
+
+
+def comprobar(
+    dfs: dict, ancho_nave, altura_alero, cantidad_porticos,
+    distancia_porticos_finales, distancia_porticos_internos, miembro=None,
+    carga=optimizador.CARGA_CUBIERTA, secciones=None, **_
+) -> "pd.DataFrame":
+    """
+    Checks every profile of the catalog for a hall given by the engine
+    arguments; secciones may be passed to reuse the arrays.
+    """
+    if secciones is None:
+        secciones = Secciones(dfs)
+    separacion = float(optimizador.separacion_tributaria(
+        cantidad_porticos, distancia_porticos_finales,
+        distancia_porticos_internos))
+    return tabla(secciones, aprovechamientos(
+        secciones, ancho_nave, altura_alero, separacion, carga), miembro)
+
+
+def main(argv=None) -> None:
+    """Entry point of the command line."""
+    import time
+
+    parser = argparse.ArgumentParser(
+        prog="python -m nave.comprobacion",
+        description="Aprovechamiento de todos los perfiles del catálogo "
+                    "para un pórtico.")
+    parser.add_argument("--ancho-nave", type=float, default=18.0)
+    parser.add_argument("--altura-alero", type=float, default=4.0)
+    parser.add_argument("--cantidad-porticos", type=int, default=5)
+    parser.add_argument("--distancia-finales", type=float, default=5.5)
+    parser.add_argument("--distancia-internos", type=float, default=6.0)
+    parser.add_argument(
+        "--carga", type=float, default=optimizador.CARGA_CUBIERTA,
+        help="Carga de la cubierta (kN/m²)")
+    parser.add_argument(
+        "--miembro", choices=("viga", "pilar"), default=None,
+        help="Comprobar solo como viga o como pilar")
+    parser.add_argument(
+        "-n", "--filas", type=int, default=20, help="Filas a mostrar")
+    args = parser.parse_args(argv)
+
+    dfs = catalogo.load_catalog()
+    secciones = Secciones(dfs)
+    start = time.perf_counter()
+    resultado = comprobar(
+        dfs, args.ancho_nave, args.altura_alero, args.cantidad_porticos,
+        args.distancia_finales, args.distancia_internos, args.miembro,
+        args.carga, secciones)
+    elapsed = time.perf_counter() - start
+    print(resultado.head(args.filas).to_string(index=False))
+    print(f"{int(resultado['valido'].sum())} de {len(secciones)} perfiles "
+          f"válidos, comprobados en {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Batched line drawing.
+
+The views used to create one Line2D artist per purlin, brace or frame
+edge. Segmentos collects the segments instead, grouped by style, and
+draws every group as a single LineCollection. The views draw the rows of
+the structural model (nave.modelo), styled by member type.
+"""
+import numpy as np
+
+from nave import modelo
+
+
+# Convenient color constants.
+RED = "red"
+GREEN = "green"
+BLUE = "blue"
+BLACK = "black"
+# (color, linestyle, linewidth) of every member type in each view.
+ESTILOS = {
+    # Wall rails lie under the eaves
+    ("superior", "wandriegel"): (RED, "-", None),
+    ("superior", "alero"): (RED, "-", None),
+    ("superior", "cumbrera"): (RED, "-", None),
+    ("superior", "portico_hastial"): (BLUE, "-", None),
+    ("superior", "portico_interno"): (BLUE, "--", None),
+    ("superior", "correa"): (GREEN, "--", None),
+    ("superior", "arriostramiento"): (RED, "-", None),
+    ("frontal", "suelo"): (BLACK, "-", 0.5),
+    **{("frontal", tipo): (BLUE, "-", 1) for tipo in (
+        "pilar", "viga", "cartela", "wandriegel", "correa")},
+}
+
+
+class Segmentos:
+    """Collects line segments grouped by (color, linestyle, linewidth)."""
+
+    def __init__(self) -> None:
+        self.grupos = {}
+
+    def add(
+        self, x, y, color, linestyle="-", linewidth=None
+    ) -> None:
+        """
+        Adds the segments (x[0], y[0]) -> (x[1], y[1]), with the same call
+        shape as ax.plot((x0, x1), (y0, y1)). Each end may be a scalar or
+        an array; they are broadcast, so one call adds many segments.
+        """
+        x0, y0, x1, y1 = np.broadcast_arrays(
+            *(np.asarray(value, dtype=float)
+              for value in (x[0], y[0], x[1], y[1])))
+        segments = np.stack(
+            (np.stack((x0, y0), axis=-1), np.stack((x1, y1), axis=-1)),
+            axis=-2).reshape(-1, 2, 2)
+        # Groups are drawn in the order of their last addition, so what
+        # was added last stays on top as it did with separate artists.
+        parts = self.grupos.pop((color, linestyle, linewidth), [])
+        parts.append(segments)
+        self.grupos[(color, linestyle, linewidth)] = parts
+
+    def horizontal(self, y, xlim, color, linestyle="-", linewidth=None):
+        """Same as ax.axhline for axes whose x limits are xlim."""
+        self.add((xlim[0], xlim[1]), (y, y), color, linestyle, linewidth)
+
+    def vertical(self, x, ylim, color, linestyle="-", linewidth=None):
+        """Same as ax.axvline for axes whose y limits are ylim."""
+        self.add((x, x), (ylim[0], ylim[1]), color, linestyle, linewidth)
+
+    def arrays(self) -> dict:
+        """Returns style -> (N, 2, 2) array of segments."""
+        return {
+            style: np.concatenate(parts)
+            for style, parts in self.grupos.items()}
+
+    def __len__(self) -> int:
+        return sum(
+            len(part) for parts in self.grupos.values() for part in parts)
+
+    def draw(self, ax) -> None:
+        """Adds one LineCollection per style to the axes."""
+        from matplotlib import rcParams
+        from matplotlib.collections import LineCollection
+        for (color, linestyle, linewidth), segments in self.arrays().items():
+            if linewidth is None:
+                linewidth = rcParams["lines.linewidth"]
+            ax.add_collection(LineCollection(
+                segments, colors=color, linestyles=linestyle,
+                linewidths=linewidth))
+
+
+def segmentos_modelo(filas: np.ndarray, estilos=ESTILOS) -> Segmentos:
+    """
+    Returns the Segmentos of some rows of the model, keeping their order;
+    each run of rows of the same view and type is added in one call.
+    """
+    lines = Segmentos()
+    codigo = filas["vista"].astype(int) * len(modelo.TIPOS) + filas["tipo"]
+    inicios = np.flatnonzero(np.diff(codigo, prepend=-1))
+    for inicio, fin in zip(inicios, np.append(inicios[1:], len(filas))):
+        run = filas[inicio:fin]
+        vista = modelo.VISTAS[run["vista"][0]]
+        tipo = modelo.TIPOS[run["tipo"][0]]
+        lines.add(
+            (run["x0"], run["x1"]), (run["y0"], run["y1"]),
+            *estilos[vista, tipo])
+    return lines
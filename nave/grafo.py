@@ -0,0 +1,189 @@
+"""
+Memoized dependency graph of a calculation.
+
+Every node declares its inputs: names of raw values (widget values, the
+catalog signature) or of other nodes. A node is memoized on the key of
+its inputs, where the key of a raw value is the value itself and the key
+of a node is made of the keys of its own inputs. Whether a node can be
+skipped is therefore decided without computing anything upstream of it,
+and a widget change only recomputes the nodes that depend on it.
+
+The graph and its memos live in this module, so they are shared by every
+rerun and session of the process; a page defines its nodes on every rerun
+and only their functions are replaced. Node values are shared as well
+and must be treated as read-only.
+"""
+import collections
+import hashlib
+import marshal
+import threading
+import types
+
+
+# Values kept per node when no other store is given.
+MAX_VALORES = 8
+# Told apart from any node value, None included, on a memo miss.
+_FALTA = object()
+
+# Graph of every page, by name.
+_grafos = {}
+_lock = threading.Lock()
+
+
+class Memo:
+    """Bounded store of node values; the least recently used go first."""
+
+    def __init__(self, maximo=MAX_VALORES) -> None:
+        self.maximo = maximo
+        self.entradas = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """The value of key, or default if it is not kept."""
+        with self._lock:
+            if key not in self.entradas:
+                return default
+            self.entradas.move_to_end(key)
+            return self.entradas[key]
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            self.entradas[key] = value
+            self.entradas.move_to_end(key)
+            while len(self.entradas) > self.maximo:
+                self.entradas.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.entradas.clear()
+
+
+class Nodo:
+    """One step of the calculation and the memo of its values."""
+
+    def __init__(self, nombre, funcion, entradas, memo) -> None:
+        self.nombre = nombre
+        self.entradas = tuple(entradas)
+        self.memo = memo
+        self.definir(funcion)
+
+    def definir(self, funcion) -> None:
+        """
+        Sets the function of the node. Its values are keyed on the compiled
+        code too, so editing the function does not reuse stale values.
+        """
+        self.funcion = funcion
+        self.version = hashlib.sha1(
+            marshal.dumps(funcion.__code__)).hexdigest()[:12]
+
+
+class Grafo:
+    """Nodes of a calculation, by name."""
+
+    def __init__(self, nombre) -> None:
+        self.nombre = nombre
+        self.nodos = {}
+        self._lock = threading.Lock()
+
+    def definir(self, nombre, funcion, entradas, memo=None) -> Nodo:
+        """
+        Adds a node, or replaces the function of an existing one keeping
+        its memo. funcion receives a namespace with the value of every
+        input as an attribute. memo is any object with get(key, default)
+        and put (e.g. a CacheVistas); by default a Memo of MAX_VALORES
+        values.
+        """
+        with self._lock:
+            nodo = self.nodos.get(nombre)
+            if nodo is None or nodo.entradas != tuple(entradas):
+                nodo = Nodo(nombre, funcion, entradas, memo or Memo())
+                self.nodos[nombre] = nodo
+            else:
+                nodo.definir(funcion)
+            return nodo
+
+    def nodo(self, *entradas, memo=None):
+        """Decorator that defines a node named after the function."""
+        def decorator(funcion):
+            self.definir(funcion.__name__, funcion, entradas, memo)
+            return funcion
+        return decorator
+
+    def ejecucion(self, **valores) -> "Ejecucion":
+        """Returns an evaluation of the graph for the given raw values."""
+        return Ejecucion(self, valores)
+
+
+class Ejecucion:
+    """
+    Node values for one set of raw values, typically one rerun. Nodes are
+    computed on first access, and whether each one was taken from its
+    memo or recomputed is recorded.
+    """
+
+    def __init__(self, grafo: Grafo, valores: dict) -> None:
+        self.grafo = grafo
+        self.valores = dict(valores)
+        self.claves = {}
+        self.resultados = {}
+        self.estados = {}
+
+    def update(self, **valores) -> None:
+        """
+        Adds raw values, e.g. those of widgets drawn from a node value.
+        Values already used by a node can not change.
+        """
+        for name, value in valores.items():
+            if name in self.valores and self.valores[name] != value:
+                raise ValueError(f"{name} ya tiene otro valor")
+        self.valores.update(valores)
+
+    def clave(self, nombre):
+        """Key of a raw value or node, without computing any node."""
+        if nombre in self.claves:
+            return self.claves[nombre]
+        nodo = self.grafo.nodos.get(nombre)
+        if nodo is None:
+            if nombre not in self.valores:
+                raise KeyError(nombre)
+            return self.valores[nombre]
+        clave = (
+            self.grafo.nombre, nombre, nodo.version,
+            tuple(self.clave(entrada) for entrada in nodo.entradas))
+        self.claves[nombre] = clave
+        return clave
+
+    def __getitem__(self, nombre):
+        if nombre in self.resultados:
+            return self.resultados[nombre]
+        nodo = self.grafo.nodos.get(nombre)
+        if nodo is None:
+            return self.valores[nombre]
+        clave = self.clave(nombre)
+        value = nodo.memo.get(clave, _FALTA)
+        if value is _FALTA:
+            entradas = types.SimpleNamespace(**{
+                entrada: self[entrada] for entrada in nodo.entradas})
+            value = nodo.funcion(entradas)
+            nodo.memo.put(clave, value)
+            self.estados[nombre] = "recalculado"
+        else:
+            self.estados[nombre] = "omitido"
+        self.resultados[nombre] = value
+        return value
+
+    def informe(self) -> dict:
+        """Nodes used so far that were recomputed and that were skipped."""
+        return {
+            estado: [
+                nombre for nombre, actual in self.estados.items()
+                if actual == estado]
+            for estado in ("recalculado", "omitido")}
+
+
+def compartido(nombre) -> Grafo:
+    """Returns the graph of the given name, shared by the process."""
+    with _lock:
+        if nombre not in _grafos:
+            _grafos[nombre] = Grafo(nombre)
+        return _grafos[nombre]
@@ -0,0 +1,149 @@
+"""
+Bill of materials of a quote.
+
+Breaks the quote of the engine (nave.presupuesto) down into one line per
+member group: pillars, beams, purlins, wall rails and bracing, with
+profile, count, length, kg/m, weight and cost. The lines of one hall or
+of thousands of them (python -m nave.lote --listado) are streamed to CSV
+or to an XLSX workbook in openpyxl's write-only mode, so memory stays flat
+whatever the number of halls.
+"""
+import csv
+import io
+import math
+
+import numpy as np
+
+from nave import modelo, presupuesto
+
+
+COLUMNAS = (
+    "partida", "perfil", "cantidad", "longitud [m]", "gk [kg/m]",
+    "peso [to]", "coste [€]")
+PARTIDAS = ("Pilares", "Vigas", "Correas", "Wandriegel", "Arriostramientos")
+HOJA = "Listado"
+
+
+def partidas(args: dict, quote=None) -> dict:
+    """
+    Returns column -> (halls, partidas) array of the bill of materials of
+    every configuration in args (the engine arguments plus, optionally,
+    the perfil_<member> names of nave.secundarias and of the pillars and
+    beams). Weights are the quoted ones, waste included; purlins and wall
+    rails without a gk in args are not weighed by the quote, so their kg/m,
+    weight and cost are NaN. The cost of the quote is split in proportion
+    to weight.
+    """
+    if quote is None:
+        quote = presupuesto.presupuesto(**args)
+    longitud = presupuesto.longitud_nave(
+        args["cantidad_porticos"], args["distancia_porticos_finales"],
+        args["distancia_porticos_internos"])
+    porticos = np.multiply(args["cantidad_porticos"], 2)
+    # Braces differ in length; the line gives their mean
+    longitud_arrios = presupuesto.redondear(
+        np.divide(quote["metros_arrios"], quote["cantidad_arriostra"]), 2)
+    nan = np.nan
+    columnas = {
+        "perfil": (
+            args.get("perfil_pilar", ""), args.get("perfil_viga", ""),
+            args.get("perfil_correa", ""), args.get("perfil_wandriegel", ""),
+            args.get("perfil_arriostramiento", modelo.PERFIL_ARRIOSTRAMIENTO)),
+        "cantidad": (
+            porticos, porticos, quote["cantidad_correas"],
+            quote["filas_wandriegel"] * 2, quote["cantidad_arriostra"]),
+        "longitud [m]": (
+            args["altura_alero"], quote["largo_riegel"], longitud,
+            longitud, longitud_arrios),
+        "gk [kg/m]": (
+            args["pilar_peso_m"], args["viga_peso_m"],
+            args.get("correa_peso_m", nan), args.get("wandriegel_peso_m", nan),
+            args.get(
+                "arriostramiento_peso_m", presupuesto.PESO_ARRIOSTRAMIENTO)),
+        "peso [to]": (
+            quote["peso_pilares"], quote["peso_vigas"],
+            quote["peso_correas"] if "correa_peso_m" in args else nan,
+            quote["peso_wandriegel"] if "wandriegel_peso_m" in args else nan,
+            quote["pesos_arrios"]),
+    }
+    shape = np.shape(quote["pesototal"])
+    tabla = {
+        name: np.stack([
+            np.broadcast_to(np.asarray(
+                value, dtype=object if name == "perfil" else float), shape)
+            for value in values], axis=-1)
+        for name, values in columnas.items()}
+    tabla["cantidad"] = tabla["cantidad"].astype(int)
+    tabla["coste [€]"] = presupuesto.redondear(
+        tabla["peso [to]"]
+        * np.divide(quote["costes_totales"], quote["pesototal"])[..., None],
+        2)
+    tabla["peso_total"] = np.asarray(quote["pesototal"])
+    tabla["coste_total"] = np.asarray(quote["costes_totales"])
+    return tabla
+
+
+def _celda(value):
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def filas(tabla: dict, total=True):
+    """
+    Yields the lines of every hall of a partidas table as tuples in the
+    order of COLUMNAS, each hall followed by its total if total is set.
+    """
+    columnas = [
+        tabla[name].reshape(-1, len(PARTIDAS)).tolist()
+        for name in COLUMNAS[1:]]
+    pesos = np.ravel(tabla["peso_total"]).tolist()
+    costes = np.ravel(tabla["coste_total"]).tolist()
+    for nave, valores in enumerate(zip(*columnas)):
+        for linea in zip(PARTIDAS, *valores):
+            yield tuple(_celda(value) for value in linea)
+        if total:
+            yield ("Total", None, None, None, None, pesos[nave], costes[nave])
+
+
+def escribir_csv(lineas, file, columnas=COLUMNAS) -> int:
+    """Writes the header and the lines to an open text file."""
+    writer = csv.writer(file, lineterminator="\n")
+    writer.writerow(columnas)
+    count = 0
+    for linea in lineas:
+        writer.writerow(linea)
+        count += 1
+    return count
+
+
+def escribir_xlsx(lineas, file, columnas=COLUMNAS, hoja=HOJA) -> int:
+    """
+    Writes the header and the lines as one sheet of a write-only workbook,
+    which streams every row to disk instead of keeping the cells. file is
+    a path or a binary file object.
+    """
+    from openpyxl import Workbook
+    libro = Workbook(write_only=True)
+    sheet = libro.create_sheet(hoja)
+    sheet.append(columnas)
+    count = 0
+    for linea in lineas:
+        sheet.append(linea)
+        count += 1
+    libro.save(file)
+    return count
+
+
+def csv_texto(lineas) -> str:
+    """The lines of a single quote as CSV text."""
+    buffer = io.StringIO()
+    escribir_csv(lineas, buffer)
+    return buffer.getvalue()
+
+
+def xlsx_bytes(lineas) -> bytes:
+    """The lines of a single quote as an XLSX workbook."""
+    buffer = io.BytesIO()
+    escribir_xlsx(lineas, buffer)
+    return buffer.getvalue()
@@ -0,0 +1,351 @@
+"""
+Batch quoting from the command line.
+
+Reads a CSV or JSON Lines file with one hall per row (the UserInputs
+fields plus the pillar and beam profiles), quotes the rows in chunks
+through a process pool and streams the results out in input order. Only a
+bounded number of chunks is in flight at any time, so memory stays flat
+whatever the size of the input.
+
+    python -m nave.lote naves.csv -o presupuestos.csv --workers 8
+    python -m nave.lote naves.csv -o listado.xlsx --listado
+
+Profiles are given by name (perfil_pilar, perfil_viga, e.g. "IPE300") or
+directly by weight (pilar_peso_m, viga_peso_m in kg/m). Missing hall
+parameters take the default value of their widget. Purlins, wall rails and
+bracing are sized from the catalog (see nave.secundarias).
+"""
+import argparse
+import collections
+import concurrent.futures
+import csv
+import functools
+import io
+import itertools
+import json
+import math
+import os
+import pathlib
+import sys
+
+import numpy as np
+import pandas as pd
+
+from nave import catalogo, listado, parametros, presupuesto, secundarias
+from nave.buscador import normalize
+
+
+ENTEROS = ("cantidad_porticos", "inclinacion_tejado")
+CAMPOS_SALIDA = (
+    "largo_riegel", "correas_lado", "cantidad_wandriegel", "line_distance",
+    "longitud_arrios", "peso_pilares", "peso_vigas", "largo_correas",
+    "cantidad_correas", "metros_correas", "peso_correas",
+    "metros_wandriegel", "peso_wandriegel", "cantidad_arriostra",
+    "metros_arrios", "pesos_arrios", "pesototal",
+    "costes_material", "costes_taller", "costes_montaje", "costes_planif",
+    "factor_empresa", "costes_totales", "costes_portonelada")
+TAMANO_TROZO = 1000
+
+# Profile weights and secondary member tables of the worker process, set
+# by _iniciar_trabajador.
+_pesos = {}
+_tablas = {}
+
+
+def tabla_pesos(dfs: dict) -> dict:
+    """Returns normalized profile name -> gk [kg/m] of the portal families."""
+    pesos = {}
+    for familia in catalogo.FAMILIAS_PORTICO:
+        df = dfs[f"{familia}.xlsx"]
+        gks = pd.to_numeric(df["gk [kg/m]"], errors="coerce")
+        for name, gk in zip(df["Perfil"], gks):
+            if isinstance(name, str) and not math.isnan(gk):
+                pesos[normalize(name)] = float(gk)
+    return pesos
+
+
+def _vacio(value) -> bool:
+    return value is None or value == "" or (
+        isinstance(value, float) and math.isnan(value))
+
+
+def _iniciar_trabajador(db_folder) -> None:
+    dfs = catalogo.load_catalog(db_folder)
+    _pesos.update(tabla_pesos(dfs))
+    _tablas.update(secundarias.tablas(dfs))
+
+
+def leer_filas(path):
+    """Yields the rows of a CSV or JSON Lines file one at a time."""
+    path = pathlib.Path(path)
+    with open(path, encoding="utf-8", newline="") as file:
+        if path.suffix.lower() in (".jsonl", ".json", ".ndjson"):
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(file)
+
+
+def _trozos(rows, size):
+    rows = iter(rows)
+    while True:
+        trozo = list(itertools.islice(rows, size))
+        if not trozo:
+            return
+        yield trozo
+
+
+def parsear(row: dict, pesos: dict) -> dict:
+    """
+    Returns the engine arguments of one row. Raises ValueError if a value
+    is missing, unknown, outside the bounds of its widget or not a whole
+    number where the widget takes one.
+    """
+    args = {}
+    for name, limits in parametros.LIMITES.items():
+        value = row.get(name)
+        value = limits["value"] if _vacio(value) else float(value)
+        if not limits["min_value"] <= value <= limits["max_value"]:
+            raise ValueError(f"{name} fuera de rango: {value}")
+        if name in ENTEROS:
+            if value != int(value):
+                raise ValueError(f"{name} debe ser entero: {value}")
+            value = int(value)
+        args[name] = value
+    for miembro in ("pilar", "viga"):
+        peso = row.get(f"{miembro}_peso_m")
+        if _vacio(peso):
+            perfil = row.get(f"perfil_{miembro}")
+            if _vacio(perfil):
+                raise ValueError(f"Falta perfil_{miembro}")
+            try:
+                peso = pesos[normalize(perfil)]
+            except KeyError:
+                raise ValueError(f"Perfil desconocido: {perfil}") from None
+        peso = float(peso)
+        if not (math.isfinite(peso) and peso >= 0):
+            raise ValueError(f"{miembro}_peso_m fuera de rango: {peso}")
+        args[f"{miembro}_peso_m"] = peso
+    return args
+
+
+def _columnas(validas: list, tablas: dict) -> dict:
+    """
+    Engine arguments of the valid rows as arrays, with the secondary
+    members sized from the catalog when there are tables.
+    """
+    columnas = {
+        name: np.array([args[name] for _, args in validas])
+        for name in validas[0][1]}
+    if tablas:
+        columnas.update(secundarias.dimensionar(tablas, **columnas))
+    return columnas
+
+
+def calcular_trozo(rows: list, pesos=None, tablas=None) -> list:
+    """Quotes a chunk of rows in one vectorized call of the engine."""
+    pesos = _pesos if pesos is None else pesos
+    tablas = _tablas if tablas is None else tablas
+    salida = []
+    validas = []
+    for row in rows:
+        out = dict(row)
+        try:
+            validas.append((out, parsear(row, pesos)))
+        except (TypeError, ValueError) as error:
+            out["error"] = str(error)
+        salida.append(out)
+    if validas:
+        quote = presupuesto.presupuesto(**_columnas(validas, tablas))
+        count = len(validas)
+        for name in CAMPOS_SALIDA:
+            values = np.broadcast_to(quote[name], (count,)).tolist()
+            for (out, _), value in zip(validas, values):
+                out[name] = value
+    return salida
+
+
+def listado_trozo(pares: list, pesos=None, tablas=None) -> list:
+    """
+    Returns the bill of materials lines of a chunk of (number, row) pairs,
+    each line prefixed by the number of its hall.
+    """
+    pesos = _pesos if pesos is None else pesos
+    tablas = _tablas if tablas is None else tablas
+    lineas = {}
+    validas = []
+    for numero, row in pares:
+        try:
+            args = parsear(row, pesos)
+        except (TypeError, ValueError) as error:
+            lineas[numero] = [(numero, "Error", str(error))]
+            continue
+        for miembro in ("pilar", "viga"):
+            args[f"perfil_{miembro}"] = row.get(f"perfil_{miembro}") or ""
+        validas.append((numero, args))
+    if validas:
+        columnas = _columnas(validas, tablas)
+        por_nave = len(listado.PARTIDAS) + 1
+        todas = list(listado.filas(listado.partidas(columnas)))
+        for i, (numero, _) in enumerate(validas):
+            lineas[numero] = [
+                (numero, *linea)
+                for linea in todas[i * por_nave:(i + 1) * por_nave]]
+    return [linea for numero, _ in pares for linea in lineas[numero]]
+
+
+def escribir_listado(
+    filas, salida, workers=None, tamano_trozo=TAMANO_TROZO, db_folder=None
+) -> int:
+    """
+    Streams the bill of materials of every hall to an .xlsx (write-only
+    workbook) or .csv file; returns how many halls were written. Halls
+    are numbered from 1 in input order.
+    """
+    count = 0
+
+    def lineas():
+        nonlocal count
+        pares = enumerate(filas, start=1)
+        for trozo in _ejecutar(
+            listado_trozo, _trozos(pares, tamano_trozo), workers, db_folder
+        ):
+            count = trozo[-1][0] if trozo else count
+            yield from trozo
+
+    columnas = ("nave", *listado.COLUMNAS)
+    if str(salida).lower().endswith(".xlsx"):
+        listado.escribir_xlsx(lineas(), salida, columnas)
+    else:
+        with open(salida, "w", encoding="utf-8", newline="") as file:
+            listado.escribir_csv(lineas(), file, columnas)
+    return count
+
+
+def serializar_trozo(rows: list, formato, campos) -> str:
+    """Quotes a chunk and returns it already formatted as CSV or JSONL."""
+    buffer = io.StringIO()
+    if formato == "jsonl":
+        for row in calcular_trozo(rows):
+            buffer.write(json.dumps(row, ensure_ascii=False) + "\n")
+    else:
+        csv.DictWriter(
+            buffer, campos, extrasaction="ignore", lineterminator="\n"
+        ).writerows(calcular_trozo(rows))
+    return buffer.getvalue()
+
+
+def campos_csv(row: dict) -> list:
+    """Columns of the CSV output: input columns first, then the results."""
+    campos = [name for name in row if name not in CAMPOS_SALIDA]
+    campos += [name for name in CAMPOS_SALIDA if name not in campos]
+    if "error" not in campos:
+        campos.append("error")
+    return campos
+
+
+def _ejecutar(funcion, trozos, workers, db_folder):
+    """
+    Yields funcion(trozo) for every chunk, in input order. At most two
+    chunks per worker are in flight, so only those are held in memory.
+    """
+    db_folder = db_folder or catalogo.DB_FOLDER
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _iniciar_trabajador(db_folder)
+        for trozo in trozos:
+            yield funcion(trozo)
+        return
+    with concurrent.futures.ProcessPoolExecutor(
+        workers, initializer=_iniciar_trabajador, initargs=(db_folder,)
+    ) as executor:
+        pendientes = collections.deque()
+        for trozo in trozos:
+            pendientes.append(executor.submit(funcion, trozo))
+            if len(pendientes) >= 2 * workers:
+                yield pendientes.popleft().result()
+        while pendientes:
+            yield pendientes.popleft().result()
+
+
+def procesar(
+    filas, workers=None, tamano_trozo=TAMANO_TROZO, db_folder=None
+):
+    """Yields the quoted rows (dicts) in input order."""
+    for salida in _ejecutar(
+        calcular_trozo, _trozos(filas, tamano_trozo), workers, db_folder
+    ):
+        yield from salida
+
+
+def escribir(
+    filas, file, formato="csv", workers=None, tamano_trozo=TAMANO_TROZO,
+    db_folder=None
+) -> int:
+    """
+    Quotes the rows and streams them to an open file; returns how many
+    were written. The workers format their own chunks, so the parent only
+    concatenates text.
+    """
+    trozos = _trozos(filas, tamano_trozo)
+    primero = next(trozos, None)
+    if primero is None:
+        return 0
+    campos = campos_csv(primero[0])
+    if formato != "jsonl":
+        csv.DictWriter(file, campos, lineterminator="\n").writeheader()
+    funcion = functools.partial(
+        serializar_trozo, formato=formato, campos=campos)
+    count = 0
+
+    def contados():
+        nonlocal count
+        for trozo in itertools.chain((primero,), trozos):
+            count += len(trozo)
+            yield trozo
+
+    for texto in _ejecutar(funcion, contados(), workers, db_folder):
+        file.write(texto)
+    return count
+
+
+def main(argv=None) -> None:
+    """Entry point of the command line."""
+    parser = argparse.ArgumentParser(
+        prog="python -m nave.lote",
+        description="Presupuesta en lote las naves de un CSV o JSONL.")
+    parser.add_argument("entrada", help="Fichero .csv o .jsonl de naves")
+    parser.add_argument(
+        "-o", "--salida", help="Fichero .csv o .jsonl (por defecto stdout)")
+    parser.add_argument(
+        "-w", "--workers", type=int, default=None,
+        help="Procesos de cálculo (por defecto, uno por núcleo)")
+    parser.add_argument(
+        "--trozo", type=int, default=TAMANO_TROZO,
+        help="Filas por trozo enviado a cada proceso")
+    parser.add_argument(
+        "--listado", action="store_true",
+        help="Escribe el listado de materiales de cada nave (.xlsx o .csv)")
+    args = parser.parse_args(argv)
+
+    filas = leer_filas(args.entrada)
+    if args.listado:
+        if not args.salida:
+            parser.error("--listado necesita un fichero de salida (-o)")
+        count = escribir_listado(
+            filas, args.salida, args.workers, args.trozo)
+        print(f"Listado de {count} naves escrito", file=sys.stderr)
+        return
+    if args.salida:
+        formato = "jsonl" if args.salida.endswith(".jsonl") else "csv"
+        with open(args.salida, "w", encoding="utf-8", newline="") as file:
+            count = escribir(
+                filas, file, formato, args.workers, args.trozo)
+    else:
+        count = escribir(filas, sys.stdout, "csv", args.workers, args.trozo)
+    print(f"{count} naves presupuestadas", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
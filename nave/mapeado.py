@@ -0,0 +1,165 @@
+"""
+Column-oriented, memory-mapped copy of the compiled catalog.
+
+Every family is stored in one file as a block of float64 columns (each
+column contiguous) plus fixed-width text columns, behind a JSON header
+with their offsets. Processes map the file read-only and build their data
+frames on views of the mapping, so the numbers are never copied: every
+server process and session reads the same pages of the OS cache, and
+adding workers does not add copies of the catalog.
+
+A column is numeric when most of its values are numbers, the same rule
+the SQLite store follows; text in a numeric column (repeated header rows)
+reads as NaN. The frames are read-only, as the shared ones always were.
+
+The file is replaced atomically when the Excel files change, so processes
+that still map the previous copy keep reading it until they reopen.
+"""
+import json
+import os
+import pathlib
+import struct
+import threading
+import typing
+
+import numpy as np
+
+
+MAGIC = b"NAVECOL1"
+# Offsets of the data are aligned to this many bytes.
+ALINEACION = 64
+# Bump when the layout of the file changes.
+VERSION = 1
+
+# Open mapping of every path, with the identity of its file.
+_abiertos = {}
+_lock = threading.Lock()
+
+
+def _alinear(offset) -> int:
+    return -(-offset // ALINEACION) * ALINEACION
+
+
+def es_numerica(name, values, numbers) -> bool:
+    """Whether a column is stored as numbers (most values are numbers)."""
+    return name != "Perfil" and numbers.count() * 2 >= values.count() > 0
+
+
+def _texto(values) -> np.ndarray:
+    """Fixed-width text of a column; missing values are empty strings."""
+    texts = [
+        "" if value is None or value != value else str(value)
+        for value in values]
+    width = max([1, *map(len, texts)])
+    return np.array(texts, dtype=f"<U{width}")
+
+
+def escribir(dfs: dict, path, clave) -> pathlib.Path:
+    """
+    Writes the data frames to path, tagged with clave (a string, e.g. the
+    signature of the files they come from), replacing any previous copy
+    atomically.
+    """
+    import pandas as pd
+    path = pathlib.Path(path)
+    familias = []
+    bloques = []
+    offset = 0
+    for name, df in dfs.items():
+        numericas = []
+        columnas = []
+        texto = []
+        for posicion, column in enumerate(df.columns):
+            values = df[column]
+            numbers = pd.to_numeric(values, errors="coerce")
+            if es_numerica(column, values, numbers):
+                numericas.append(column)
+                columnas.append(numbers.to_numpy(dtype=np.float64))
+                continue
+            array = _texto(values)
+            texto.append({
+                "columna": column, "posicion": posicion, "offset": offset,
+                "ancho": array.dtype.itemsize // 4})
+            bloques.append((offset, array))
+            offset = _alinear(offset + array.nbytes)
+        bloque = (np.array(columnas, dtype="<f8") if columnas
+                  else np.empty((0, len(df)), dtype="<f8"))
+        familias.append({
+            "nombre": name, "filas": len(df), "numericas": numericas,
+            "offset": offset, "texto": texto})
+        bloques.append((offset, bloque))
+        offset = _alinear(offset + bloque.nbytes)
+
+    header = json.dumps(
+        {"version": VERSION, "clave": clave, "familias": familias},
+        ensure_ascii=False).encode()
+    inicio = _alinear(len(MAGIC) + 8 + len(header))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as file:
+        file.write(MAGIC + struct.pack("<Q", len(header)) + header)
+        for posicion, array in bloques:
+            file.seek(inicio + posicion)
+            file.write(array.tobytes())
+        file.truncate(inicio + offset)
+    os.replace(tmp, path)
+    return path
+
+
+def _leer_cabecera(path) -> tuple:
+    with open(path, "rb") as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} no es un catálogo mapeado")
+        (length,) = struct.unpack("<Q", file.read(8))
+        header = json.loads(file.read(length))
+    return header, _alinear(len(MAGIC) + 8 + length)
+
+
+def _frames(mapa, header, inicio) -> dict:
+    """Data frames on views of the mapping, in the original column order."""
+    import pandas as pd
+    dfs = {}
+    for familia in header["familias"]:
+        filas = familia["filas"]
+        numericas = familia["numericas"]
+        # (columns, rows) in the file; its transpose is the frame's block
+        bloque = np.ndarray(
+            (len(numericas), filas), dtype="<f8", buffer=mapa,
+            offset=inicio + familia["offset"])
+        df = pd.DataFrame(bloque.T, columns=numericas, copy=False)
+        for texto in familia["texto"]:
+            values = np.ndarray(
+                filas, dtype=f"<U{texto['ancho']}", buffer=mapa,
+                offset=inicio + texto["offset"])
+            df.insert(texto["posicion"], texto["columna"], np.array(
+                [value or None for value in values.tolist()], dtype=object))
+        dfs[familia["nombre"]] = df
+    return dfs
+
+
+def abrir(path, clave) -> typing.Optional[dict]:
+    """
+    Returns the data frames mapped from path, or None if the file is
+    missing, unreadable or was written for another clave. The mapping and
+    its frames are shared by every caller of the process.
+    """
+    path = pathlib.Path(path)
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    identidad = (stat.st_ino, stat.st_mtime_ns, clave)
+    with _lock:
+        abierto = _abiertos.get(str(path))
+        if abierto is not None and abierto[0] == identidad:
+            return abierto[1]
+        try:
+            header, inicio = _leer_cabecera(path)
+        except (OSError, ValueError):
+            return None
+        if header.get("version") != VERSION or header.get("clave") != clave:
+            return None
+        mapa = np.memmap(path, dtype=np.uint8, mode="r")
+        dfs = _frames(mapa, header, inicio)
+        _abiertos[str(path)] = (identidad, dfs)
+        return dfs
@@ -0,0 +1,482 @@
+"""
+Structural segment model of a hall.
+
+Every line of both views is one row of a structured NumPy array (see
+MIEMBRO): the view it belongs to, the member type, the profile it is made
+of, how many times it repeats along the hall, its end points and its
+length. The model is built once per configuration; the views draw it and
+the takeoff is a handful of vectorized reductions over the same rows, so
+the quantities can not drift from what is drawn. pesos() is the quote of
+nave.presupuesto measured that way.
+
+Vista superior rows are in plan coordinates (x along the hall, y across
+it). Vista frontal rows describe one portal frame (x across the hall, y
+up) and repeat cantidad_porticos times. Only the rows that stand for a
+whole member carry a profile; the other edges of the profile outlines
+and the purlin and rail ticks have perfil == SIN_PERFIL. The wall rails
+are the rows under the eaves of Vista superior, one per long wall, which
+repeat as many times as there are rails on the wall.
+"""
+import numpy as np
+
+from nave import presupuesto
+
+
+MIEMBRO = np.dtype([
+    ("vista", "u1"),
+    ("tipo", "u1"),
+    ("perfil", "i1"),
+    ("cantidad", "i4"),
+    ("x0", "f8"),
+    ("y0", "f8"),
+    ("x1", "f8"),
+    ("y1", "f8"),
+    ("longitud", "f8"),
+])
+VISTAS = ("superior", "frontal")
+TIPOS = (
+    "suelo", "alero", "cumbrera", "portico_hastial", "portico_interno",
+    "correa", "arriostramiento", "pilar", "viga", "cartela", "wandriegel")
+# Profile ids; the names and weights of a model are indexed by them.
+PERFILES = ("pilar", "viga", "arriostramiento", "correa", "wandriegel")
+PILAR, VIGA, ARRIOSTRAMIENTO, CORREA, WANDRIEGEL = range(len(PERFILES))
+SIN_PERFIL = -1
+PERFIL_ARRIOSTRAMIENTO = "RD24"
+
+# Drawing details of Vista frontal (meters).
+LARGO_MARCA_WANDRIEGEL = 0.16
+LARGO_MARCA_CORREA = 0.18
+SEPARACION_MARCA_CORREA = 0.2
+DISTANCIA_PLACA_CARTELA = 2.3
+
+
+class Modelo:
+    """Members of one hall configuration."""
+
+    def __init__(
+        self, miembros: np.ndarray, perfiles, pesos, alturas
+    ) -> None:
+        self.miembros = miembros
+        # Name, gk [kg/m] and height [m] of every profile id (None / NaN
+        # if unknown).
+        self.perfiles = tuple(perfiles)
+        self.pesos = np.asarray(pesos, dtype=float)
+        self.alturas = np.asarray(alturas, dtype=float)
+
+    def vista(self, nombre) -> np.ndarray:
+        """Rows of one view, in drawing order."""
+        return self.miembros[
+            self.miembros["vista"] == VISTAS.index(nombre)]
+
+    def __len__(self) -> int:
+        return len(self.miembros)
+
+
+class _Constructor:
+    """Collects rows with the call shape of ax.plot((x0, x1), (y0, y1))."""
+
+    def __init__(self) -> None:
+        self.partes = []
+
+    def add(
+        self, vista, tipo, x, y, perfil=SIN_PERFIL, cantidad=1
+    ) -> None:
+        """Adds the members (x[0], y[0]) -> (x[1], y[1]), broadcast."""
+        x0, y0, x1, y1, perfil = np.broadcast_arrays(
+            *(np.asarray(value, dtype=float)
+              for value in (x[0], y[0], x[1], y[1])), perfil)
+        rows = np.empty(x0.size, dtype=MIEMBRO)
+        rows["vista"] = VISTAS.index(vista)
+        rows["tipo"] = TIPOS.index(tipo)
+        rows["perfil"] = perfil.ravel()
+        rows["cantidad"] = cantidad
+        rows["x0"], rows["y0"] = x0.ravel(), y0.ravel()
+        rows["x1"], rows["y1"] = x1.ravel(), y1.ravel()
+        self.partes.append(rows)
+
+    def array(self) -> np.ndarray:
+        miembros = np.concatenate(self.partes)
+        miembros["longitud"] = np.hypot(
+            miembros["x1"] - miembros["x0"], miembros["y1"] - miembros["y0"])
+        return miembros
+
+
+def rotate_vector(vector, degrees):
+    radians = np.radians(degrees)
+    rotation_matrix = np.array(
+        (
+            (np.cos(radians), -np.sin(radians)),
+            (np.sin(radians), np.cos(radians))
+        )
+    )
+    return np.matmul(rotation_matrix, vector)
+
+
+def point_along_line(pt1, pt2, distance) -> list:
+    pt1_np = np.array(pt1)
+    pt2_np = np.array(pt2)
+    # Unit vector from pt1 to pt2, scaled to the distance
+    direction = pt2_np - pt1_np
+    unit_vector = direction / np.linalg.norm(direction)
+    result = pt1_np + unit_vector * distance
+    return result.tolist()
+
+
+def _vista_superior(
+    m, cantidad_porticos, distancia_porticos_finales,
+    distancia_porticos_internos, ancho_nave, correas_lado,
+    filas_wandriegel=1
+) -> None:
+    """Frames, purlins, wall rails and roof bracing in plan."""
+    last_x = (
+        distancia_porticos_internos * (cantidad_porticos - 3)
+        + 2 * distancia_porticos_finales)
+    xlim = (0, last_x)
+    ylim = (0, ancho_nave)
+    middle_y = ancho_nave / 2
+    # Wall rails, hidden under the eaves
+    m.add(
+        "superior", "wandriegel", xlim, ((0, ancho_nave), (0, ancho_nave)),
+        WANDRIEGEL, filas_wandriegel)
+    # Eaves and ridge
+    m.add("superior", "cumbrera", xlim, (middle_y, middle_y))
+    m.add("superior", "alero", xlim, ((0, ancho_nave), (0, ancho_nave)))
+
+    # End frames and internal frames
+    x = (
+        distancia_porticos_finales
+        + np.arange(cantidad_porticos - 2) * distancia_porticos_internos)
+    m.add("superior", "portico_hastial", (0, 0), ylim)
+    m.add("superior", "portico_interno", (x, x), ylim)
+    m.add("superior", "portico_hastial", (last_x, last_x), ylim)
+
+    # Purlins
+    line_top = ancho_nave - 0.2
+    line_bottom = 0.2
+    espacio_correas = ((line_top - line_bottom) / 2) - 0.2 - 1.2
+    line_distance = espacio_correas / correas_lado
+    steps = line_distance * np.arange(1, correas_lado + 1)
+    for y in (line_bottom + steps, line_top - steps):
+        m.add("superior", "correa", xlim, (y, y), CORREA)
+    y = np.array((line_top, line_bottom, middle_y + 0.2, middle_y - 0.2))
+    m.add("superior", "correa", xlim, (y, y), CORREA)
+
+    # Bracing of the end bays, drawn as crosses between purlin lines
+    def brace(x, y):
+        m.add("superior", "arriostramiento", x, y, ARRIOSTRAMIENTO)
+
+    d_fin = distancia_porticos_finales
+    y1 = line_bottom, line_top
+    y2 = line_bottom + line_distance, line_top - line_distance
+    # Left eaves
+    brace((0, d_fin), (y1, y2))
+    brace((0, d_fin), (y2, y1))
+    # Left centre
+    center_low = correas_lado * line_distance + 0.2
+    center_high = ancho_nave - center_low
+    brace(
+        (0, d_fin),
+        ((middle_y - 0.2, center_low), (center_low, middle_y - 0.2)))
+    brace(
+        (0, d_fin),
+        ((middle_y + 0.2, center_high), (center_high, middle_y + 0.2)))
+    # Right centre
+    x1 = last_x + 0.5
+    x2 = last_x - d_fin
+    brace(
+        (x1, x2),
+        ((middle_y - 0.2, center_low), (center_low, middle_y - 0.2)))
+    brace(
+        (x1, x2),
+        ((middle_y + 0.2, center_high), (center_high, middle_y + 0.2)))
+    # Right eaves
+    x2e = x1 - d_fin - 0.5
+    brace((x1, x2e), (y1, y2))
+    brace((x1, x2e), (y2, y1))
+
+    # The same crosses between every pair of purlins, both ends
+    steps = line_distance * np.arange(1, correas_lado)
+    for ya, yb, yc, yd in (
+        (line_bottom, line_bottom + line_distance,
+         line_top, line_top - line_distance),
+        (line_bottom + line_distance, line_bottom,
+         line_top - line_distance, line_top),
+    ):
+        for y_pair in ((ya + steps, yb + steps), (yc - steps, yd - steps)):
+            brace((0, d_fin), y_pair)
+            brace((x1, x2), y_pair)
+
+
+def _correas_frontal(
+    m, cantidad, start_point1, start_point2, unit_vector, spacing,
+    displacement, correas_lado
+) -> None:
+    """Purlin ticks at both ends and along one rafter."""
+    for start_point in (start_point1, start_point2):
+        end_point = start_point + displacement
+        m.add(
+            "frontal", "correa", (start_point[0], end_point[0]),
+            (start_point[1], end_point[1]), cantidad=cantidad)
+    steps = np.arange(1, correas_lado + 1)[:, np.newaxis] * spacing
+    start_points = start_point1 + unit_vector * steps
+    end_points = start_points + displacement
+    m.add(
+        "frontal", "correa", (start_points[:, 0], end_points[:, 0]),
+        (start_points[:, 1], end_points[:, 1]), cantidad=cantidad)
+
+
+def _vista_frontal(
+    m, cantidad_porticos, ancho_nave, altura_alero, inclinacion_tejado,
+    altura_cartela, geo, pilar_ancho, viga_ancho
+) -> None:
+    """Outline of one portal frame with its gussets and ticks."""
+    n = cantidad_porticos
+    angulo = float(geo["angulo_radianes"])
+    largo_riegel = float(geo["largo_riegel"])
+    correas_lado = int(geo["correas_lado"])
+
+    m.add("frontal", "suelo", (-0.5, ancho_nave + 0.5), (0, 0), cantidad=n)
+    # Pillars: the outer edge stands for the member
+    m.add(
+        "frontal", "pilar",
+        ((0, pilar_ancho, ancho_nave, ancho_nave - pilar_ancho),) * 2,
+        (0, altura_alero),
+        perfil=(PILAR, SIN_PERFIL, PILAR, SIN_PERFIL), cantidad=n)
+
+    # Rafters: the upper edge stands for the member
+    x_end = largo_riegel * np.cos(angulo)
+    y_end = altura_alero + largo_riegel * np.sin(angulo)
+    x2_end = largo_riegel * np.cos(np.deg2rad(inclinacion_tejado))
+    y2_end = (
+        altura_alero
+        + largo_riegel * np.sin(np.deg2rad(inclinacion_tejado)))
+    m.add(
+        "frontal", "viga", (0, x_end), (altura_alero, y_end), VIGA, n)
+    m.add(
+        "frontal", "viga", (ancho_nave, x2_end), (altura_alero, y2_end),
+        VIGA, n)
+
+    # Beam thickness, perpendicular to the rafters
+    perpendicular_angle = inclinacion_tejado + 90
+    offset_x = viga_ancho * np.cos(np.deg2rad(perpendicular_angle))
+    offset_y = viga_ancho * np.sin(np.deg2rad(perpendicular_angle))
+    # Inner edge of the pillars up to the rafters
+    longitud_pilar_riegel = pilar_ancho * np.tan(angulo)
+    for x in (pilar_ancho, ancho_nave - pilar_ancho):
+        m.add(
+            "frontal", "pilar", (x, x),
+            (altura_alero, altura_alero + longitud_pilar_riegel),
+            cantidad=n)
+    x_end_offset = x_end - offset_x
+    y_end_offset = y_end - offset_y
+    y2_end_offset = y2_end - offset_y
+    # Ridge
+    m.add("frontal", "viga", (x_end, x_end), (y_end, y_end_offset),
+          cantidad=n)
+
+    interseccion_y = altura_alero + longitud_pilar_riegel - offset_y
+    placa_x, placa_y = point_along_line(
+        (pilar_ancho, interseccion_y), (x_end_offset, y_end_offset),
+        DISTANCIA_PLACA_CARTELA)
+    # End plate of the gusset, perpendicular to its lower edge
+    direction = np.array((x_end - pilar_ancho, y_end_offset - interseccion_y))
+    rotated_vector = rotate_vector(direction, 90)
+    displacement = rotated_vector / np.linalg.norm(rotated_vector) * viga_ancho
+    placa_end = np.array((placa_x, placa_y)) + displacement
+
+    # Lower edge of the rafters
+    m.add(
+        "frontal", "viga", (placa_x, x_end), (placa_y, y_end_offset),
+        cantidad=n)
+    m.add(
+        "frontal", "viga", (ancho_nave - placa_x, x2_end),
+        (placa_y, y2_end_offset), cantidad=n)
+    # Gussets
+    m.add(
+        "frontal", "cartela", (placa_x, placa_end[0]),
+        (placa_y, placa_end[1]), cantidad=n)
+    m.add(
+        "frontal", "cartela",
+        (ancho_nave - placa_x, ancho_nave - placa_end[0]),
+        (placa_y, placa_end[1]), cantidad=n)
+    base_cartela = interseccion_y - (altura_cartela - offset_y)
+    m.add(
+        "frontal", "cartela", (pilar_ancho, placa_x), (base_cartela, placa_y),
+        cantidad=n)
+    m.add(
+        "frontal", "cartela", (0, pilar_ancho), (base_cartela, base_cartela),
+        cantidad=n)
+    m.add(
+        "frontal", "cartela", (ancho_nave - pilar_ancho, ancho_nave - placa_x),
+        (base_cartela, placa_y), cantidad=n)
+    m.add(
+        "frontal", "cartela", (ancho_nave, ancho_nave - pilar_ancho),
+        (base_cartela, base_cartela), cantidad=n)
+
+    # Wall rail ticks, on both walls
+    y = 0.25 + float(geo["distancia_real_wandriegel"]) * np.arange(
+        int(geo["filas_wandriegel"]))
+    m.add(
+        "frontal", "wandriegel", (0, -LARGO_MARCA_WANDRIEGEL), (y, y),
+        cantidad=n)
+    m.add(
+        "frontal", "wandriegel",
+        (ancho_nave, ancho_nave + LARGO_MARCA_WANDRIEGEL), (y, y),
+        cantidad=n)
+
+    # Purlin ticks, perpendicular to both rafters
+    start = np.array((0, altura_alero))
+    direction = np.array((x_end, y_end - altura_alero))
+    unit_vector = direction / np.linalg.norm(direction)
+    start_point1 = start + unit_vector * SEPARACION_MARCA_CORREA
+    start_point2 = (
+        np.array((x_end, y_end)) - unit_vector * SEPARACION_MARCA_CORREA)
+    spacing = np.linalg.norm(start_point2 - start_point1) / (correas_lado + 1)
+    _correas_frontal(
+        m, n, start_point1, start_point2, unit_vector, spacing,
+        rotate_vector(unit_vector, 90) * LARGO_MARCA_CORREA, correas_lado)
+
+    start = np.array((ancho_nave, altura_alero))
+    end = np.array((
+        ancho_nave - largo_riegel * np.cos(angulo),
+        altura_alero + largo_riegel * np.sin(angulo)))
+    direction = end - start
+    unit_vector = direction / np.linalg.norm(direction)
+    _correas_frontal(
+        m, n, start + unit_vector * SEPARACION_MARCA_CORREA,
+        end - unit_vector * SEPARACION_MARCA_CORREA, unit_vector, spacing,
+        rotate_vector(unit_vector, -90) * LARGO_MARCA_CORREA, correas_lado)
+
+
+def _modelo(
+    m, perfil_pilar, perfil_viga, pilar_peso_m, viga_peso_m, pilar_ancho,
+    viga_ancho, perfil_correa=None, correa_peso_m=np.nan,
+    perfil_arriostramiento=PERFIL_ARRIOSTRAMIENTO,
+    arriostramiento_peso_m=presupuesto.PESO_ARRIOSTRAMIENTO,
+    perfil_wandriegel=None, wandriegel_peso_m=np.nan, **_
+) -> Modelo:
+    return Modelo(
+        m.array(),
+        (perfil_pilar, perfil_viga, perfil_arriostramiento, perfil_correa,
+         perfil_wandriegel),
+        (pilar_peso_m, viga_peso_m, arriostramiento_peso_m, correa_peso_m,
+         wandriegel_peso_m),
+        (pilar_ancho, viga_ancho, np.nan, np.nan, np.nan))
+
+
+def construir_superior(
+    cantidad_porticos, distancia_porticos_finales,
+    distancia_porticos_internos, ancho_nave, inclinacion_tejado,
+    perfil_correa=None, correa_peso_m=np.nan,
+    perfil_arriostramiento=PERFIL_ARRIOSTRAMIENTO,
+    arriostramiento_peso_m=presupuesto.PESO_ARRIOSTRAMIENTO,
+    perfil_wandriegel=None, wandriegel_peso_m=np.nan, **_
+) -> Modelo:
+    """
+    Builds the Vista superior rows only, which depend neither on the eave
+    height nor on the pillar and beam profiles. The number of wall rails
+    does, so each of their rows counts one rail here: these rows are for
+    drawing, construir() measures them.
+    """
+    faldon = presupuesto.faldon(ancho_nave, inclinacion_tejado)
+    m = _Constructor()
+    _vista_superior(
+        m, cantidad_porticos, distancia_porticos_finales,
+        distancia_porticos_internos, ancho_nave, int(faldon["correas_lado"]))
+    return _modelo(
+        m, None, None, np.nan, np.nan, np.nan, np.nan, perfil_correa,
+        correa_peso_m, perfil_arriostramiento, arriostramiento_peso_m,
+        perfil_wandriegel, wandriegel_peso_m)
+
+
+def construir_frontal(
+    cantidad_porticos, ancho_nave, altura_alero, inclinacion_tejado,
+    altura_cartela, pilar_ancho, viga_ancho, perfil_pilar=None,
+    perfil_viga=None, pilar_peso_m=np.nan, viga_peso_m=np.nan, **perfiles
+) -> Modelo:
+    """Builds the Vista frontal rows only."""
+    geo = presupuesto.geometria(ancho_nave, altura_alero, inclinacion_tejado)
+    m = _Constructor()
+    _vista_frontal(
+        m, cantidad_porticos, ancho_nave, altura_alero, inclinacion_tejado,
+        altura_cartela, geo, pilar_ancho, viga_ancho)
+    return _modelo(
+        m, perfil_pilar, perfil_viga, pilar_peso_m, viga_peso_m,
+        pilar_ancho, viga_ancho, **perfiles)
+
+
+def construir(
+    cantidad_porticos, distancia_porticos_finales,
+    distancia_porticos_internos, ancho_nave, altura_alero,
+    inclinacion_tejado, altura_cartela, pilar_ancho, viga_ancho,
+    perfil_pilar=None, perfil_viga=None, pilar_peso_m=np.nan,
+    viga_peso_m=np.nan, **perfiles
+) -> Modelo:
+    """
+    Builds the model of one configuration. pilar_ancho and viga_ancho are
+    the profile heights in meters; perfiles may hold the purlin and
+    bracing profiles and gk of nave.secundarias. Extra keyword arguments
+    (e.g. the other UserInputs fields) are ignored.
+    """
+    geo = presupuesto.geometria(ancho_nave, altura_alero, inclinacion_tejado)
+    m = _Constructor()
+    _vista_superior(
+        m, cantidad_porticos, distancia_porticos_finales,
+        distancia_porticos_internos, ancho_nave, int(geo["correas_lado"]),
+        int(geo["filas_wandriegel"]))
+    _vista_frontal(
+        m, cantidad_porticos, ancho_nave, altura_alero, inclinacion_tejado,
+        altura_cartela, geo, pilar_ancho, viga_ancho)
+    return _modelo(
+        m, perfil_pilar, perfil_viga, pilar_peso_m, viga_peso_m,
+        pilar_ancho, viga_ancho, **perfiles)
+
+
+def medicion(modelo: Modelo) -> dict:
+    """
+    Quantity takeoff per profile id: number of members, meters and weight
+    (to, NaN when the weight of the profile is unknown), without waste.
+    """
+    miembros = modelo.miembros[modelo.miembros["perfil"] != SIN_PERFIL]
+    ids = miembros["perfil"].astype(int)
+    size = len(PERFILES)
+    cantidad = np.bincount(ids, miembros["cantidad"], size).astype(int)
+    metros = np.bincount(
+        ids, miembros["longitud"] * miembros["cantidad"], size)
+    return {
+        "perfil": np.array(PERFILES),
+        "nombre": np.array(modelo.perfiles, dtype=object),
+        "cantidad": cantidad,
+        "metros": metros,
+        "peso": metros * modelo.pesos / 1000,
+    }
+
+
+def pesos(
+    estructura: Modelo, /, cantidad_porticos, distancia_porticos_finales,
+    distancia_porticos_internos, ancho_nave, altura_alero,
+    inclinacion_tejado, pilar_peso_m, viga_peso_m, correa_peso_m=0.0,
+    wandriegel_peso_m=0.0,
+    arriostramiento_peso_m=presupuesto.PESO_ARRIOSTRAMIENTO, **_
+) -> dict:
+    """
+    The quote of presupuesto.pesos for the hall of a model built by
+    construir() from the same arguments, with every count and length
+    measured on its members (see medicion).
+    """
+    geo = presupuesto.geometria(ancho_nave, altura_alero, inclinacion_tejado)
+    medida = medicion(estructura)
+    cantidad, metros = medida["cantidad"], medida["metros"]
+    return {
+        **geo,
+        **presupuesto.descripcion(
+            cantidad_porticos, distancia_porticos_finales,
+            distancia_porticos_internos, ancho_nave, geo),
+        "cantidad_correas": cantidad[CORREA],
+        "cantidad_arriostra": cantidad[ARRIOSTRAMIENTO],
+        **presupuesto.ponderar(
+            metros[PILAR], metros[VIGA], metros[CORREA], metros[WANDRIEGEL],
+            presupuesto.redondear(metros[ARRIOSTRAMIENTO], 2),
+            pilar_peso_m, viga_peso_m, correa_peso_m, wandriegel_peso_m,
+            arriostramiento_peso_m),
+    }
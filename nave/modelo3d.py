@@ -0,0 +1,305 @@
+"""
+3D model of the whole hall, exported as glTF or OBJ.
+
+One portal frame (pillars and rafters as boxes of the profile height) is
+built once and instanced at every frame position along the hall; purlins,
+wall rails and roof bracing run the full length, so they are built once
+whatever the frame count. The glTF file holds a single frame mesh and one
+node (a translation) per frame, so its size and the generation time stay
+nearly flat up to hundreds of portals. OBJ has no instancing; the frame
+vertices are repeated, but in one vectorized pass.
+
+    python -m nave.modelo3d --cantidad_porticos 200 -o almacen.glb
+
+Coordinates follow glTF: x across the hall, y up, z along the hall.
+"""
+import argparse
+import base64
+import json
+import pathlib
+import struct
+
+import numpy as np
+
+from nave import modelo, parametros, presupuesto
+
+
+# Width of the boxes relative to their height (flange of an I-profile).
+PROPORCION_ALA = 0.5
+# Section of purlins, wall rails and bracing (meters).
+SECCION_SECUNDARIA = 0.12
+SECCION_ARRIOSTRAMIENTO = 0.024
+# Heights used when no profile is given (meters).
+ALTURA_POR_DEFECTO = 0.3
+COLORES = {
+    "portico": (0.0, 0.0, 1.0, 1.0),
+    "correas": (0.0, 0.5, 0.0, 1.0),
+    "wandriegel": (0.0, 0.5, 0.0, 1.0),
+    "arriostramiento": (1.0, 0.0, 0.0, 1.0),
+}
+# Corners of a box, as (side, up) signs, at the start and at the end.
+_ESQUINAS = np.array(((-1, -1), (1, -1), (1, 1), (-1, 1)), dtype=float)
+# Triangles of a box over its eight corners (start 0-3, end 4-7).
+_CARAS = np.array((
+    (0, 2, 1), (0, 3, 2), (4, 5, 6), (4, 6, 7),
+    (0, 1, 5), (0, 5, 4), (1, 2, 6), (1, 6, 5),
+    (2, 3, 7), (2, 7, 6), (3, 0, 4), (3, 4, 7),
+), dtype=np.uint32)
+
+
+class Nave3D:
+    """Meshes of a hall and the translations each mesh is placed at."""
+
+    def __init__(self) -> None:
+        # name -> (vertices (V, 3) float32, triangles (F, 3) uint32)
+        self.mallas = {}
+        # name -> translations (K, 3) float32
+        self.instancias = {}
+
+    def add(self, name, vertices, triangles, instancias=((0, 0, 0),)):
+        self.mallas[name] = (
+            np.asarray(vertices, dtype=np.float32),
+            np.asarray(triangles, dtype=np.uint32))
+        self.instancias[name] = np.asarray(instancias, dtype=np.float32)
+
+    def triangulos(self) -> int:
+        """Triangles of the whole hall, instances included."""
+        return sum(
+            len(triangles) * len(self.instancias[name])
+            for name, (_, triangles) in self.mallas.items())
+
+
+def cajas(inicio, fin, ancho, alto, arriba=(0, 1, 0)):
+    """
+    Box meshes from every start point to every end point (arrays (M, 3)).
+    The section is ancho wide across the plane of the axis and arriba, and
+    alto deep out of it. Returns (vertices, triangles).
+    """
+    inicio = np.atleast_2d(np.asarray(inicio, dtype=float))
+    fin = np.atleast_2d(np.asarray(fin, dtype=float))
+    count = len(inicio)
+    eje = fin - inicio
+    eje /= np.linalg.norm(eje, axis=1, keepdims=True)
+    # Side and normal directions of every box
+    arriba = np.broadcast_to(np.asarray(arriba, dtype=float), eje.shape)
+    lado = np.cross(eje, arriba)
+    norma = np.linalg.norm(lado, axis=1, keepdims=True)
+    lado = np.where(norma > 1e-9, lado, np.cross(eje, (1, 0, 0)))
+    lado /= np.linalg.norm(lado, axis=1, keepdims=True)
+    normal = np.cross(lado, eje)
+    ancho = np.broadcast_to(np.asarray(ancho, dtype=float), (count,))
+    alto = np.broadcast_to(np.asarray(alto, dtype=float), (count,))
+    offsets = (
+        _ESQUINAS[:, 0, None, None] * (lado * ancho[:, None] / 2)
+        + _ESQUINAS[:, 1, None, None] * (normal * alto[:, None] / 2))
+    # (count, 8, 3): the four corners at the start, then at the end
+    vertices = np.concatenate(
+        (inicio + offsets, fin + offsets), axis=0
+    ).reshape(2, 4, count, 3).transpose(2, 0, 1, 3).reshape(count, 8, 3)
+    triangles = _CARAS + 8 * np.arange(count, dtype=np.uint32)[:, None, None]
+    return vertices.reshape(-1, 3), triangles.reshape(-1, 3)
+
+
+def construir(
+    pilar_ancho=ALTURA_POR_DEFECTO, viga_ancho=ALTURA_POR_DEFECTO,
+    **parametros_nave
+) -> Nave3D:
+    """
+    Builds the 3D model. Takes the UserInputs fields (missing ones take
+    their widget default; cantidad_porticos is not bounded here) and the
+    profile heights in meters.
+    """
+    valores = {**parametros.valores_por_defecto(), **parametros_nave}
+    n = int(valores["cantidad_porticos"])
+    ancho_nave = valores["ancho_nave"]
+    altura_alero = valores["altura_alero"]
+    geo = presupuesto.geometria(
+        ancho_nave, altura_alero, valores["inclinacion_tejado"])
+    angulo = float(geo["angulo_radianes"])
+    largo_riegel = float(geo["largo_riegel"])
+    # The 2D model gives the frames, purlin lines and bracing in plan
+    plano = modelo.construir_superior(**valores).vista("superior")
+    porticos = np.isin(plano["tipo"], (
+        modelo.TIPOS.index("portico_hastial"),
+        modelo.TIPOS.index("portico_interno")))
+    z = np.sort(plano["x0"][porticos])
+    largo_nave = z[-1]
+    cumbrera = altura_alero + largo_riegel * np.sin(angulo)
+
+    def altura_cubierta(x):
+        """Height of the roof above a point across the hall."""
+        return altura_alero + np.tan(angulo) * np.minimum(x, ancho_nave - x)
+
+    nave = Nave3D()
+    # One portal frame at z = 0, placed at every frame position
+    inicio = (
+        (0, 0, 0), (ancho_nave, 0, 0),
+        (0, altura_alero, 0), (ancho_nave, altura_alero, 0))
+    fin = (
+        (0, altura_alero, 0), (ancho_nave, altura_alero, 0),
+        (ancho_nave / 2, cumbrera, 0), (ancho_nave / 2, cumbrera, 0))
+    alturas = np.array((pilar_ancho, pilar_ancho, viga_ancho, viga_ancho))
+    # The profile height lies in the plane of the frame
+    nave.add(
+        "portico",
+        *cajas(inicio, fin, alturas, alturas * PROPORCION_ALA,
+               arriba=(0, 0, 1)),
+        instancias=np.stack((np.zeros(n), np.zeros(n), z), axis=1))
+
+    correas = plano[plano["tipo"] == modelo.TIPOS.index("correa")]
+    x = correas["y0"]
+    y = altura_cubierta(x) + viga_ancho / 2 + SECCION_SECUNDARIA / 2
+    nave.add("correas", *cajas(
+        np.stack((x, y, np.zeros_like(x)), axis=1),
+        np.stack((x, y, np.full_like(x, largo_nave)), axis=1),
+        SECCION_SECUNDARIA, SECCION_SECUNDARIA))
+
+    # Wall rails on both walls
+    y = 0.25 + float(geo["distancia_real_wandriegel"]) * np.arange(
+        int(geo["filas_wandriegel"]))
+    separacion = (pilar_ancho + SECCION_SECUNDARIA) / 2
+    x = np.concatenate((
+        np.full_like(y, -separacion),
+        np.full_like(y, ancho_nave + separacion)))
+    y = np.tile(y, 2)
+    nave.add("wandriegel", *cajas(
+        np.stack((x, y, np.zeros_like(x)), axis=1),
+        np.stack((x, y, np.full_like(x, largo_nave)), axis=1),
+        SECCION_SECUNDARIA, SECCION_SECUNDARIA, arriba=(1, 0, 0)))
+
+    # Roof bracing, laid on the rafters
+    arrios = plano[plano["tipo"] == modelo.TIPOS.index("arriostramiento")]
+    x0, x1 = arrios["y0"], arrios["y1"]
+    z0 = np.clip(arrios["x0"], 0, largo_nave)
+    z1 = np.clip(arrios["x1"], 0, largo_nave)
+    nave.add("arriostramiento", *cajas(
+        np.stack((x0, altura_cubierta(x0) + viga_ancho / 2, z0), axis=1),
+        np.stack((x1, altura_cubierta(x1) + viga_ancho / 2, z1), axis=1),
+        SECCION_ARRIOSTRAMIENTO, SECCION_ARRIOSTRAMIENTO))
+    return nave
+
+
+def _gltf(nave: Nave3D) -> tuple:
+    """Returns the glTF JSON document and its binary buffer."""
+    binario = bytearray()
+    views, accessors, meshes, materials, nodes = [], [], [], [], []
+
+    def vista(data: np.ndarray, target) -> int:
+        binario.extend(b"\0" * (-len(binario) % 4))
+        views.append({
+            "buffer": 0, "byteOffset": len(binario),
+            "byteLength": data.nbytes, "target": target})
+        binario.extend(data.tobytes())
+        return len(views) - 1
+
+    for name, (vertices, triangles) in nave.mallas.items():
+        accessors.append({
+            "bufferView": vista(vertices, 34962), "componentType": 5126,
+            "count": len(vertices), "type": "VEC3",
+            "min": vertices.min(axis=0).tolist(),
+            "max": vertices.max(axis=0).tolist()})
+        accessors.append({
+            "bufferView": vista(triangles, 34963), "componentType": 5125,
+            "count": triangles.size, "type": "SCALAR"})
+        materials.append({
+            "name": name,
+            "pbrMetallicRoughness": {
+                "baseColorFactor": list(COLORES.get(name, (0.5,) * 4)),
+                "metallicFactor": 0.5, "roughnessFactor": 0.6}})
+        meshes.append({"name": name, "primitives": [{
+            "attributes": {"POSITION": len(accessors) - 2},
+            "indices": len(accessors) - 1,
+            "material": len(materials) - 1}]})
+        for translation in nave.instancias[name].tolist():
+            node = {"mesh": len(meshes) - 1}
+            if any(translation):
+                node["translation"] = translation
+            nodes.append(node)
+
+    binario.extend(b"\0" * (-len(binario) % 4))
+    documento = {
+        "asset": {"version": "2.0", "generator": "nave.modelo3d"},
+        "scene": 0,
+        "scenes": [{"nodes": list(range(len(nodes)))}],
+        "nodes": nodes, "meshes": meshes, "materials": materials,
+        "accessors": accessors, "bufferViews": views,
+        "buffers": [{"byteLength": len(binario)}],
+    }
+    return documento, bytes(binario)
+
+
+def glb(nave: Nave3D) -> bytes:
+    """Binary glTF (.glb) of the model."""
+    documento, binario = _gltf(nave)
+    texto = json.dumps(documento, separators=(",", ":")).encode()
+    texto += b" " * (-len(texto) % 4)
+    total = 12 + 8 + len(texto) + 8 + len(binario)
+    return b"".join((
+        struct.pack("<4sII", b"glTF", 2, total),
+        struct.pack("<I4s", len(texto), b"JSON"), texto,
+        struct.pack("<I4s", len(binario), b"BIN\0"), binario))
+
+
+def gltf(nave: Nave3D) -> str:
+    """Text glTF (.gltf) with the buffer embedded as a data URI."""
+    documento, binario = _gltf(nave)
+    documento["buffers"][0]["uri"] = (
+        "data:application/octet-stream;base64,"
+        + base64.b64encode(binario).decode())
+    return json.dumps(documento, separators=(",", ":"))
+
+
+def escribir_obj(nave: Nave3D, file) -> None:
+    """Writes the model as Wavefront OBJ, one group per mesh."""
+    offset = 1
+    for name, (vertices, triangles) in nave.mallas.items():
+        instancias = nave.instancias[name]
+        todos = (vertices[None] + instancias[:, None]).reshape(-1, 3)
+        caras = (
+            triangles[None]
+            + (len(vertices) * np.arange(len(instancias)))[:, None, None]
+        ).reshape(-1, 3) + offset
+        file.write(f"g {name}\n")
+        np.savetxt(file, todos, fmt="v %.4f %.4f %.4f")
+        np.savetxt(file, caras, fmt="f %d %d %d")
+        offset += len(todos)
+
+
+def exportar(nave: Nave3D, path) -> None:
+    """Writes the model to a .glb, .gltf or .obj file."""
+    path = pathlib.Path(path)
+    formato = path.suffix.lower()
+    if formato == ".glb":
+        path.write_bytes(glb(nave))
+    elif formato == ".gltf":
+        path.write_text(gltf(nave), encoding="utf-8")
+    elif formato == ".obj":
+        with open(path, "w", encoding="utf-8") as file:
+            escribir_obj(nave, file)
+    else:
+        raise ValueError(f"Formato desconocido: {path.suffix}")
+
+
+def main(argv=None) -> None:
+    """Entry point of the command line."""
+    parser = argparse.ArgumentParser(
+        prog="python -m nave.modelo3d",
+        description="Exporta el modelo 3D de una nave a glTF u OBJ.")
+    for name, limits in parametros.LIMITES.items():
+        parser.add_argument(
+            f"--{name}", type=type(limits["value"]), default=limits["value"])
+    parser.add_argument(
+        "--pilar_ancho", type=float, default=ALTURA_POR_DEFECTO,
+        help="Altura del perfil de los pilares (metros)")
+    parser.add_argument(
+        "--viga_ancho", type=float, default=ALTURA_POR_DEFECTO,
+        help="Altura del perfil de las vigas (metros)")
+    parser.add_argument(
+        "-o", "--salida", required=True, help="Fichero .glb, .gltf u .obj")
+    args = vars(parser.parse_args(argv))
+    path = args.pop("salida")
+    exportar(construir(**args), path)
+
+
+if __name__ == "__main__":
+    main()
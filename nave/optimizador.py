@@ -0,0 +1,175 @@
+"""
+Lightest-profile optimizer for the portal frames.
+
+Searches every profile of every family for the pillars and the beams,
+together with the portal count and spacings allowed by the widgets, and
+returns the combination with the lowest tonnage or cost. Pillars and
+beams have to pass the checks of nave.comprobacion (buckling of the
+pillars, bending and deflection of the beams) under its simplified
+frame loads, so the result is a predesign estimate, not a structural
+calculation. The profiles of all families are merged into one
+weight-sorted array, so the lightest valid profile is a binary search
+per configuration.
+"""
+import numpy as np
+
+from nave import catalogo, parametros, presupuesto
+
+
+# Simplified design loads for the required section modulus.
+CARGA_CUBIERTA = 1.0  # kN/m² (self weight, cladding and snow)
+COEFICIENTE_CARGAS = 1.5
+LIMITE_ELASTICO = 235  # MPa (S235)
+COLUMNA_W = "Wel,y [cm]"
+OBJETIVOS = {"toneladas": "pesototal", "coste": "costes_totales"}
+
+
+class TablaPerfiles:
+    """
+    Profiles of several families merged and sorted by weight, with the
+    capacity column they are chosen by (Wel,y unless another is given).
+    """
+
+    def __init__(
+        self, dfs: dict, familias=catalogo.FAMILIAS_PORTICO,
+        columna=COLUMNA_W
+    ) -> None:
+        import pandas as pd
+        frames = []
+        for familia in familias:
+            df = dfs[f"{familia}.xlsx"]
+            frames.append(pd.DataFrame({
+                "familia": familia,
+                "perfil": df["Perfil"],
+                "gk": pd.to_numeric(df["gk [kg/m]"], errors="coerce"),
+                "w": pd.to_numeric(df[columna], errors="coerce"),
+            }))
+        tabla = pd.concat(frames, ignore_index=True).dropna()
+        tabla = tabla.sort_values(["gk", "w"], ignore_index=True)
+        self.familia = tabla["familia"].to_numpy()
+        self.perfil = tabla["perfil"].to_numpy()
+        self.gk = tabla["gk"].to_numpy(dtype=float)
+        self.w = tabla["w"].to_numpy(dtype=float)
+        # Best modulus available up to each weight; non-decreasing, so the
+        # first position reaching a requirement is the lightest valid one.
+        self.w_max = np.maximum.accumulate(self.w)
+
+    @classmethod
+    def comprobada(
+        cls, secciones, ancho_nave, altura_alero, miembro
+    ) -> "TablaPerfiles":
+        """
+        The profiles of nave.comprobacion.Secciones with the line load
+        (kN/m) each one carries as the miembro ("pilar" or "viga") of the
+        frame as capacity.
+        """
+        from nave import comprobacion
+        tabla = cls.__new__(cls)
+        tabla.familia = secciones.familia
+        tabla.perfil = secciones.perfil
+        tabla.gk = secciones.gk
+        tabla.w = comprobacion.capacidad(
+            secciones, ancho_nave, altura_alero, miembro)
+        tabla.w_max = np.maximum.accumulate(tabla.w)
+        return tabla
+
+    def mas_ligero(self, w_requerido) -> np.ndarray:
+        """
+        Index of the lightest profile reaching the required modulus (or
+        capacity), or -1 where no profile does.
+        """
+        index = np.searchsorted(self.w_max, w_requerido, side="left")
+        return np.where(index < len(self.gk), index, -1)
+
+
+def separacion_tributaria(
+    cantidad_porticos, distancia_porticos_finales,
+    distancia_porticos_internos
+) -> np.ndarray:
+    """Largest frame spacing carried by one internal frame."""
+    mixta = (distancia_porticos_finales + distancia_porticos_internos) / 2
+    return np.where(
+        cantidad_porticos > 4,
+        np.maximum(distancia_porticos_internos, mixta), mixta)
+
+
+def configuraciones(longitud_nave, tolerancia=0.05) -> dict:
+    """
+    Every portal count and spacing allowed by the widgets whose hall length
+    (two end bays plus the internal bays) matches the requested one.
+    """
+    grid = np.meshgrid(
+        parametros.rango("cantidad_porticos"),
+        parametros.rango("distancia_porticos_finales"),
+        parametros.rango("distancia_porticos_internos"),
+        indexing="ij")
+    cantidad, finales, internos = (values.ravel() for values in grid)
+    longitud = 2 * finales + (cantidad - 3) * internos
+    validas = np.abs(longitud - longitud_nave) <= tolerancia + 1e-9
+    return {
+        "cantidad_porticos": cantidad[validas],
+        "distancia_porticos_finales": finales[validas],
+        "distancia_porticos_internos": internos[validas],
+    }
+
+
+def optimizar(
+    dfs: dict, ancho_nave, altura_alero, inclinacion_tejado, longitud_nave,
+    objetivo="toneladas", familias_pilar=catalogo.FAMILIAS_PORTICO,
+    familias_viga=catalogo.FAMILIAS_PORTICO, carga=CARGA_CUBIERTA,
+    tolerancia=0.05
+):
+    """
+    Returns the best combination as a dict (parameters, profiles, their
+    utilization and the quote of the engine), or None when nothing passes
+    the checks.
+    """
+    if objetivo not in OBJETIVOS:
+        raise ValueError(f"Objetivo desconocido: {objetivo}")
+    configs = configuraciones(longitud_nave, tolerancia)
+    if not len(configs["cantidad_porticos"]):
+        return None
+    # Line load on one frame (kN/m)
+    requerida = carga * separacion_tributaria(**configs)
+
+    from nave import comprobacion
+    pilares = TablaPerfiles.comprobada(
+        comprobacion.Secciones(dfs, familias_pilar), ancho_nave,
+        altura_alero, "pilar")
+    vigas = TablaPerfiles.comprobada(
+        comprobacion.Secciones(dfs, familias_viga), ancho_nave,
+        altura_alero, "viga")
+    pilar = pilares.mas_ligero(requerida)
+    viga = vigas.mas_ligero(requerida)
+    # Early exit: drop every configuration without a valid profile.
+    validas = (pilar >= 0) & (viga >= 0)
+    if not validas.any():
+        return None
+    configs = {name: values[validas] for name, values in configs.items()}
+    pilar, viga, requerida = pilar[validas], viga[validas], requerida[validas]
+
+    # The secondary members depend on the spacings too
+    from nave import secundarias
+    geometria = dict(
+        ancho_nave=ancho_nave, altura_alero=altura_alero,
+        inclinacion_tejado=inclinacion_tejado, **configs)
+    quote = presupuesto.presupuesto(
+        pilar_peso_m=pilares.gk[pilar], viga_peso_m=vigas.gk[viga],
+        **secundarias.dimensionar(secundarias.tablas(dfs), **geometria),
+        **geometria)
+    best = int(np.argmin(quote[OBJETIVOS[objetivo]]))
+    result = {name: values[best].item() for name, values in configs.items()}
+    result.update(
+        familia_pilar=pilares.familia[pilar[best]],
+        perfil_pilar=pilares.perfil[pilar[best]],
+        familia_viga=vigas.familia[viga[best]],
+        perfil_viga=vigas.perfil[viga[best]],
+        aprovechamiento_pilar=round(
+            float(requerida[best] / pilares.w[pilar[best]]), 3),
+        aprovechamiento_viga=round(
+            float(requerida[best] / vigas.w[viga[best]]), 3),
+        configuraciones=int(validas.sum()))
+    result.update(
+        {name: np.broadcast_to(values, pilar.shape)[best].item()
+         for name, values in quote.items() if name not in result})
+    return result
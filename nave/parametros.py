@@ -0,0 +1,37 @@
+"""Bounds and defaults of the hall parameters the user can set."""
+
+
+# Keyword arguments for the Streamlit widgets of every parameter.
+LIMITES = {
+    "cantidad_porticos": dict(
+        min_value=4, max_value=10, value=5, step=1),
+    "distancia_porticos_finales": dict(
+        min_value=5.0, max_value=7.0, value=5.5, step=0.1),
+    "distancia_porticos_internos": dict(
+        min_value=5.0, max_value=7.0, value=6.0, step=0.1),
+    "ancho_nave": dict(
+        min_value=8.0, max_value=26.0, value=18.0, step=0.25),
+    "altura_alero": dict(
+        min_value=4.0, max_value=8.0, value=4.0, step=0.1),
+    "inclinacion_tejado": dict(
+        min_value=6, max_value=30, value=12, step=1),
+    "longitud_cartela": dict(
+        min_value=0.0, max_value=4.0, value=2.0, step=0.1),
+    "altura_cartela": dict(
+        min_value=0.0, max_value=2.5, value=0.7, step=0.1),
+}
+
+
+def valores_por_defecto() -> dict:
+    """Returns the default value of every parameter."""
+    return {name: limits["value"] for name, limits in LIMITES.items()}
+
+
+def rango(name) -> list:
+    """Returns every value the widget of the parameter can take."""
+    limits = LIMITES[name]
+    count = round(
+        (limits["max_value"] - limits["min_value"]) / limits["step"])
+    return [
+        round(limits["min_value"] + i * limits["step"], 6)
+        for i in range(count + 1)]
@@ -0,0 +1,142 @@
+"""
+Per-stage profiling of a Streamlit rerun.
+
+The pages wrap every stage of main() in Perfilador.etapa. When profiling
+is on (the debug checkbox of the sidebar, or NAVE_PERFILADO=1 in the
+environment) each stage records its wall time, the number of matplotlib
+artists of the figures it drew and the tracemalloc peak reached while it
+ran, and the whole rerun is appended as one JSON line to the log. When it
+is off, etapa does nothing.
+
+The artists are those of the figures the rerun itself renders (see
+figura). tracemalloc traces the whole process, so the peak of a stage
+includes whatever the other sessions allocate meanwhile; it is exact
+only when one rerun is running.
+"""
+import contextlib
+import datetime
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+from nave import catalogo
+
+
+LOG = catalogo.CACHE_FOLDER.parent / "perfilado.jsonl"
+VARIABLE_ENTORNO = "NAVE_PERFILADO"
+
+# Reruns being profiled; tracemalloc runs while there is any.
+_trazando = {"reruns": 0, "propio": False}
+_lock = threading.Lock()
+# Perfilador of the rerun running in each thread.
+_local = threading.local()
+
+
+def activado_por_entorno() -> bool:
+    """Whether the environment asks for profiling of every rerun."""
+    return os.environ.get(VARIABLE_ENTORNO, "") not in ("", "0")
+
+
+def _empezar_traza() -> None:
+    with _lock:
+        if not _trazando["reruns"] and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _trazando["propio"] = True
+        _trazando["reruns"] += 1
+
+
+def _parar_traza() -> None:
+    with _lock:
+        _trazando["reruns"] -= 1
+        if not _trazando["reruns"] and _trazando["propio"]:
+            tracemalloc.stop()
+            _trazando["propio"] = False
+
+
+def figura(fig) -> None:
+    """
+    Counts the artists of a figure drawn by the rerun of the calling
+    thread, if it is being profiled. Called once the figure is drawn.
+    """
+    perfilador = getattr(_local, "perfilador", None)
+    if perfilador is not None and perfilador.activo:
+        perfilador.artistas += len(fig.findobj())
+
+
+class Perfilador:
+    """Collects the measurements of the stages of one rerun."""
+
+    def __init__(self, pagina, activo=False, sesion=None) -> None:
+        self.pagina = pagina
+        self.activo = activo
+        self.sesion = sesion
+        self.etapas = []
+        self.notas = {}
+        # Artists of the figures drawn so far
+        self.artistas = 0
+        self._inicio = time.perf_counter()
+        if activo:
+            _local.perfilador = self
+            _empezar_traza()
+
+    @contextlib.contextmanager
+    def etapa(self, nombre):
+        """Measures the code of the with block as one stage."""
+        if not self.activo:
+            yield
+            return
+        # The peak of the stage, over what was live when it started
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        artistas = self.artistas
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            ms = (time.perf_counter() - start) * 1000
+            pico = tracemalloc.get_traced_memory()[1] - base
+            self.etapas.append({
+                "etapa": nombre,
+                "ms": round(ms, 3),
+                "artistas": self.artistas - artistas,
+                "pico_kb": round(pico / 1024, 1),
+            })
+
+    def anotar(self, nombre, valor) -> None:
+        """Adds a JSON-ready value to the record of the rerun."""
+        if self.activo:
+            self.notas[nombre] = valor
+
+    def registro(self) -> dict:
+        """The measurements of the rerun as one JSON-ready dict."""
+        return {
+            "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+            "pagina": self.pagina,
+            "sesion": self.sesion,
+            "total_ms": round((time.perf_counter() - self._inicio) * 1000, 3),
+            "etapas": self.etapas,
+            **self.notas,
+        }
+
+    def terminar(self, log=LOG):
+        """
+        Appends the rerun to the JSON lines log and returns its record, or
+        None when profiling is off.
+        """
+        if not self.activo:
+            return None
+        self.activo = False
+        if getattr(_local, "perfilador", None) is self:
+            del _local.perfilador
+        _parar_traza()
+        registro = self.registro()
+        try:
+            log.parent.mkdir(parents=True, exist_ok=True)
+            with _lock, open(log, "a", encoding="utf-8") as file:
+                file.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        except OSError:
+            # A read-only deployment still shows the panel
+            pass
+        return registro
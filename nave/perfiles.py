@@ -0,0 +1,150 @@
+"""
+Typed access to the profiles of the catalog by family and name.
+
+    perfiles = get_profile_catalog(catalogo.load_catalog())
+    perfiles["IPE"]["IPE 300"].gk       # 42.2 kg/m
+
+Every family keeps a hash index from the normalized profile name (as the
+search box treats it, so "ipe 300" finds "IPE300") to its row, so a
+lookup is constant time instead of a boolean scan of the whole frame.
+Properties are read from column arrays built on first use: the usual ones
+go by short names (PROPIEDADES), any other by its full column name.
+
+The columns are not copied: the numeric ones of the compiled catalog are
+float64 views of the mapped file (nave.mapeado), shared by every process,
+which is smaller than any per-process copy.
+"""
+import typing
+
+import numpy as np
+
+from nave.buscador import normalize
+
+if typing.TYPE_CHECKING:
+    import pandas as pd
+
+
+# Short names of the properties the app uses, by column name.
+PROPIEDADES = {
+    "gk": "gk [kg/m]",
+    "h": "Altura h [mm]",
+    "b": "Ancho b [mm]",
+    "A": "Querschnittsfläche _\nA [cm²]",
+    "Iy": "Iy [cm]",
+    "Iz": "Iz [cm]",
+    "Wely": "Wel,y [cm]",
+    "Welz": "Wel,z [cm]",
+    "iy": "Flächenträgheitsradius _\niy [cm]",
+    "iz": "Flächenträgheitsradius _\niz [cm]",
+    "superficie": "Superficie_revestimiento [m²/m]",
+}
+
+# Profile catalog of the last data frames seen, keyed by their identity.
+_catalogs = {"dfs": None, "catalog": None}
+
+
+class Profile:
+    """One profile; its properties are read on access."""
+
+    __slots__ = ("family", "name", "row")
+
+    def __init__(self, family: "Family", name: str, row: int) -> None:
+        self.family = family
+        self.name = name
+        self.row = row
+
+    def __getattr__(self, name):
+        try:
+            return self.family.value(PROPIEDADES[name], self.row)
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __getitem__(self, column):
+        """Value of any column, by its full name."""
+        return self.family.value(column, self.row)
+
+    def __repr__(self) -> str:
+        return f"Profile({self.family.name!r}, {self.name!r})"
+
+
+class Family:
+    """Profiles of one catalog file, indexed by name."""
+
+    def __init__(self, name: str, df: "pd.DataFrame") -> None:
+        self.name = name
+        self.df = df
+        self.names = df["Perfil"].tolist()
+        self._rows = {}
+        for row, perfil in enumerate(self.names):
+            if isinstance(perfil, str):
+                # The first of repeated names wins, as the scan did
+                self._rows.setdefault(normalize(perfil), row)
+        self._columns = {}
+
+    def __getitem__(self, name) -> Profile:
+        try:
+            row = self._rows[normalize(name)]
+        except KeyError:
+            raise KeyError(
+                f"Perfil desconocido en {self.name}: {name}") from None
+        return Profile(self, self.names[row], row)
+
+    def __contains__(self, name) -> bool:
+        return normalize(name) in self._rows
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def column(self, column) -> np.ndarray:
+        """Array of a column, built on first use."""
+        array = self._columns.get(column)
+        if array is None:
+            values = self.df[column]
+            if values.dtype.kind == "f":
+                # A view of the mapped catalog, not a copy
+                array = values.to_numpy()
+            else:
+                array = values.to_numpy(dtype=object)
+            self._columns[column] = array
+        return array
+
+    def value(self, column, row):
+        """Value of a column at a row; numbers as floats (NaN if empty)."""
+        value = self.column(column)[row]
+        return value.item() if isinstance(value, np.generic) else value
+
+
+class ProfileCatalog:
+    """Families of the catalog by name, with or without ".xlsx"."""
+
+    def __init__(self, dfs: dict) -> None:
+        self.dfs = dfs
+        self._families = {}
+
+    def __getitem__(self, family) -> Family:
+        name = str(family).replace(".xlsx", "")
+        result = self._families.get(name)
+        if result is None:
+            try:
+                df = self.dfs[f"{name}.xlsx"]
+            except KeyError:
+                raise KeyError(f"Familia desconocida: {family}") from None
+            result = self._families[name] = Family(name, df)
+        return result
+
+    def __contains__(self, family) -> bool:
+        return f"{str(family).replace('.xlsx', '')}.xlsx" in self.dfs
+
+    def __iter__(self):
+        return (name.replace(".xlsx", "") for name in self.dfs)
+
+    def __len__(self) -> int:
+        return len(self.dfs)
+
+
+def get_profile_catalog(dfs: dict) -> ProfileCatalog:
+    """Returns the profile catalog of the given frames, built only once."""
+    if _catalogs["dfs"] is not dfs:
+        _catalogs["catalog"] = ProfileCatalog(dfs)
+        _catalogs["dfs"] = dfs
+    return _catalogs["catalog"]
@@ -0,0 +1,209 @@
+"""
+CAD export of the drawings as DXF and SVG, without matplotlib.
+
+Writes the rows of the structural model (nave.modelo), which are the
+coordinates the views draw, straight to the file as lines: Vista superior,
+Vista frontal, or both side by side on one sheet ("nave"). Every view and
+member type goes to its own layer (e.g. SUPERIOR_CORREA, FRONTAL_PILAR),
+colored and dashed as in the views (nave.dibujo.ESTILOS). A line the
+model repeats is written once.
+
+The rows are formatted in chunks of TAMANO_TROZO with np.savetxt and
+written as they are formatted, so the text of a large hall is never held
+in memory at once:
+
+    python -m nave.planos --cantidad_porticos 200 -o almacen.dxf
+    python -m nave.planos --vista frontal -o portico.svg
+
+Coordinates are in meters, x and y as in the views. DXF is R12 (AC1009),
+which every CAD program reads; SVG is drawn at 1:100 (1 m = 10 mm).
+"""
+import argparse
+import io
+import pathlib
+
+import numpy as np
+
+from nave import dibujo, modelo, modelo3d, parametros
+
+
+VISTAS = ("superior", "frontal", "nave")
+TAMANO_TROZO = 4096
+# Gap between Vista superior and Vista frontal on the "nave" sheet (m).
+SEPARACION = 5.0
+# Margin around the drawing in SVG (m) and its scale (mm per m).
+MARGEN = 1.0
+ESCALA_SVG = 10
+# DXF color numbers (AutoCAD Color Index) and line types of the styles.
+COLORES_DXF = {
+    dibujo.RED: 1, dibujo.GREEN: 3, dibujo.BLUE: 5, dibujo.BLACK: 7}
+LINEAS_DXF = {"-": "CONTINUOUS", "--": "DASHED"}
+TRAZOS_SVG = {"-": "none", "--": "6 4"}
+_LINEA_DXF = (
+    "0\nLINE\n8\n{capa}\n10\n%.4f\n20\n%.4f\n30\n0.0\n"
+    "11\n%.4f\n21\n%.4f\n31\n0.0")
+
+
+def filas(estructura: modelo.Modelo, vista="nave") -> np.ndarray:
+    """
+    Rows of the model to draw for a view. On the "nave" sheet Vista
+    frontal is moved to the right of Vista superior.
+    """
+    if vista not in VISTAS:
+        raise ValueError(f"Vista desconocida: {vista}")
+    if vista != "nave":
+        return unicas(estructura.vista(vista))
+    superior = estructura.vista("superior")
+    frontal = estructura.vista("frontal").copy()
+    desplazamiento = (
+        max(superior["x0"].max(), superior["x1"].max()) + SEPARACION
+        - min(frontal["x0"].min(), frontal["x1"].min()))
+    frontal["x0"] += desplazamiento
+    frontal["x1"] += desplazamiento
+    return unicas(np.concatenate((superior, frontal)))
+
+
+def unicas(rows: np.ndarray) -> np.ndarray:
+    """
+    The rows without repeated lines of a layer (at the precision of the
+    file, drawn either way round), in drawing order.
+    """
+    inicio = np.column_stack((rows["x0"], rows["y0"])).round(4)
+    fin = np.column_stack((rows["x1"], rows["y1"])).round(4)
+    alreves = (inicio[:, 0] > fin[:, 0]) | (
+        (inicio[:, 0] == fin[:, 0]) & (inicio[:, 1] > fin[:, 1]))
+    clave = np.column_stack((
+        rows["vista"], rows["tipo"],
+        np.where(alreves[:, np.newaxis], fin, inicio),
+        np.where(alreves[:, np.newaxis], inicio, fin))) + 0.0
+    _, primeras = np.unique(clave, axis=0, return_index=True)
+    return rows[np.sort(primeras)]
+
+
+def capas(rows: np.ndarray) -> dict:
+    """
+    Layer name -> (style, mask of its rows), in drawing order (the order
+    of the first row of every layer).
+    """
+    codigo = rows["vista"].astype(int) * len(modelo.TIPOS) + rows["tipo"]
+    codigos, primeros = np.unique(codigo, return_index=True)
+    resultado = {}
+    for valor in codigos[np.argsort(primeros)]:
+        vista, tipo = divmod(int(valor), len(modelo.TIPOS))
+        vista, tipo = modelo.VISTAS[vista], modelo.TIPOS[tipo]
+        resultado[f"{vista}_{tipo}".upper()] = (
+            dibujo.ESTILOS[vista, tipo], codigo == valor)
+    return resultado
+
+
+def _trozos(rows: np.ndarray, flip=False):
+    """(x0, y0, x1, y1) arrays of TAMANO_TROZO rows at a time."""
+    signo = -1.0 if flip else 1.0
+    for inicio in range(0, len(rows), TAMANO_TROZO):
+        trozo = rows[inicio:inicio + TAMANO_TROZO]
+        # Adding zero turns -0.0 into 0.0
+        yield np.column_stack((
+            trozo["x0"], signo * trozo["y0"],
+            trozo["x1"], signo * trozo["y1"])) + 0.0
+
+
+def escribir_dxf(rows: np.ndarray, file) -> None:
+    """Writes the rows as an R12 DXF file, one layer per member type."""
+    por_capa = capas(rows)
+    file.write(
+        "0\nSECTION\n2\nHEADER\n9\n$ACADVER\n1\nAC1009\n0\nENDSEC\n"
+        "0\nSECTION\n2\nTABLES\n"
+        "0\nTABLE\n2\nLTYPE\n70\n2\n"
+        "0\nLTYPE\n2\nCONTINUOUS\n70\n0\n3\nSolid line\n72\n65\n73\n0\n"
+        "40\n0.0\n"
+        "0\nLTYPE\n2\nDASHED\n70\n0\n3\nDashed __ __ __\n72\n65\n73\n2\n"
+        "40\n0.3\n49\n0.2\n49\n-0.1\n"
+        f"0\nENDTAB\n0\nTABLE\n2\nLAYER\n70\n{len(por_capa)}\n")
+    for capa, ((color, linestyle, _), _) in por_capa.items():
+        file.write(
+            f"0\nLAYER\n2\n{capa}\n70\n0\n62\n{COLORES_DXF[color]}\n"
+            f"6\n{LINEAS_DXF[linestyle]}\n")
+    file.write("0\nENDTAB\n0\nENDSEC\n0\nSECTION\n2\nENTITIES\n")
+    for capa, (_, mascara) in por_capa.items():
+        for trozo in _trozos(rows[mascara]):
+            np.savetxt(file, trozo, fmt=_LINEA_DXF.format(capa=capa))
+    file.write("0\nENDSEC\n0\nEOF\n")
+
+
+def escribir_svg(rows: np.ndarray, file) -> None:
+    """
+    Writes the rows as an SVG file, one group per member type (layers in
+    Inkscape). y is flipped, so the drawing is upright.
+    """
+    x = np.concatenate((rows["x0"], rows["x1"]))
+    y = -np.concatenate((rows["y0"], rows["y1"]))
+    x_min, y_min = x.min() - MARGEN, y.min() - MARGEN
+    ancho = x.max() + MARGEN - x_min
+    alto = y.max() + MARGEN - y_min
+    file.write(
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<svg xmlns="http://www.w3.org/2000/svg" '
+        'xmlns:inkscape="http://www.inkscape.org/namespaces/inkscape" '
+        f'width="{ancho * ESCALA_SVG:.1f}mm" '
+        f'height="{alto * ESCALA_SVG:.1f}mm" '
+        f'viewBox="{x_min:.4f} {y_min:.4f} {ancho:.4f} {alto:.4f}">\n')
+    for capa, ((color, linestyle, linewidth), mascara) in capas(
+        rows
+    ).items():
+        file.write(
+            f'<g id="{capa}" inkscape:label="{capa}" '
+            f'inkscape:groupmode="layer" fill="none" stroke="{color}" '
+            f'stroke-width="{linewidth or 1}" '
+            f'stroke-dasharray="{TRAZOS_SVG[linestyle]}">\n'
+            '<path vector-effect="non-scaling-stroke" d="\n')
+        for trozo in _trozos(rows[mascara], flip=True):
+            np.savetxt(file, trozo, fmt="M%.4f %.4f L%.4f %.4f")
+        file.write('"/>\n</g>\n')
+    file.write("</svg>\n")
+
+
+ESCRITORES = {".dxf": escribir_dxf, ".svg": escribir_svg}
+
+
+def contenido(estructura: modelo.Modelo, formato, vista="nave") -> bytes:
+    """The DXF or SVG file of a view, as bytes (e.g. for a download)."""
+    buffer = io.StringIO()
+    ESCRITORES[f".{formato}"](filas(estructura, vista), buffer)
+    return buffer.getvalue().encode("utf-8")
+
+
+def exportar(estructura: modelo.Modelo, path, vista="nave") -> None:
+    """Writes a view to a .dxf or .svg file, by its suffix."""
+    path = pathlib.Path(path)
+    escritor = ESCRITORES.get(path.suffix.lower())
+    if escritor is None:
+        raise ValueError(f"Formato desconocido: {path.suffix}")
+    with open(path, "w", encoding="utf-8") as file:
+        escritor(filas(estructura, vista), file)
+
+
+def main(argv=None) -> None:
+    """Entry point of the command line."""
+    parser = argparse.ArgumentParser(
+        prog="python -m nave.planos",
+        description="Exporta los planos de una nave a DXF o SVG.")
+    for name, limits in parametros.LIMITES.items():
+        parser.add_argument(
+            f"--{name}", type=type(limits["value"]), default=limits["value"])
+    parser.add_argument(
+        "--pilar_ancho", type=float, default=modelo3d.ALTURA_POR_DEFECTO,
+        help="Altura del perfil de los pilares (metros)")
+    parser.add_argument(
+        "--viga_ancho", type=float, default=modelo3d.ALTURA_POR_DEFECTO,
+        help="Altura del perfil de las vigas (metros)")
+    parser.add_argument("--vista", choices=VISTAS, default="nave")
+    parser.add_argument(
+        "-o", "--salida", required=True, help="Fichero .dxf o .svg")
+    args = vars(parser.parse_args(argv))
+    path = args.pop("salida")
+    vista = args.pop("vista")
+    exportar(modelo.construir(**args), path, vista)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+"""
+Headless quote engine.
+
+Reproduces the geometry rules of Geometry and display_vista_superior and
+the weight and cost math of display_text without any Streamlit or
+matplotlib call. Every function takes scalars or NumPy arrays (which are
+broadcast against each other) and returns NumPy arrays, so thousands of
+hall configurations are evaluated in a single call.
+"""
+import numpy as np
+
+from nave import parametros
+
+
+# Geometry rules.
+DISTANCIA_CORREAS = 2
+DISTANCIA_WANDRIEGEL = 2.2
+# Waste factors applied to the weight of pillars and beams.
+FACTOR_PILARES = 1.12
+FACTOR_VIGAS = 1.25
+# Weight of the RD24 bracing (kg/m), unless another bar is given.
+PESO_ARRIOSTRAMIENTO = 3.55
+# Unit rates (€/to) and company overhead factor.
+PRECIO_MATERIAL = 1200
+PRECIO_TALLER = 900
+PRECIO_MONTAJE = 400
+PRECIO_PLANIFICACION = 150
+FACTOR_COSTES_EMPRESA = 0.1
+
+
+def redondear(values, decimales=0) -> np.ndarray:
+    """
+    Rounds like the built-in round() did in the original scalar code.
+    np.round scales by a power of ten first and can land on the other
+    side of a tie, so near-ties are rounded again with round().
+    """
+    values = np.asarray(values, dtype=float)
+    scaled = values * 10.0 ** decimales
+    result = np.round(values, decimales)
+    dudosos = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if dudosos.any():
+        result = np.array(result, ndmin=1)
+        flat = np.array(values, ndmin=1)
+        mask = np.array(dudosos, ndmin=1)
+        result[mask] = [
+            round(value, decimales) for value in flat[mask].tolist()]
+        result = result.reshape(values.shape)
+    return result
+
+
+def faldon(ancho_nave, inclinacion_tejado) -> dict:
+    """
+    Returns the roof geometry (rafter length and purlins) of every
+    configuration, which does not depend on the eave height.
+    """
+    ancho_nave, inclinacion_tejado = np.broadcast_arrays(
+        np.asarray(ancho_nave, dtype=float),
+        np.asarray(inclinacion_tejado, dtype=float))
+    angulo_radianes = np.radians(inclinacion_tejado)
+    largo_riegel = redondear((ancho_nave / 2) / np.cos(angulo_radianes), 2)
+    correas_internas_cantidad = 2 * np.ceil(
+        (largo_riegel - 0.2) / DISTANCIA_CORREAS).astype(int)
+    correas_lado = correas_internas_cantidad // 2
+
+    # Purlin spacing of the Vista superior drawing.
+    espacio_correas = ((ancho_nave - 0.4) / 2) - 0.2 - 1.2
+    line_distance = espacio_correas / correas_lado
+    return {
+        "angulo_radianes": angulo_radianes,
+        "largo_riegel": largo_riegel,
+        "correas_internas_cantidad": correas_internas_cantidad,
+        "correas_lado": correas_lado,
+        "line_distance": line_distance,
+    }
+
+
+def geometria(ancho_nave, altura_alero, inclinacion_tejado) -> dict:
+    """
+    Returns the derived geometry (as computed by Geometry and
+    display_vista_superior) for every configuration.
+    """
+    ancho_nave, altura_alero, inclinacion_tejado = np.broadcast_arrays(
+        np.asarray(ancho_nave, dtype=float),
+        np.asarray(altura_alero, dtype=float),
+        np.asarray(inclinacion_tejado, dtype=float))
+    cantidad_wandriegel = redondear(
+        (altura_alero - 0.4) / DISTANCIA_WANDRIEGEL).astype(int)
+    distancia_real_wandriegel = (altura_alero - 0.4) / cantidad_wandriegel
+    return {
+        **faldon(ancho_nave, inclinacion_tejado),
+        "cantidad_wandriegel": cantidad_wandriegel,
+        "distancia_real_wandriegel": distancia_real_wandriegel,
+        # Rails on each long wall: both ends of every division
+        "filas_wandriegel": cantidad_wandriegel + 1,
+    }
+
+
+def longitud_nave(
+    cantidad_porticos, distancia_porticos_finales,
+    distancia_porticos_internos
+):
+    """Length of the hall, from the first to the last portal frame."""
+    return (
+        np.multiply(distancia_porticos_internos, cantidad_porticos - 3)
+        + np.multiply(2, distancia_porticos_finales))
+
+
+def longitud_arriostramiento(
+    cantidad_porticos, distancia_porticos_finales,
+    distancia_porticos_internos, line_distance
+):
+    """Length of one brace, measured as display_vista_superior does."""
+    last_x = longitud_nave(
+        cantidad_porticos, distancia_porticos_finales,
+        distancia_porticos_internos)
+    x1e = last_x + 0.5
+    x2e = x1e - distancia_porticos_finales - 0.5
+    return redondear(np.hypot(x2e - x1e, line_distance), 2)
+
+
+def arriostramiento(
+    distancia_porticos_finales, ancho_nave, correas_lado, line_distance
+) -> tuple:
+    """
+    Number and total length (m) of the braces, as nave.modelo draws them
+    in Vista superior: at both end bays, a cross between every pair of
+    purlin lines of both roof halves (the eaves pair included) and one
+    cross on each side of the ridge. The bay at the far end is drawn
+    0.5 m wider. The length is rounded to centimeters.
+    """
+    correas_lado = np.asarray(correas_lado)
+    # Distance from the last purlin line to the ridge crosses
+    cumbrera = np.divide(ancho_nave, 2) - 0.4 - correas_lado * line_distance
+    metros = 0.0
+    for ancho_vano in (
+        distancia_porticos_finales, np.add(distancia_porticos_finales, 0.5)
+    ):
+        metros = metros + 4 * (
+            correas_lado * np.hypot(ancho_vano, line_distance)
+            + np.hypot(ancho_vano, cumbrera))
+    return 8 * (correas_lado + 1), redondear(metros, 2)
+
+
+def pesos(
+    cantidad_porticos, distancia_porticos_finales,
+    distancia_porticos_internos, ancho_nave,
+    altura_alero, inclinacion_tejado, pilar_peso_m, viga_peso_m,
+    correa_peso_m=0.0, wandriegel_peso_m=0.0,
+    arriostramiento_peso_m=PESO_ARRIOSTRAMIENTO, **_
+) -> dict:
+    """
+    Returns the geometry and the weights (to) of every configuration.
+    pilar_peso_m and viga_peso_m are the gk [kg/m] of the selected
+    profiles; purlins and wall rails only weigh when their gk is given
+    (see nave.secundarias). Extra keyword arguments are ignored.
+
+    The counts and meters are those nave.modelo draws, in closed form so
+    thousands of halls are quoted without building their models;
+    modelo.pesos measures them on the members of one model instead.
+    """
+    geo = geometria(ancho_nave, altura_alero, inclinacion_tejado)
+    cantidad_porticos = np.asarray(cantidad_porticos)
+    altura_alero = np.asarray(altura_alero, dtype=float)
+    ancho_nave = np.asarray(ancho_nave, dtype=float)
+    cantidad_arriostra, metros_arrios = arriostramiento(
+        distancia_porticos_finales, ancho_nave, geo["correas_lado"],
+        geo["line_distance"])
+
+    # Purlins and wall rails (on both long walls) run the whole hall,
+    # as Vista superior draws them
+    longitud = longitud_nave(
+        cantidad_porticos, distancia_porticos_finales,
+        distancia_porticos_internos)
+    cantidad_correas = (geo["correas_lado"] + 2) * 2
+    return {
+        **geo,
+        **descripcion(
+            cantidad_porticos, distancia_porticos_finales,
+            distancia_porticos_internos, ancho_nave, geo),
+        "cantidad_correas": cantidad_correas,
+        "cantidad_arriostra": cantidad_arriostra,
+        **ponderar(
+            cantidad_porticos * 2 * altura_alero,
+            cantidad_porticos * 2 * geo["largo_riegel"],
+            cantidad_correas * longitud,
+            geo["filas_wandriegel"] * 2 * longitud, metros_arrios,
+            pilar_peso_m, viga_peso_m, correa_peso_m, wandriegel_peso_m,
+            arriostramiento_peso_m),
+    }
+
+
+def descripcion(
+    cantidad_porticos, distancia_porticos_finales,
+    distancia_porticos_internos, ancho_nave, geo
+) -> dict:
+    """
+    The figures of the original text that are not measured: the length
+    of one brace as display_vista_superior measured it, and largo_correas,
+    the purlin lines times the width of the hall.
+    """
+    return {
+        "longitud_arrios": longitud_arriostramiento(
+            cantidad_porticos, distancia_porticos_finales,
+            distancia_porticos_internos, geo["line_distance"]),
+        "largo_correas": (geo["correas_lado"] + 2) * 2 * ancho_nave,
+    }
+
+
+def ponderar(
+    metros_pilares, metros_vigas, metros_correas, metros_wandriegel,
+    metros_arrios, pilar_peso_m, viga_peso_m, correa_peso_m=0.0,
+    wandriegel_peso_m=0.0, arriostramiento_peso_m=PESO_ARRIOSTRAMIENTO
+) -> dict:
+    """
+    Returns the weights (to) of the meters of every member group at their
+    gk [kg/m], with the waste of pillars and beams, and the total.
+    """
+    peso_pilares = redondear(
+        metros_pilares * pilar_peso_m * FACTOR_PILARES / 1000, 2)
+    peso_vigas = redondear(
+        metros_vigas * viga_peso_m * FACTOR_VIGAS / 1000, 2)
+    peso_correas = redondear(metros_correas * correa_peso_m / 1000, 2)
+    peso_wandriegel = redondear(
+        metros_wandriegel * wandriegel_peso_m / 1000, 2)
+    pesos_arrios = redondear(
+        metros_arrios * arriostramiento_peso_m / 1000, 2)
+    pesototal = (
+        pesos_arrios + peso_vigas + peso_pilares + peso_correas
+        + peso_wandriegel)
+    return {
+        "peso_pilares": peso_pilares,
+        "peso_vigas": peso_vigas,
+        "metros_correas": metros_correas,
+        "peso_correas": peso_correas,
+        "metros_wandriegel": metros_wandriegel,
+        "peso_wandriegel": peso_wandriegel,
+        "metros_arrios": metros_arrios,
+        "pesos_arrios": pesos_arrios,
+        "pesototal": pesototal,
+    }
+
+
+def costes(
+    pesototal, precio_mat=PRECIO_MATERIAL, precio_taller=PRECIO_TALLER,
+    precio_monta=PRECIO_MONTAJE, precio_planif=PRECIO_PLANIFICACION,
+    factor_costes_empre=FACTOR_COSTES_EMPRESA, **_
+) -> dict:
+    """
+    Returns the costs (€) of the total weights (to) at the given unit
+    rates (€/to). Extra keyword arguments are ignored.
+    """
+    pesototal = np.asarray(pesototal, dtype=float)
+    costes_material = precio_mat * pesototal
+    costes_taller = precio_taller * pesototal
+    costes_montaje = precio_monta * pesototal
+    costes_planif = precio_planif * pesototal
+    factor_empresa = redondear(
+        factor_costes_empre * (
+            costes_planif + costes_montaje + costes_taller + costes_material))
+    costes_totales = (
+        factor_empresa + costes_planif + costes_montaje
+        + costes_taller + costes_material)
+    costes_portonelada = redondear(costes_totales / pesototal, 2)
+    return {
+        "costes_material": costes_material,
+        "costes_taller": costes_taller,
+        "costes_montaje": costes_montaje,
+        "costes_planif": costes_planif,
+        "factor_empresa": factor_empresa,
+        "costes_totales": costes_totales,
+        "costes_portonelada": costes_portonelada,
+    }
+
+
+def presupuesto(
+    cantidad_porticos, distancia_porticos_finales,
+    distancia_porticos_internos, ancho_nave,
+    altura_alero, inclinacion_tejado, pilar_peso_m, viga_peso_m,
+    precio_mat=PRECIO_MATERIAL, precio_taller=PRECIO_TALLER,
+    precio_monta=PRECIO_MONTAJE, precio_planif=PRECIO_PLANIFICACION,
+    factor_costes_empre=FACTOR_COSTES_EMPRESA, correa_peso_m=0.0,
+    wandriegel_peso_m=0.0, arriostramiento_peso_m=PESO_ARRIOSTRAMIENTO, **_
+) -> dict:
+    """
+    Returns weights (to) and costs (€) of every configuration. pilar_peso_m
+    and viga_peso_m are the gk [kg/m] of the selected profiles, and the
+    secondary members those of pesos(). Extra keyword arguments (e.g. the
+    other UserInputs fields) are ignored.
+    """
+    quote = pesos(
+        cantidad_porticos, distancia_porticos_finales,
+        distancia_porticos_internos, ancho_nave, altura_alero,
+        inclinacion_tejado, pilar_peso_m, viga_peso_m, correa_peso_m,
+        wandriegel_peso_m, arriostramiento_peso_m)
+    return {**quote, **costes(
+        quote["pesototal"], precio_mat, precio_taller, precio_monta,
+        precio_planif, factor_costes_empre)}
+
+
+def barrido(pilar_peso_m, viga_peso_m, **rangos) -> dict:
+    """
+    Evaluates the full grid of the given parameter ranges in one call.
+    Parameters without a range take their default value; a range of True
+    means every value its widget allows. Returns the flattened parameter
+    columns together with the results, e.g.
+
+        barrido(45.0, 42.2, ancho_nave=True, inclinacion_tejado=True)
+    """
+    valores = parametros.valores_por_defecto()
+    ejes = {}
+    for name, values in rangos.items():
+        if name not in valores:
+            raise ValueError(f"Parámetro desconocido: {name}")
+        ejes[name] = parametros.rango(name) if values is True else values
+    # Profile weights can be swept as well.
+    pesos = {"pilar_peso_m": pilar_peso_m, "viga_peso_m": viga_peso_m}
+    for name, values in pesos.items():
+        if np.ndim(values):
+            ejes[name] = values
+    columnas = {**valores, **pesos}
+    if ejes:
+        grid = np.meshgrid(
+            *(np.asarray(values) for values in ejes.values()), indexing="ij")
+        for name, values in zip(ejes, grid):
+            columnas[name] = values.ravel()
+    return {**columnas, **presupuesto(**columnas)}
+
@@ -0,0 +1,182 @@
+"""
+Monte Carlo analysis of the unit rates of a quote.
+
+Every unit rate (€/to) and the company overhead factor of the quote
+engine can be given a distribution instead of a single value. The cost
+of a hall is linear in its weight, total = pesototal * (1 + factor) *
+(sum of the rates), so the scenarios are sampled once as a cost per tonne
+and the percentiles of any number of halls are those of the cost per
+tonne scaled by their weight. A million scenarios take a few tenths of a
+second, whatever the size of the batch.
+
+    python -m nave.riesgo naves.csv -o riesgo.csv --variacion 0.15
+
+The engine rounds the overhead to whole euros; the scenarios do not, so
+their totals may differ from the quote by less than one euro.
+"""
+import argparse
+import csv
+import sys
+
+import numpy as np
+
+from nave import presupuesto
+
+
+MUESTRAS = 1_000_000
+PERCENTILES = (10, 50, 90)
+# Rate arguments of presupuesto.costes and their deterministic values.
+TASAS = {
+    "precio_mat": presupuesto.PRECIO_MATERIAL,
+    "precio_taller": presupuesto.PRECIO_TALLER,
+    "precio_monta": presupuesto.PRECIO_MONTAJE,
+    "precio_planif": presupuesto.PRECIO_PLANIFICACION,
+    "factor_costes_empre": presupuesto.FACTOR_COSTES_EMPRESA,
+}
+# Distributions the rates can follow and their parameters.
+TIPOS = {
+    "fijo": ("valor",),
+    "uniforme": ("minimo", "maximo"),
+    "triangular": ("minimo", "moda", "maximo"),
+    "normal": ("media", "desviacion"),
+}
+VARIACION = 0.15
+
+
+def distribuciones(tasas=None, variacion=VARIACION, tipo="triangular"):
+    """
+    Returns a distribution of every rate around its value (the defaults
+    of the engine unless given in tasas) with a relative spread of
+    variacion: the bounds of uniform and triangular distributions, or the
+    standard deviation of normal ones.
+    """
+    tasas = {**TASAS, **(tasas or {})}
+    resultado = {}
+    for name, value in tasas.items():
+        low, high = value * (1 - variacion), value * (1 + variacion)
+        if tipo == "triangular":
+            resultado[name] = ("triangular", low, value, high)
+        elif tipo == "uniforme":
+            resultado[name] = ("uniforme", low, high)
+        elif tipo == "normal":
+            resultado[name] = ("normal", value, value * variacion)
+        else:
+            raise ValueError(f"Distribución desconocida: {tipo}")
+    return resultado
+
+
+def _muestras(rng, distribucion, muestras) -> np.ndarray:
+    if np.isscalar(distribucion):
+        distribucion = ("fijo", distribucion)
+    tipo, *params = distribucion
+    if tipo not in TIPOS or len(params) != len(TIPOS[tipo]):
+        raise ValueError(f"Distribución no válida: {distribucion}")
+    if tipo == "fijo":
+        return np.full(muestras, float(params[0]))
+    if tipo == "uniforme":
+        return rng.uniform(params[0], params[1], muestras)
+    if tipo == "triangular":
+        low, mode, high = params
+        if low == high:
+            return np.full(muestras, float(mode))
+        return rng.triangular(low, mode, high, muestras)
+    return rng.normal(params[0], params[1], muestras)
+
+
+def portonelada(distribuciones=None, muestras=MUESTRAS, semilla=None):
+    """
+    Samples the cost per tonne (€/to) of muestras price scenarios. Rates
+    missing in distribuciones keep the value of the engine; a rate may
+    also be given as a plain number.
+    """
+    rng = np.random.default_rng(semilla)
+    distribuciones = {**TASAS, **(distribuciones or {})}
+    unknown = distribuciones.keys() - TASAS.keys()
+    if unknown:
+        raise ValueError(f"Tasas desconocidas: {', '.join(sorted(unknown))}")
+    suma = np.zeros(muestras)
+    for name in TASAS:
+        if name != "factor_costes_empre":
+            suma += _muestras(rng, distribuciones[name], muestras)
+    factor = _muestras(rng, distribuciones["factor_costes_empre"], muestras)
+    suma *= 1 + factor
+    return suma
+
+
+def analizar(
+    pesototal, distribuciones=None, muestras=MUESTRAS, semilla=None,
+    percentiles=PERCENTILES
+) -> dict:
+    """
+    Returns the percentiles of the cost per tonne (€/to) and of the total
+    cost (€) of one hall or an array of halls of the given weights (to).
+    The last axis of both arrays runs over percentiles.
+    """
+    por_tonelada = np.percentile(
+        portonelada(distribuciones, muestras, semilla), percentiles)
+    pesototal = np.asarray(pesototal, dtype=float)
+    return {
+        "percentiles": np.asarray(percentiles),
+        "costes_portonelada": por_tonelada,
+        "costes_totales": pesototal[..., np.newaxis] * por_tonelada,
+    }
+
+
+def main(argv=None) -> None:
+    """Entry point of the command line."""
+    from nave import lote
+
+    parser = argparse.ArgumentParser(
+        prog="python -m nave.riesgo",
+        description="Percentiles de los costes de las naves de un CSV o "
+                    "JSONL con precios inciertos.")
+    parser.add_argument("entrada", help="Fichero .csv o .jsonl de naves")
+    parser.add_argument(
+        "-o", "--salida", help="Fichero .csv (por defecto stdout)")
+    parser.add_argument(
+        "--variacion", type=float, default=VARIACION,
+        help="Variación relativa de los precios (por defecto 0.15)")
+    parser.add_argument(
+        "--distribucion", default="triangular",
+        choices=tuple(tipo for tipo in TIPOS if tipo != "fijo"),
+        help="Distribución de los precios")
+    parser.add_argument(
+        "--muestras", type=int, default=MUESTRAS,
+        help="Escenarios de precios simulados")
+    parser.add_argument("--semilla", type=int, default=None)
+    parser.add_argument(
+        "-w", "--workers", type=int, default=None,
+        help="Procesos de cálculo (por defecto, uno por núcleo)")
+    args = parser.parse_args(argv)
+
+    analisis = analizar(
+        1.0, distribuciones(variacion=args.variacion,
+                            tipo=args.distribucion),
+        args.muestras, args.semilla)
+    campos = [
+        f"{name}_p{p}" for name in ("costes_totales", "costes_portonelada")
+        for p in PERCENTILES]
+    file = (open(args.salida, "w", encoding="utf-8", newline="")
+            if args.salida else sys.stdout)
+    try:
+        writer = None
+        for row in lote.procesar(lote.leer_filas(args.entrada), args.workers):
+            if writer is None:
+                writer = csv.DictWriter(
+                    file, [*lote.campos_csv(row), *campos],
+                    extrasaction="ignore", lineterminator="\n")
+                writer.writeheader()
+            if "pesototal" in row:
+                # The percentiles of one tonne, scaled by the weight
+                totales = row["pesototal"] * analisis["costes_totales"]
+                row.update(zip(campos, [
+                    *np.round(totales, 2).tolist(),
+                    *np.round(analisis["costes_portonelada"], 2).tolist()]))
+            writer.writerow(row)
+    finally:
+        if args.salida:
+            file.close()
+
+
+if __name__ == "__main__":
+    main()
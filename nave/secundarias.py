@@ -0,0 +1,96 @@
+"""
+Catalog-driven sizing of the secondary members.
+
+Purlins and wall rails are taken from the channel (U, UPE) and square
+hollow section (QR) families, and the roof bracing from the round bars of
+"RD - Profile", instead of being left out of the weight or fixed to RD24.
+Every member is the lightest profile of its families reaching the
+requirement of a simplified check, with the loads of nave.optimizador:
+
+    correas      roof load on the purlin spacing, single span between
+                 frames, M = q·a·s²/8 over Wel,y·fy
+    wandriegel   wind load on the rail spacing, same span and check
+    arriostra    gable wind at eaves level carried by the end-bay bracing
+                 of each roof side, tension in one diagonal over A·fy
+
+The spacings are those of the quote geometry, so every argument may be an
+array of halls and the result is one profile per hall. The quote engine
+takes the returned kg/m (correa_peso_m, wandriegel_peso_m and
+arriostramiento_peso_m) into the total weight and cost.
+"""
+import numpy as np
+
+from nave import optimizador, presupuesto
+
+
+# Families every secondary member is chosen from.
+FAMILIAS_CORREA = ("Perfiles en U", "UPE", "QR-Kalt", "QR-Warm")
+FAMILIAS_WANDRIEGEL = FAMILIAS_CORREA
+FAMILIAS_ARRIOSTRAMIENTO = ("RD - Profile",)
+COLUMNA_AREA = "Querschnittsfläche _\nA [cm²]"
+# Characteristic wind pressure on the walls (kN/m²).
+CARGA_VIENTO = 0.8
+# Smallest bracing bar (RD12, cm²), thinner ones can not be pretensioned.
+AREA_MINIMA_ARRIOSTRAMIENTO = 1.13
+
+
+def tablas(dfs: dict) -> dict:
+    """Merged profile tables of every secondary member, by member."""
+    return {
+        "correa": optimizador.TablaPerfiles(dfs, FAMILIAS_CORREA),
+        "wandriegel": optimizador.TablaPerfiles(dfs, FAMILIAS_WANDRIEGEL),
+        "arriostramiento": optimizador.TablaPerfiles(
+            dfs, FAMILIAS_ARRIOSTRAMIENTO, COLUMNA_AREA),
+    }
+
+
+def requisitos(
+    cantidad_porticos, distancia_porticos_finales,
+    distancia_porticos_internos, ancho_nave, altura_alero,
+    inclinacion_tejado, carga=optimizador.CARGA_CUBIERTA,
+    viento=CARGA_VIENTO, **_
+) -> dict:
+    """
+    Required Wel,y (cm³) of purlins and wall rails and area (cm²) of the
+    bracing bars of every configuration.
+    """
+    geo = presupuesto.geometria(ancho_nave, altura_alero, inclinacion_tejado)
+    gamma = optimizador.COEFICIENTE_CARGAS
+    fy = optimizador.LIMITE_ELASTICO
+    vano = np.maximum(distancia_porticos_finales, distancia_porticos_internos)
+    momento_correa = gamma * carga * geo["line_distance"] * vano ** 2 / 8
+    momento_wandriegel = (
+        gamma * viento * geo["distancia_real_wandriegel"] * vano ** 2 / 8)
+
+    # Half of the gable load reaches the eaves; each roof side's bracing
+    # takes half of it, as shear carried by one diagonal per cross.
+    cortante = gamma * viento * np.multiply(ancho_nave, altura_alero) / 8
+    diagonal = presupuesto.longitud_arriostramiento(
+        cantidad_porticos, distancia_porticos_finales,
+        distancia_porticos_internos, geo["line_distance"])
+    axil = cortante * diagonal / np.asarray(distancia_porticos_finales)
+    return {
+        "correa": momento_correa * 1000 / fy,
+        "wandriegel": momento_wandriegel * 1000 / fy,
+        # kN over MPa, in cm²
+        "arriostramiento": np.maximum(
+            axil * 10 / fy, AREA_MINIMA_ARRIOSTRAMIENTO),
+    }
+
+
+def dimensionar(tablas: dict, **args) -> dict:
+    """
+    Returns the lightest profile of every secondary member for the engine
+    arguments in args: perfil_<member> names ("" where nothing reaches the
+    requirement) and <member>_peso_m gk [kg/m] (NaN there).
+    """
+    resultado = {}
+    for miembro, requerido in requisitos(**args).items():
+        tabla = tablas[miembro]
+        index = tabla.mas_ligero(requerido)
+        validos = index >= 0
+        resultado[f"perfil_{miembro}"] = np.where(
+            validos, tabla.perfil[index], "")
+        resultado[f"{miembro}_peso_m"] = np.where(
+            validos, tabla.gk[index], np.nan)
+    return resultado
@@ -0,0 +1,470 @@
+"""
+Local JSON quoting service.
+
+An ASGI application (app) that answers the same calculations as the
+calculator page for other programs, e.g. the ERP or the CRM:
+
+    GET  /salud          state and counters of the worker
+    POST /geometria      derived geometry of the hall
+    POST /listado        bill of materials lines
+    POST /presupuesto    weights and costs, secondary members included
+
+The parameters are those of a row of nave.lote (the UserInputs fields,
+perfil_pilar/perfil_viga or their kg/m, and optionally the unit rates),
+given as a JSON object or in the query string. They are validated and
+normalized into a key, so requests that differ only in spelling (e.g.
+"IPE 300" and "ipe300", or a missing field and its default) share it:
+
+  * a bounded cache keeps the encoded response of the latest keys;
+  * identical requests in flight wait for the same result;
+  * the distinct requests that arrive in the same turn of the event loop
+    are quoted together in one vectorized call of the engine.
+
+The catalog is loaded once, before the workers are forked, so they all
+share the same read-only pages. It runs with the standard library, or
+with uvicorn if it is installed:
+
+    python -m nave.servicio --port 8000 --workers 4
+    python -m nave.servicio --uvicorn --workers 4
+
+python -m nave.carga measures the throughput of a running service.
+"""
+import argparse
+import asyncio
+import http
+import json
+import logging
+import math
+import os
+import signal
+import socket
+import sys
+import urllib.parse
+
+import numpy as np
+
+from nave import (
+    buscador, catalogo, grafo, listado, lote, parametros, presupuesto,
+    riesgo, secundarias)
+
+
+# Responses kept by the cache of every worker.
+TAMANO_CACHE = 4096
+RUTAS = ("geometria", "listado", "presupuesto")
+# Largest request body accepted (bytes).
+MAXIMO_CUERPO = 64 * 1024
+
+# Catalog tables of the process, set by preparar before forking.
+_catalogo = {}
+_cache = grafo.Memo(TAMANO_CACHE)
+# Future of every key being computed, by key.
+_en_curso = {}
+_contadores = {
+    "peticiones": 0, "cache": 0, "agrupadas": 0, "calculadas": 0,
+    "lotes": 0, "errores": 0}
+_log = logging.getLogger(__name__)
+
+
+class ErrorPeticion(ValueError):
+    """A request the service can not answer, with its HTTP status."""
+
+    def __init__(self, mensaje, status=400) -> None:
+        super().__init__(mensaje)
+        self.status = status
+
+
+def preparar(db_folder=catalogo.DB_FOLDER) -> None:
+    """Loads the profile tables the service quotes with."""
+    if _catalogo:
+        return
+    dfs = catalogo.load_catalog(db_folder)
+    nombres = {}
+    for familia in catalogo.FAMILIAS_PORTICO:
+        for name in dfs[f"{familia}.xlsx"]["Perfil"]:
+            if isinstance(name, str):
+                nombres.setdefault(buscador.normalize(name), name)
+    _catalogo.update(
+        pesos=lote.tabla_pesos(dfs), nombres=nombres,
+        tablas=secundarias.tablas(dfs))
+
+
+def normalizar(peticion: dict, ruta="presupuesto") -> tuple:
+    """
+    Returns the sorted (name, value) pairs of the engine arguments of a
+    request; the geometry only takes the hall parameters. Raises
+    ErrorPeticion if a value is missing, unknown or out of bounds.
+    """
+    if not isinstance(peticion, dict):
+        raise ErrorPeticion("Se espera un objeto JSON")
+    if ruta == "geometria":
+        try:
+            args = lote.parsear(
+                {**peticion, "pilar_peso_m": 0, "viga_peso_m": 0}, {})
+        except (TypeError, ValueError) as error:
+            raise ErrorPeticion(str(error)) from None
+        return tuple(
+            (name, value) for name, value in sorted(args.items())
+            if name in parametros.LIMITES)
+    try:
+        args = lote.parsear(peticion, _catalogo["pesos"])
+        for name in riesgo.TASAS:
+            value = peticion.get(name)
+            if value is not None and value != "":
+                args[name] = float(value)
+                if not (math.isfinite(args[name]) and args[name] >= 0):
+                    raise ValueError(f"{name} fuera de rango: {value}")
+    except (TypeError, ValueError) as error:
+        raise ErrorPeticion(str(error)) from None
+    for miembro in ("pilar", "viga"):
+        perfil = peticion.get(f"perfil_{miembro}")
+        if perfil and f"{miembro}_peso_m" not in peticion:
+            args[f"perfil_{miembro}"] = _catalogo["nombres"].get(
+                buscador.normalize(perfil), perfil)
+    return tuple(sorted(args.items()))
+
+
+def _columnas(claves: list, secundarios=True) -> dict:
+    """
+    Engine arguments of several normalized keys as arrays, with the
+    secondary members sized from the catalog if secundarios is set.
+    """
+    filas = [dict(clave) for clave in claves]
+    columnas = {}
+    for name in set().union(*filas):
+        values = [fila.get(name) for fila in filas]
+        if name.startswith("perfil_"):
+            columnas[name] = np.array(
+                [value or "" for value in values], dtype=object)
+        elif name in riesgo.TASAS:
+            columnas[name] = np.array([
+                riesgo.TASAS[name] if value is None else value
+                for value in values])
+        else:
+            columnas[name] = np.array(values)
+    if secundarios:
+        columnas.update(
+            secundarias.dimensionar(_catalogo["tablas"], **columnas))
+    return columnas
+
+
+def _por_nave(valores: dict, count) -> list:
+    """
+    Splits a dict of arrays into one dict of Python values per hall, with
+    None for NaN (a hall no catalog profile can carry), which JSON lacks.
+    """
+    columnas = {
+        name: [
+            None if value != value else value
+            for value in np.broadcast_to(values, (count,)).tolist()]
+        for name, values in valores.items()}
+    return [
+        {name: values[i] for name, values in columnas.items()}
+        for i in range(count)]
+
+
+def calcular(ruta, claves: list) -> list:
+    """Results of one route for several normalized keys, in one call."""
+    columnas = _columnas(claves, secundarios=ruta != "geometria")
+    count = len(claves)
+    if ruta == "geometria":
+        valores = presupuesto.geometria(
+            columnas["ancho_nave"], columnas["altura_alero"],
+            columnas["inclinacion_tejado"])
+        valores["longitud_nave"] = presupuesto.longitud_nave(
+            columnas["cantidad_porticos"],
+            columnas["distancia_porticos_finales"],
+            columnas["distancia_porticos_internos"])
+        return _por_nave(valores, count)
+    if ruta == "presupuesto":
+        quote = presupuesto.presupuesto(**columnas)
+        perfiles = {
+            name: value for name, value in columnas.items()
+            if name.startswith("perfil_") or name.endswith("_peso_m")}
+        return _por_nave({**perfiles, **quote}, count)
+    lineas = list(listado.filas(listado.partidas(columnas)))
+    por_nave = len(listado.PARTIDAS) + 1
+    return [
+        {"columnas": listado.COLUMNAS,
+         "lineas": lineas[i * por_nave:(i + 1) * por_nave]}
+        for i in range(count)]
+
+
+def _codificar(value) -> bytes:
+    return json.dumps(
+        value, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class Agrupador:
+    """
+    Collects the keys asked for during one turn of the event loop and
+    computes them per route in a single call.
+    """
+
+    def __init__(self) -> None:
+        self.pendientes = {}
+
+    def pedir(self, ruta, clave) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        if not self.pendientes:
+            loop.call_soon(self.vaciar)
+        future = loop.create_future()
+        self.pendientes.setdefault(ruta, []).append((clave, future))
+        return future
+
+    def vaciar(self) -> None:
+        pendientes, self.pendientes = self.pendientes, {}
+        for ruta, pedidos in pendientes.items():
+            _contadores["lotes"] += 1
+            _contadores["calculadas"] += len(pedidos)
+            try:
+                resultados = calcular(ruta, [clave for clave, _ in pedidos])
+            except Exception as error:
+                for _, future in pedidos:
+                    future.set_exception(error)
+                continue
+            for (clave, future), resultado in zip(pedidos, resultados):
+                payload = _codificar(resultado)
+                _cache.put((ruta, clave), payload)
+                future.set_result(payload)
+
+
+_agrupador = Agrupador()
+
+
+async def responder(method, path, query_string, body) -> tuple:
+    """Returns the status and the encoded JSON body of a request."""
+    _contadores["peticiones"] += 1
+    ruta = path.strip("/")
+    if ruta == "salud":
+        return 200, _codificar({
+            "estado": "ok", "pid": os.getpid(),
+            "perfiles": len(_catalogo.get("pesos", ())),
+            "en_cache": len(_cache.entradas), **_contadores})
+    if ruta not in RUTAS:
+        raise ErrorPeticion(f"Ruta desconocida: {path}", 404)
+    if method == "POST":
+        try:
+            peticion = json.loads(body or b"{}")
+        except ValueError:
+            raise ErrorPeticion("JSON no válido") from None
+    elif method == "GET":
+        peticion = dict(urllib.parse.parse_qsl(query_string.decode()))
+    else:
+        raise ErrorPeticion(f"Método no permitido: {method}", 405)
+    clave = normalizar(peticion, ruta)
+
+    payload = _cache.get((ruta, clave))
+    if payload is not None:
+        _contadores["cache"] += 1
+        return 200, payload
+    future = _en_curso.get((ruta, clave))
+    if future is None:
+        future = _agrupador.pedir(ruta, clave)
+        _en_curso[ruta, clave] = future
+        future.add_done_callback(
+            lambda _: _en_curso.pop((ruta, clave), None))
+    else:
+        _contadores["agrupadas"] += 1
+    # A client that goes away does not cancel the others' result
+    return 200, await asyncio.shield(future)
+
+
+async def app(scope, receive, send) -> None:
+    """The ASGI application."""
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                preparar()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+    if scope["type"] != "http":
+        return
+    body = b""
+    more = True
+    while more:
+        message = await receive()
+        body += message.get("body", b"")
+        more = message.get("more_body", False)
+    preparar()
+    try:
+        status, payload = await responder(
+            scope["method"], scope["path"], scope.get("query_string", b""),
+            body)
+    except ErrorPeticion as error:
+        _contadores["errores"] += 1
+        status, payload = error.status, _codificar({"error": str(error)})
+    except Exception:
+        _contadores["errores"] += 1
+        # The details stay in the log of the server
+        _log.exception("Error en %s %s", scope["method"], scope["path"])
+        status, payload = 500, _codificar({"error": "Error interno"})
+    await send({
+        "type": "http.response.start", "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(payload)).encode())]})
+    await send({"type": "http.response.body", "body": payload})
+
+
+def _respuesta(status, headers, body, cerrar) -> bytes:
+    """The bytes of an HTTP/1.1 response."""
+    status = http.HTTPStatus(status)
+    return b"".join((
+        f"HTTP/1.1 {status.value} {status.phrase}\r\n".encode(),
+        *(name + b": " + value + b"\r\n" for name, value in headers),
+        b"connection: close\r\n\r\n" if cerrar
+        else b"connection: keep-alive\r\n\r\n",
+        body))
+
+
+async def _rechazar(writer, status, mensaje) -> None:
+    """Answers a request that can not be read, before closing."""
+    _contadores["errores"] += 1
+    payload = _codificar({"error": mensaje})
+    writer.write(_respuesta(status, (
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(payload)).encode())), payload, True))
+    await writer.drain()
+
+
+async def _conexion(reader, writer) -> None:
+    """Serves the HTTP/1.1 requests of one keep-alive connection."""
+    try:
+        while True:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, ConnectionError):
+                return
+            except asyncio.LimitOverrunError:
+                await _rechazar(writer, 431, "Cabeceras demasiado largas")
+                return
+            lines = head.decode("latin-1").split("\r\n")
+            headers = []
+            for line in lines[1:]:
+                if line:
+                    name, _, value = line.partition(":")
+                    headers.append(
+                        (name.strip().lower().encode(),
+                         value.strip().encode("latin-1")))
+            campos = dict(headers)
+            try:
+                method, target, version = lines[0].split(" ")
+                length = int(campos.get(b"content-length", 0))
+                if length < 0:
+                    raise ValueError(length)
+            except ValueError:
+                await _rechazar(writer, 400, "Petición HTTP no válida")
+                return
+            if b"transfer-encoding" in campos:
+                # Only bodies with a Content-Length are read
+                await _rechazar(
+                    writer, 411, "Se requiere Content-Length")
+                return
+            if length > MAXIMO_CUERPO:
+                await _rechazar(
+                    writer, 413,
+                    f"El cuerpo supera el máximo de {MAXIMO_CUERPO} bytes")
+                return
+            body = await reader.readexactly(length) if length else b""
+            path, _, query = target.partition("?")
+            scope = {
+                "type": "http", "asgi": {"version": "3.0"},
+                "http_version": version.split("/")[-1], "method": method,
+                "path": urllib.parse.unquote(path), "raw_path": path.encode(),
+                "query_string": query.encode(), "headers": headers}
+            respuesta = []
+
+            async def receive():
+                return {"type": "http.request", "body": body}
+
+            async def send(message):
+                respuesta.append(message)
+
+            await app(scope, receive, send)
+            start, cuerpo = respuesta
+            cerrar = (campos.get(b"connection", b"").lower() == b"close"
+                      or version == "HTTP/1.0")
+            writer.write(_respuesta(
+                start["status"], start["headers"], cuerpo["body"], cerrar))
+            await writer.drain()
+            if cerrar:
+                return
+    finally:
+        writer.close()
+
+
+def _trabajador(sock) -> None:
+    async def servir():
+        server = await asyncio.start_server(_conexion, sock=sock)
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(servir())
+    except KeyboardInterrupt:
+        pass
+
+
+def servir(host="127.0.0.1", port=8000, workers=1, db_folder=None) -> None:
+    """
+    Serves the application with the standard library: the catalog is
+    loaded and the socket opened once, then workers - 1 copies of the
+    process are forked to accept on the same socket.
+    """
+    preparar(db_folder or catalogo.DB_FOLDER)
+    sock = socket.create_server((host, port), backlog=1024)
+    if not hasattr(os, "fork"):
+        workers = 1
+    hijos = []
+    for _ in range(workers - 1):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                _trabajador(sock)
+            finally:
+                os._exit(0)
+        hijos.append(pid)
+    print(f"Sirviendo en http://{host}:{port} con {workers} procesos",
+          flush=True)
+    # Stopping the parent stops the workers too
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        _trabajador(sock)
+    finally:
+        for pid in hijos:
+            os.kill(pid, signal.SIGTERM)
+        sock.close()
+
+
+def main(argv=None) -> None:
+    """Entry point of the command line."""
+    parser = argparse.ArgumentParser(
+        prog="python -m nave.servicio",
+        description="Servicio local de presupuestos en JSON.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "-w", "--workers", type=int, default=1, help="Procesos del servidor")
+    parser.add_argument(
+        "--uvicorn", action="store_true",
+        help="Servir con uvicorn (debe estar instalado)")
+    args = parser.parse_args(argv)
+    if args.uvicorn:
+        try:
+            import uvicorn
+        except ImportError:
+            parser.error("uvicorn no está instalado")
+        # Compiles the catalog once, so the workers only read it
+        catalogo.load_catalog()
+        uvicorn.run(
+            "nave.servicio:app", host=args.host, port=args.port,
+            workers=args.workers, log_level="warning")
+        return
+    servir(args.host, args.port, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+"""
+Load test of the pages with simulated Streamlit sessions.
+
+Runs the pages as the Streamlit server schedules them: one process with a
+thread per session, every rerun executing the whole script. Each session
+follows a random but realistic sequence of widget changes (dragging a
+slider through several values, typing a dimension, changing a profile,
+switching the family or typing a search) with a pause between reruns.
+Streamlit is replaced by the stub of nave.benchmark, one instance per
+session, so it runs headless and without a browser.
+
+Reports the latency percentiles and CPU time of the reruns of every page,
+the CPU use of the process and the growth of its resident memory per
+session:
+
+    python -m nave.sesiones --sesiones 20 --reruns 30
+    python -m nave.sesiones --sesiones 50 --pagina base_de_datos --pausa 0
+
+What it measures is the cost of the scripts themselves under concurrent
+sessions: the compute of every rerun, the contention of the threads for
+the interpreter lock and the shared caches, and the memory the sessions
+keep. It does not go through a Streamlit server. The script runner, the
+serialization of the deltas, the websocket, the browser and the network
+are not measured; a server does that work on top, so the figures are an
+upper bound of how many concurrent users one server process handles.
+Measuring that needs real clients of a `streamlit run` server.
+
+Memory is read from /proc, so it runs on Linux only. The growth includes
+what the allocator keeps after the bounded caches fill up, mostly in the
+per-thread arenas of glibc; MALLOC_ARENA_MAX=2 reduces it, as it does for
+the Streamlit server.
+"""
+import argparse
+import gc
+import json
+import sys
+import threading
+import time
+import types
+import typing
+
+import numpy as np
+
+from nave import benchmark, catalogo, parametros
+
+
+SESIONES = 10
+RERUNS = 20
+# Seconds a user waits between two widget changes.
+PAUSA = 0.2
+PERCENTILES = (50, 90, 99)
+PAGINAS = {
+    "calculadora": benchmark.CALCULADORA,
+    "base_de_datos": benchmark.BASE_DE_DATOS,
+}
+# Labels of the widgets the sessions change.
+ETIQUETAS = {
+    "cantidad_porticos": "Cantidad de pórticos",
+    "distancia_porticos_finales":
+        "Distancia entre los pórticos finales (metros)",
+    "distancia_porticos_internos":
+        "Distancia entre los pórticos internos (metros)",
+    "ancho_nave": "Ancho nave (metros)",
+    "altura_alero": "Altura del alero (metros)",
+    "inclinacion_tejado": "Inclinación del tejado (grados)",
+}
+DESLIZADORES = ("cantidad_porticos", "inclinacion_tejado")
+ETIQUETAS_PERFIL = {
+    "pilar": ("Selecciona el tipo de perfil",
+              "Seleccionar perfil para los pilares"),
+    "viga": ("Selecciona el tipo de perfil para las vigas",
+             "Seleccionar perfil"),
+}
+ETIQUETA_FAMILIA = "Selecciona el tipo de perfil"
+ETIQUETA_TODAS = "Filtrar en todas las familias"
+ETIQUETA_COLUMNAS = "Mostrar todas las columnas"
+BUSQUEDAS = ("IPE", "hea 3", "QR25", "upe 1", "RD", "HEB 2", "ro 60", "x")
+# Most values a slider passes through in one drag.
+ARRASTRE = 5
+
+# Widgets of the session running in each thread.
+_local = threading.local()
+
+
+def instalar_stub() -> None:
+    """
+    Replaces the streamlit module with one whose calls go to the Widgets
+    of the session running in the calling thread.
+    """
+    modulo = types.ModuleType("streamlit")
+    modulo.__getattr__ = lambda name: getattr(_local.widgets, name)
+    sys.modules["streamlit"] = modulo
+
+
+def _arrastrar(valores, name, rng) -> list:
+    """Widget values of a slider dragged from its value to a random one."""
+    etiqueta = ETIQUETAS[name]
+    rango = parametros.rango(name)
+    actual = valores.get(etiqueta, parametros.LIMITES[name]["value"])
+    inicio = rango.index(actual) if actual in rango else 0
+    fin = int(rng.integers(len(rango)))
+    paso = 1 if fin >= inicio else -1
+    recorrido = rango[inicio + paso:fin + paso:paso] or [rango[fin]]
+    # A drag reports a few of the values it passes
+    elegidos = np.linspace(
+        0, len(recorrido) - 1, min(len(recorrido), ARRASTRE)).round()
+    return [{etiqueta: recorrido[int(i)]} for i in elegidos]
+
+
+def pasos_calculadora(rng, dfs) -> "typing.Iterator[dict]":
+    """Endless widget changes of a calculator session."""
+    valores = {}
+    while True:
+        accion = rng.choice(("deslizar", "numero", "perfil"), p=(.4, .3, .3))
+        if accion == "deslizar":
+            cambios = _arrastrar(valores, rng.choice(DESLIZADORES), rng)
+        elif accion == "numero":
+            name = rng.choice(
+                [name for name in ETIQUETAS if name not in DESLIZADORES])
+            cambios = [{
+                ETIQUETAS[name]: rng.choice(parametros.rango(name)).item()}]
+        else:
+            familia = str(rng.choice(catalogo.FAMILIAS_PORTICO))
+            perfiles = dfs[f"{familia}.xlsx"]["Perfil"].tolist()
+            etiquetas = ETIQUETAS_PERFIL[rng.choice(tuple(ETIQUETAS_PERFIL))]
+            cambios = [dict(zip(etiquetas, (
+                familia, perfiles[rng.integers(len(perfiles))])))]
+        for cambio in cambios:
+            valores.update(cambio)
+            yield cambio
+
+
+def pasos_base_de_datos(rng, dfs) -> "typing.Iterator[dict]":
+    """Endless widget changes of a database session."""
+    familias = [name.replace(".xlsx", "") for name in dfs]
+    todas = columnas = False
+    while True:
+        accion = rng.choice(
+            ("buscar", "familia", "todas", "columnas"), p=(.5, .3, .1, .1))
+        if accion == "buscar":
+            yield {benchmark.ETIQUETA_BUSQUEDA: str(rng.choice(BUSQUEDAS))}
+        elif accion == "familia":
+            yield {ETIQUETA_FAMILIA: str(rng.choice(familias))}
+        elif accion == "todas":
+            todas = not todas
+            yield {ETIQUETA_TODAS: todas}
+        else:
+            columnas = not columnas
+            yield {ETIQUETA_COLUMNAS: columnas}
+
+
+PASOS = {
+    "calculadora": pasos_calculadora,
+    "base_de_datos": pasos_base_de_datos,
+}
+
+
+class Sesion:
+    """A browser tab: its widgets, session state and measurements."""
+
+    def __init__(self, pagina, pasos) -> None:
+        self.pagina = pagina
+        self.pasos = pasos
+        self.widgets = benchmark.Widgets({})
+        self.latencias = []
+        self.cpu = []
+        self.errores = []
+
+    def rerun(self, codigo) -> None:
+        """Runs the page script once with the current widget values."""
+        _local.widgets = self.widgets
+        # Only the last rerun's calls are kept
+        del self.widgets.llamadas[:]
+        inicio = time.perf_counter()
+        cpu = time.thread_time()
+        try:
+            exec(codigo, {
+                "__name__": "__main__",
+                "__file__": str(PAGINAS[self.pagina])})
+        except Exception as error:
+            self.errores.append(f"{type(error).__name__}: {error}")
+        self.cpu.append(time.thread_time() - cpu)
+        self.latencias.append(time.perf_counter() - inicio)
+
+    def ejecutar(self, codigo, reruns, pausa, espera=0.0) -> None:
+        """Opens the page and reruns it after every widget change."""
+        time.sleep(espera)
+        self.rerun(codigo)
+        for cambio in self.pasos:
+            if len(self.latencias) >= reruns:
+                break
+            time.sleep(pausa)
+            self.widgets.valores.update(cambio)
+            self.rerun(codigo)
+
+
+def compilar(pagina):
+    """Compiles a page once, as the Streamlit script runner does."""
+    path = PAGINAS[pagina]
+    return compile(path.read_text(encoding="utf-8"), str(path), "exec")
+
+
+def rss_kb() -> int:
+    """Resident memory of the process."""
+    with open("/proc/self/status") as file:
+        for line in file:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    raise OSError("VmRSS no disponible")
+
+
+def _pico_kb() -> int:
+    with open("/proc/self/status") as file:
+        for line in file:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+    return 0
+
+
+def _figuras() -> int:
+    pyplot = sys.modules.get("matplotlib.pyplot")
+    return len(pyplot.get_fignums()) if pyplot is not None else 0
+
+
+def _resumen(sesiones) -> dict:
+    latencias = [t for sesion in sesiones for t in sesion.latencias]
+    cpu = [t for sesion in sesiones for t in sesion.cpu]
+    return {
+        "reruns": len(latencias),
+        **{f"p{p}_ms": round(float(np.percentile(latencias, p)) * 1000, 1)
+           for p in PERCENTILES},
+        "max_ms": round(max(latencias) * 1000, 1),
+        "cpu_ms_por_rerun": round(float(np.mean(cpu)) * 1000, 1),
+        "errores": sum(len(sesion.errores) for sesion in sesiones),
+    }
+
+
+def simular(
+    sesiones=SESIONES, reruns=RERUNS, pausa=PAUSA,
+    paginas=tuple(PAGINAS), semilla=0
+) -> dict:
+    """
+    Runs the sessions, spread evenly over paginas, and returns the
+    measurements. A warm-up session of every page runs first, so the
+    imports and the shared caches are not counted as session memory.
+    """
+    instalar_stub()
+    dfs = catalogo.load_catalog()
+    codigos = {pagina: compilar(pagina) for pagina in paginas}
+    rng = np.random.default_rng(semilla)
+    for pagina in paginas:
+        Sesion(pagina, PASOS[pagina](rng, dfs)).ejecutar(
+            codigos[pagina], 2, 0)
+
+    todas = [
+        Sesion(pagina, PASOS[pagina](rng, dfs))
+        for pagina in (paginas[i % len(paginas)] for i in range(sesiones))]
+    gc.collect()
+    rss_inicial = rss_kb()
+    inicio = time.perf_counter()
+    cpu = time.process_time()
+    hilos = [
+        threading.Thread(
+            target=sesion.ejecutar, name=f"sesion-{i}",
+            # Users arrive at different times
+            args=(codigos[sesion.pagina], reruns, pausa,
+                  float(rng.uniform(0, pausa))))
+        for i, sesion in enumerate(todas)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    elapsed = time.perf_counter() - inicio
+    cpu = time.process_time() - cpu
+    gc.collect()
+    rss_final = rss_kb()
+
+    total = sum(len(sesion.latencias) for sesion in todas)
+    errores = sorted({error for sesion in todas for error in sesion.errores})
+    return {
+        "sesiones": sesiones,
+        "reruns": total,
+        "segundos": round(elapsed, 2),
+        "reruns_por_segundo": round(total / elapsed, 1),
+        "paginas": {
+            pagina: _resumen([s for s in todas if s.pagina == pagina])
+            for pagina in paginas},
+        # Of one CPU; the session threads share the interpreter lock
+        "cpu_porcentaje": round(cpu / elapsed * 100, 1),
+        "rss_inicial_mb": round(rss_inicial / 1024, 1),
+        "rss_final_mb": round(rss_final / 1024, 1),
+        "rss_pico_mb": round(_pico_kb() / 1024, 1),
+        "rss_por_sesion_kb": round((rss_final - rss_inicial) / sesiones, 1),
+        "figuras_abiertas": _figuras(),
+        "errores": errores[:10],
+    }
+
+
+def main(argv=None) -> None:
+    """Entry point of the command line."""
+    parser = argparse.ArgumentParser(
+        prog="python -m nave.sesiones",
+        description="Simula sesiones simultáneas de las páginas.")
+    parser.add_argument("-s", "--sesiones", type=int, default=SESIONES)
+    parser.add_argument(
+        "-r", "--reruns", type=int, default=RERUNS,
+        help="Ejecuciones de la página por sesión")
+    parser.add_argument(
+        "--pausa", type=float, default=PAUSA,
+        help="Segundos entre dos cambios de un usuario")
+    parser.add_argument(
+        "--pagina", choices=(*PAGINAS, "ambas"), default="ambas")
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    import matplotlib
+    matplotlib.use("Agg")
+    paginas = tuple(PAGINAS) if args.pagina == "ambas" else (args.pagina,)
+    resultado = simular(
+        args.sesiones, args.reruns, args.pausa, paginas, args.semilla)
+    print(json.dumps(resultado, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Side-by-side comparison of saved hall variants.
+
+A variant is a snapshot of the calculator inputs: the UserInputs fields,
+the selected pillar and beam profiles with their weights and the unit
+rates. The variants that are not known yet are quoted together in one
+vectorized call of the engine, with their secondary members sized from
+the catalog as nave.lote does, and every result is kept in a bounded memo
+keyed on the variant's values. Saving one more variant only quotes that
+one, and the memo is shared by every session of the process.
+
+The comparison table has one row per variant; the delta table gives the
+differences of every quantity against the chosen base variant.
+"""
+import typing
+
+import numpy as np
+
+from nave import grafo, parametros, presupuesto, secundarias
+
+if typing.TYPE_CHECKING:
+    import pandas as pd
+
+
+# Variants a session can keep; the memo holds those of several sessions.
+MAX_VARIANTES = 48
+MAX_RESULTADOS = 4 * MAX_VARIANTES
+# Inputs that make a variant, besides the hall parameters.
+PERFILES = ("familia_pilar", "perfil_pilar", "familia_viga", "perfil_viga")
+PESOS = ("pilar_peso_m", "viga_peso_m")
+PRECIOS = (
+    "precio_mat", "precio_taller", "precio_monta", "precio_planif",
+    "factor_costes_empre")
+CAMPOS = (*parametros.LIMITES, *PERFILES, *PESOS, *PRECIOS)
+# Columns of the comparison table and their headers.
+COLUMNAS = {
+    "cantidad_porticos": "Pórticos",
+    "distancia_porticos_internos": "Distancia internos [m]",
+    "ancho_nave": "Ancho [m]",
+    "altura_alero": "Alero [m]",
+    "inclinacion_tejado": "Inclinación [°]",
+    "perfil_pilar": "Pilares",
+    "perfil_viga": "Vigas",
+    "perfil_correa": "Correas",
+    "peso_pilares": "Pilares [to]",
+    "peso_vigas": "Vigas [to]",
+    "peso_correas": "Correas [to]",
+    "peso_wandriegel": "Wandriegel [to]",
+    "pesos_arrios": "Arriostramientos [to]",
+    "pesototal": "Peso total [to]",
+    "costes_totales": "Costes totales [€]",
+    "costes_portonelada": "Coste [€/to]",
+}
+# Numeric columns the delta table also gives as a percentage.
+PORCENTAJES = ("pesototal", "costes_totales")
+
+# Results of every variant quoted by the process, by firma and values.
+_resultados = grafo.Memo(MAX_RESULTADOS)
+
+
+def clave(variante: dict, firma=None) -> tuple:
+    """Memo key of a variant: its values, without its name."""
+    return (firma, *(variante[name] for name in CAMPOS))
+
+
+def evaluar(variantes: list, tablas: dict, firma=None) -> list:
+    """
+    Returns the quote of every variant (a dict of plain values, including
+    the secondary profiles), quoting the ones missing in the memo in one
+    vectorized call. firma (the catalog signature) tells results of an
+    older catalog apart.
+    """
+    claves = [clave(variante, firma) for variante in variantes]
+    resultados = [_resultados.get(key) for key in claves]
+    nuevas = {
+        key: variante for key, variante, resultado in zip(
+            claves, variantes, resultados) if resultado is None}
+    if nuevas:
+        columnas = {
+            name: np.array([variante[name] for variante in nuevas.values()])
+            for name in CAMPOS if name not in PERFILES}
+        columnas.update(secundarias.dimensionar(tablas, **columnas))
+        quote = presupuesto.presupuesto(**columnas)
+        count = len(nuevas)
+        valores = {
+            name: np.broadcast_to(value, (count,)).tolist()
+            for name, value in {**columnas, **quote}.items()}
+        for i, key in enumerate(nuevas):
+            nuevas[key] = {
+                name: values[i] for name, values in valores.items()}
+            _resultados.put(key, nuevas[key])
+        # Not read back from the memo, which other sessions (or this
+        # call, past MAX_RESULTADOS variants) may have emptied meanwhile
+        resultados = [
+            nuevas[key] if resultado is None else resultado
+            for key, resultado in zip(claves, resultados)]
+    return resultados
+
+
+def tabla(variantes: list, resultados: list) -> "pd.DataFrame":
+    """Comparison table: one row per variant, indexed by its name."""
+    import pandas as pd
+    filas = [
+        {**{name: variante.get(name) for name in PERFILES}, **resultado}
+        for variante, resultado in zip(variantes, resultados)]
+    df = pd.DataFrame(filas, index=[
+        variante["nombre"] for variante in variantes])
+    return df[list(COLUMNAS)].rename(columns=COLUMNAS)
+
+
+def deltas(comparacion: "pd.DataFrame", base) -> "pd.DataFrame":
+    """
+    Differences of every numeric column of a comparison table against
+    the row of the base variant, plus the relative change of the weight
+    and the costs (%).
+    """
+    numericas = comparacion.select_dtypes("number")
+    diferencias = numericas - numericas.loc[base]
+    for name in PORCENTAJES:
+        columna = COLUMNAS[name]
+        diferencias[f"{columna} Δ%"] = (
+            diferencias[columna] / numericas.loc[base, columna] * 100
+        ).round(1)
+    return diferencias.round(3)
+
+
+def guardar(variantes: list, variante: dict) -> str:
+    """
+    Adds a variant to the list of a session, replacing the one with the
+    same name. Returns an error message when the list is full, else "".
+    """
+    for i, guardada in enumerate(variantes):
+        if guardada["nombre"] == variante["nombre"]:
+            variantes[i] = variante
+            return ""
+    if len(variantes) >= MAX_VARIANTES:
+        return f"Se pueden guardar como máximo {MAX_VARIANTES} variantes"
+    variantes.append(variante)
+    return ""
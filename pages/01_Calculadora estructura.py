@@ -1,21 +1,37 @@
 import math
 import pathlib
+import uuid
 
-import matplotlib.pyplot as plt
-import numpy as np
-import pandas as pd
 import streamlit as st
 
+from nave import (
+    arranque, cache_vistas, catalogo, comprobacion, grafo, listado, modelo,
+    modelo3d, optimizador, perfilado, planos, presupuesto, riesgo,
+    secundarias, variantes)
+from nave.dibujo import segmentos_modelo
+from nave.perfiles import get_profile_catalog
+from nave.parametros import LIMITES
+
 
 # Constants to be used in the program.
 DB_FOLDER = pathlib.Path(__file__).parent.parent / "DBs"
-LISTA_VIGAS_PILARES = ("HEA", "HEB", "HEM", "I-Profile", "IPE")
+LISTA_VIGAS_PILARES = catalogo.FAMILIAS_PORTICO
 TITLE = "Calculadora de costes de construcción de nave industrial"
-# Convenient color constants.
-RED = "red"
-GREEN = "green"
-BLUE = "blue"
-BLACK = "black"
+# Raw values of the calculation graph and the inputs of its nodes.
+CAMPOS_UI = tuple(LIMITES)
+SELECCION = ("familia_pilar", "perfil_pilar", "familia_viga", "perfil_viga")
+CAMPOS_PRECIOS = (
+    "precio_mat", "precio_taller", "precio_monta", "precio_planif",
+    "factor_costes_empre")
+CAMPOS_SUPERIOR = (
+    "cantidad_porticos", "distancia_porticos_finales",
+    "distancia_porticos_internos", "ancho_nave", "inclinacion_tejado")
+CAMPOS_FRONTAL = (
+    "ancho_nave", "altura_alero", "inclinacion_tejado", "altura_cartela")
+CAMPOS_PESOS = (
+    "cantidad_porticos", "distancia_porticos_finales",
+    "distancia_porticos_internos", "ancho_nave", "altura_alero",
+    "inclinacion_tejado")
 
 
 class UserInputs:
@@ -24,642 +40,536 @@ class UserInputs:
     def __init__(self, column) -> None:
         self.cantidad_porticos = column.slider(
             "Cantidad de pórticos",
-            min_value=4, max_value=10, value=5)
+            **LIMITES["cantidad_porticos"])
         self.distancia_porticos_finales = column.number_input(
             "Distancia entre los pórticos finales (metros)",
-            min_value=5.0, max_value=7.0, value=5.5, step=0.1)
+            **LIMITES["distancia_porticos_finales"])
         self.distancia_porticos_internos = column.number_input(
             "Distancia entre los pórticos internos (metros)",
-            min_value=5.0, max_value=7.0, value=6.0, step=0.1)
+            **LIMITES["distancia_porticos_internos"])
         self.ancho_nave = column.number_input(
             "Ancho nave (metros)",
-            min_value=8.0, max_value=26.0, value=18.0, step=0.25)
+            **LIMITES["ancho_nave"])
         self.altura_alero = column.number_input(
             "Altura del alero (metros)",
-            min_value=4.0, max_value=8.0, value=4.0, step=0.1)
+            **LIMITES["altura_alero"])
         self.inclinacion_tejado = column.slider(
             "Inclinación del tejado (grados)",
-            min_value=6, max_value=30, value=12)
+            **LIMITES["inclinacion_tejado"])
         self.longitud_cartela = column.number_input(
             "Largo de la cartela (metros)",
-            min_value=0.0, max_value=4.0, value=2.0, step=0.1)
+            **LIMITES["longitud_cartela"])
         self.altura_cartela = column.number_input(
             "Altura de la cartela (metros)",
-            min_value=0.0, max_value=2.5, value=0.7, step=0.1)
+            **LIMITES["altura_cartela"])
 
 
 class Geometry:
     """Handles Geometry variables."""
 
     def __init__(self, ui: UserInputs) -> None:
-        self.angulo_radianes = math.radians(ui.inclinacion_tejado)
-        self.largo_riegel = round(
-            (ui.ancho_nave / 2) / math.cos(self.angulo_radianes), 2)
-        self.distancia_correas = 2
-        self.correas_internas_cantidad = 2 * math.ceil(
-            (self.largo_riegel - 0.2) / (self.distancia_correas))
-        self.correas_lado = int(self.correas_internas_cantidad / 2)
-        self.peso_estructura = 50
-        self.distancia_wandriegel = 2.2
-        self.cantidad_wandriegel = round(
-            (ui.altura_alero - 0.4) / self.distancia_wandriegel)
-        self.distancia_real_wandriegel = (
-            (ui.altura_alero - 0.4) / self.cantidad_wandriegel)
+        geo = presupuesto.geometria(
+            ui.ancho_nave, ui.altura_alero, ui.inclinacion_tejado)
+        self.angulo_radianes = float(geo["angulo_radianes"])
+        self.largo_riegel = float(geo["largo_riegel"])
+        self.distancia_correas = presupuesto.DISTANCIA_CORREAS
+        self.correas_internas_cantidad = int(geo["correas_internas_cantidad"])
+        self.correas_lado = int(geo["correas_lado"])
+        self.distancia_wandriegel = presupuesto.DISTANCIA_WANDRIEGEL
+        self.cantidad_wandriegel = int(geo["cantidad_wandriegel"])
+        self.distancia_real_wandriegel = float(
+            geo["distancia_real_wandriegel"])
 
 
 def get_data_frames() -> dict:
-    """Gets the required data frames from the Excel files."""
-    dfs = {}
-    # Iterates through a generator of Excel files.
-    for file in (file.name for file in DB_FOLDER.glob("*.xlsx")):
-        df = pd.read_excel(DB_FOLDER / file)
-        # Filter DF to include only rows with the
-        # term searched in the first column
-        # Transpose the DF
-        # Set first column as index
-        df = df.set_index(df.columns[0])
-        df = df.T
-        df.rename(
-            columns=lambda column: column.replace("_x000D_", "_"),
-            inplace=True)
-        # Set columns as new index
-        df.index.name = "Perfil"
-        df.reset_index(inplace=True)
-        df.rename(columns={"index": df.index.name}, inplace=True)
-        # Rename
-        df = df.rename(columns={df.columns[0]: "Perfil"})
-        # Add the DF to the previously created dictionary
-        dfs[file] = df
-    return dfs
-
-
-def copy_and_paste_lines(
-    y1, y2, y3, y4, line_distance, last_x,
-    axis, correas_lado, distancia_porticos_finales
-) -> None:
-    """Copy and paste the lines correas_lado - 1 times"""
-    for _ in range(correas_lado - 1):
-        # Update the Y coordinates
-        y1 += line_distance
-        y2 += line_distance
-        y3 -= line_distance
-        y4 -= line_distance
-        # Plot the lines with the updated coordinates
-        for y_pair in ((y1, y2), (y3, y4)):
-            axis.plot((0, distancia_porticos_finales), y_pair, color=RED)
-            axis.plot(
-                (last_x + 0.5, last_x - distancia_porticos_finales),
-                y_pair, color=RED)
-
-
-def display_vista_superior(geo: Geometry, ui: UserInputs, col2) -> tuple:
     """
-    Handles the Vista superior section. Returns any objects needed later.
+    Gets the required data frames from the compiled profile catalog,
+    waiting for the warm-up if it is still loading it.
+    """
+    return arranque.catalogo_listo(DB_FOLDER)
+
+
+def select_profiles(dfs: dict, col1) -> dict:
+    """
+    Profile selectors of the pillars and the beams; returns the selected
+    families and profile names.
     """
+    col1.markdown("---")
+    perfilestipo_columnas = col1.selectbox(
+        "Selecciona el tipo de perfil", LISTA_VIGAS_PILARES, index=4)
+
+    catalogo_perfiles = get_profile_catalog(dfs)
+
+    selector_pilar = col1.selectbox(
+        "Seleccionar perfil para los pilares", key="droppilar",
+        options=catalogo_perfiles[perfilestipo_columnas].names, index=12)
+
+    col1.markdown("---")
+    perfilestipo_vigas = col1.selectbox(
+        "Selecciona el tipo de perfil para las vigas",
+        LISTA_VIGAS_PILARES, index=4)
+    selector_viga = col1.selectbox(
+        "Seleccionar perfil", key="dropviga",
+        options=catalogo_perfiles[perfilestipo_vigas].names, index=12)
+    return {
+        "familia_pilar": perfilestipo_columnas, "perfil_pilar": selector_pilar,
+        "familia_viga": perfilestipo_vigas, "perfil_viga": selector_viga}
+
+
+class CostInputs:
+    """Holds the unit rates of the quote."""
+
+    def __init__(self, column) -> None:
+        expander = column.expander("Precios")
+        self.precio_mat = expander.number_input(
+            "Material (€/to)", min_value=0.0, step=50.0,
+            value=float(presupuesto.PRECIO_MATERIAL))
+        self.precio_taller = expander.number_input(
+            "Fabricación (€/to)", min_value=0.0, step=50.0,
+            value=float(presupuesto.PRECIO_TALLER))
+        self.precio_monta = expander.number_input(
+            "Montaje (€/to)", min_value=0.0, step=50.0,
+            value=float(presupuesto.PRECIO_MONTAJE))
+        self.precio_planif = expander.number_input(
+            "Planificación (€/to)", min_value=0.0, step=50.0,
+            value=float(presupuesto.PRECIO_PLANIFICACION))
+        self.factor_costes_empre = expander.number_input(
+            "Costes de empresa (factor)", min_value=0.0, max_value=1.0,
+            step=0.01, value=presupuesto.FACTOR_COSTES_EMPRESA)
+
+
+def profile_properties(dfs: dict, seleccion: dict) -> dict:
+    """Name, gk [kg/m] and height [m] of the pillar and beam profiles."""
+    catalogo_perfiles = get_profile_catalog(dfs)
+    propiedades = {}
+    for miembro in ("pilar", "viga"):
+        perfil = catalogo_perfiles[seleccion[f"familia_{miembro}"]][
+            seleccion[f"perfil_{miembro}"]]
+        propiedades[f"perfil_{miembro}"] = perfil.name
+        propiedades[f"{miembro}_peso_m"] = perfil.gk
+        # Convert to meters
+        propiedades[f"{miembro}_ancho"] = perfil.h / 1000
+    return propiedades
+
+
+def build_model(perfiles: dict, ui) -> modelo.Modelo:
+    """Builds the structural model measured by the page."""
+    return modelo.construir(**perfiles, **vars(ui))
+
+
+def calculation_graph() -> grafo.Grafo:
+    """
+    Defines the nodes of the page on its shared graph. Raw values are the
+    catalog signature, the UserInputs and CostInputs fields and the
+    selected profiles; each node is only computed again when one of the
+    values it depends on changes.
+    """
+    calculo = grafo.compartido("calculadora")
+    nodo = calculo.nodo
+
+    @nodo("firma_catalogo", memo=grafo.Memo(1))
+    def catalogo(e):
+        return get_data_frames()
+
+    @nodo("catalogo", *SELECCION)
+    def perfiles(e):
+        return profile_properties(e.catalogo, vars(e))
+
+    @nodo("catalogo", memo=grafo.Memo(1))
+    def tablas_secundarias(e):
+        return secundarias.tablas(e.catalogo)
+
+    @nodo("tablas_secundarias", *CAMPOS_PESOS)
+    def perfiles_secundarios(e):
+        return {
+            name: value.item()
+            for name, value in secundarias.dimensionar(
+                e.tablas_secundarias, **vars(e)).items()}
+
+    @nodo("ancho_nave", "altura_alero", "inclinacion_tejado")
+    def geometria(e):
+        return Geometry(e)
+
+    @nodo(*CAMPOS_UI, "perfiles", "perfiles_secundarios")
+    def estructura(e):
+        return build_model({**e.perfiles, **e.perfiles_secundarios}, e)
+
+    @nodo(*CAMPOS_SUPERIOR, memo=cache_vistas.vistas)
+    def vista_superior(e):
+        return cache_vistas.render(figure_vista_superior(
+            modelo.construir_superior(**vars(e)), e))
+
+    @nodo(*CAMPOS_FRONTAL, "geometria", "perfiles", memo=cache_vistas.vistas)
+    def vista_frontal(e):
+        # One portal frame is drawn, however many the hall has
+        estructura = modelo.construir_frontal(
+            cantidad_porticos=1, **vars(e), **e.perfiles)
+        return cache_vistas.render(
+            figure_vista_frontal(estructura, e.geometria, e))
+
+    @nodo(*CAMPOS_PESOS, "estructura", "perfiles", "perfiles_secundarios")
+    def pesos(e):
+        # Measured on the members the views draw
+        return modelo.pesos(
+            e.estructura, **vars(e), **e.perfiles, **e.perfiles_secundarios)
+
+    @nodo("pesos", *CAMPOS_PRECIOS)
+    def costes(e):
+        return presupuesto.costes(e.pesos["pesototal"], **vars(e))
+
+    @nodo("pesos", "costes")
+    def quote(e):
+        return {
+            name: value.item()
+            for name, value in {**e.pesos, **e.costes}.items()}
+
+    @nodo(*CAMPOS_UI, "perfiles", "perfiles_secundarios", "pesos", "costes")
+    def lineas(e):
+        return tuple(listado.filas(listado.partidas(
+            {**vars(e), **e.perfiles, **e.perfiles_secundarios},
+            {**e.pesos, **e.costes})))
+
+    @nodo("lineas")
+    def listado_xlsx(e):
+        return listado.xlsx_bytes(e.lineas)
+
+    @nodo("pesos", *CAMPOS_PRECIOS, "variacion", "distribucion")
+    def riesgo_precios(e):
+        # A fixed seed keeps the percentiles steady between reruns
+        return riesgo.analizar(
+            e.pesos["pesototal"], riesgo.distribuciones(
+                {name: getattr(e, name) for name in CAMPOS_PRECIOS},
+                e.variacion, e.distribucion),
+            semilla=0)
+
+    @nodo("catalogo", memo=grafo.Memo(1))
+    def secciones(e):
+        return comprobacion.Secciones(e.catalogo)
+
+    @nodo("secciones", *CAMPOS_SUPERIOR, "altura_alero", "miembro")
+    def comprobacion_perfiles(e):
+        # The arrays of the catalog are built once, by the node above
+        return comprobacion.comprobar(None, **vars(e))
+
+    @nodo("estructura")
+    def medicion(e):
+        return modelo.medicion(e.estructura)
+
+    @nodo("estructura")
+    def planos_cad(e):
+        return {
+            formato: planos.contenido(e.estructura, formato)
+            for formato in ("dxf", "svg")}
+
+    @nodo(*CAMPOS_UI, "perfiles")
+    def modelo_3d(e):
+        return modelo3d.glb(modelo3d.construir(**vars(e), **e.perfiles))
+
+    return calculo
+
+
+def display_vista_superior(image: bytes, col2) -> None:
+    """Handles the Vista superior section."""
+    # Show figure inside the app
+    col2.image(image, use_column_width=True)
+
+
+def figure_vista_superior(estructura: modelo.Modelo, ui):
+    """Draws the Vista superior and returns the figure."""
+    # matplotlib is loaded on first use (see nave.arranque)
+    import matplotlib.pyplot as plt
     # Create figure and axes
     fig, ax = plt.subplots()
     ax.set_title("Vista superior")
     ax.set_aspect("equal")
-    ax.set_xlim(
-        0,
-        (ui.cantidad_porticos-3)*ui.distancia_porticos_internos
-            + ui.distancia_porticos_finales*2)
-    ax.set_ylim(0, ui.ancho_nave)
-    # Add red horizontal line in the middle of y
-    ax.axhline(y=ui.ancho_nave/2, color=RED)
-    # Draw bottom line
-    ax.axhline(0, xmin=0, xmax=1, color=RED)
-    # Draw top line
-    ax.axhline(ui.ancho_nave, xmin=0, xmax=1, color=RED)
-    # Draw first line of frame
-    ax.axvline(-ui.distancia_porticos_finales, color=BLUE)
-
-    # Draw vertical lines
-    for i in range(ui.cantidad_porticos - 2):
-        x = ui.distancia_porticos_finales + i * ui.distancia_porticos_internos
-        ax.axvline(x, linestyle="--", color=BLUE)
-    # Get the last value on the x, y axis and half of y
     last_x = (
         ui.distancia_porticos_internos * (ui.cantidad_porticos - 3)
             + 2 * ui.distancia_porticos_finales)
-    last_y = ui.ancho_nave
-    middle_y = last_y / 2
-    # Draw last line of frame
-    ax.axvline(x + ui.distancia_porticos_finales, color=BLUE)
+    ax.set_xlim(0, last_x)
+    ax.set_ylim(0, ui.ancho_nave)
     ax.set_xticklabels([])
     ax.set_yticklabels([])
     # Add text to the last x-axis value and for x = 0
     for x in (0, last_x):
         ax.text(x, -ui.ancho_nave * 0.05, f"{x:.1f}m", ha="center")
     # Add text to the last y-axis value and in the middle
-    for y in (last_y, middle_y):
+    for y in (ui.ancho_nave, ui.ancho_nave / 2):
         ax.text(
             -ui.distancia_porticos_finales * 0.2, y, f"{y:.1f}m",
             va="center", rotation="vertical")
 
-    # Get values for lines
-    line_top = ui.ancho_nave - 0.2
-    line_bottom = 0.2
-    line_middle_top = middle_y + 0.2
-    line_middle_bottom = middle_y - 0.2
-
-    # Calculate total distance.
-    total_distance = line_top - line_bottom
-    espacio_correas = (total_distance / 2) - 0.2 - 1.2
-
-    # Calculate distance between lines
-    line_distance = espacio_correas / geo.correas_lado
-    # Draw horizontal lines
-    for i in range(geo.correas_lado):
-        y_bottom = line_bottom + line_distance * (i + 1)
-        y_top = line_top - line_distance * (i + 1)
-        for y in (y_bottom, y_top):
-            ax.axhline(y=y, linestyle="--", color=GREEN)
-
-    # Add horizontal lines.
-    for line in (line_top, line_bottom, line_middle_top, line_middle_bottom):
-        ax.axhline(line, linestyle="--", color=GREEN)
-
-    ########## LEFT TRAUFE STRAPS ##########
-    # Get coordinates of the first line and second line,
-    # and plots red lines between the two points for each line.
-    x1 = 0
-    x2 = ui.distancia_porticos_finales
-    y1 = line_bottom, line_top
-    y2 = line_bottom + line_distance, line_top - line_distance
-    ax.plot((x1, x2), (y1, y2), color=RED)
-    ax.plot((x1, x2), (y2, y1), color=RED)
-
-    ########## LEFT CENTER STRAPS ##########
-    # Get coordinates of the first line and second line,
-    # and plots red lines between the two points for each line.
-    x1f = 0
-    x2f = ui.distancia_porticos_finales
-
-    y1f = middle_y - 0.2, geo.correas_lado * line_distance + 0.2
-    y2f = geo.correas_lado * line_distance + 0.2, middle_y - 0.2
-    ax.plot((x1f, x2f), (y1f, y2f), color=RED)
-
-    y1f = line_bottom + line_distance, line_top - line_distance
-    y2f = line_bottom, line_top
-    ax.plot((x1f, x2f), (y1f, y2f), color=RED)
-
-    x1f2 = 0
-    x2f2 = ui.distancia_porticos_finales
-
-    # First line.
-    y1f2 = middle_y + 0.2, last_y - (geo.correas_lado * line_distance + 0.2)
-    y2f2 = last_y - (geo.correas_lado * line_distance + 0.2), middle_y + 0.2
-    ax.plot((x1f2, x2f2), (y1f2, y2f2), color=RED)
-
-    # Second line.
-    y1f2 = line_bottom + line_distance, line_top - line_distance
-    y2f2 = line_bottom, line_top
-    ax.plot((x1f2, x2f2), (y1f2, y2f2), color=RED)
-
-    ########## CENTRAL BRACING ##########
-    # Get the coordinates of the first line
-    x1 = last_x + 0.5
-    x2 = last_x - ui.distancia_porticos_finales
-
-    y1f = middle_y - 0.2, geo.correas_lado * line_distance + 0.2
-    y2f = geo.correas_lado * line_distance + 0.2, middle_y - 0.2
-    ax.plot((x1, x2), (y1f, y2f), color=RED)
-
-    y1f2 = middle_y + 0.2, last_y - (geo.correas_lado * line_distance + 0.2)
-    y2f2 = last_y - (geo.correas_lado * line_distance + 0.2), middle_y + 0.2
-    ax.plot((x1, x2), (y1f2, y2f2), color=RED)
-
-    ########## RIGHT TRAUFE BRACING ##########
-    x1e = last_x + 0.5
-    x2e = x1e - ui.distancia_porticos_finales - 0.5
-    y1e = line_bottom, line_top
-    y2e = line_bottom + line_distance, line_top - line_distance
-    ax.plot((x1e, x2e), (y1e, y2e), color=RED)
-    ax.plot((x1e, x2e), (y2e, y1e), color=RED)
-
-    # Calculate the distance between the two points to 2dp (Pythagoras)
-    x_diff = x2e - x1e
-    y_diff = (line_bottom + line_distance) - line_bottom
-    longitud_arrios = round(math.hypot(x_diff, y_diff), 2)
-
-    # Set the initial Y coordinates
-    y1 = line_bottom
-    y2 = line_bottom + line_distance
-    y3 = line_top
-    y4 = line_top - line_distance
-
-    copy_and_paste_lines(
-        y1, y2, y3, y4, line_distance, last_x, ax,
-        geo.correas_lado, ui.distancia_porticos_finales)
-    copy_and_paste_lines(
-        y2, y1, y4, y3, line_distance, last_x, ax,
-        geo.correas_lado, ui.distancia_porticos_finales)
-
-    # Show figure inside the app
-    col2.pyplot(fig)
-    # Returns required local variables for future use.
-    return line_distance, longitud_arrios
-
-
-def draw_perpendicular_lines(
-    correas_lado, start_point, ref_line_unit_vector,
-    spacing, displacement, ax) -> None:
-    """
-    Iterate from 1 to correas_lado, calculate the starting point
-    of each line, and draw a perpendicular line with the specified length.
-    """
-    for i in range(1, correas_lado + 1):
-        current_start_point = (
-            start_point + ref_line_unit_vector * i * spacing)
-        current_end_point1 = current_start_point + displacement
-        ax.plot(
-            (current_start_point[0], current_end_point1[0]),
-            (current_start_point[1], current_end_point1[1]),
-            color=BLUE, linewidth=1)
-
-
-def add_vista_frontal_left_straps(
-    ref_line_unit_vector, start_point1, start_point2,
-    perpendicular_length, spacing, ax, geo: Geometry
-) -> None:
-    """Adds the left straps to the vista frontal display."""
-    # Rotate the unit vector by ±90 degrees
-    # (only +90 degrees is needed)
-    # to obtain the direction vectors for the perpendicular lines
-    perpendicular_direction = rotate_vector(ref_line_unit_vector, 90)
-
-    # Multiply the perpendicular direction vectors by the desired length
-    # Gets the required displacement.
-    displacement = perpendicular_direction * perpendicular_length
-
-    # Calculate the required endpoints of the perpendicular lines
-    end_point1 = start_point1 + displacement
-    end_point2 = start_point2 + displacement
-
-    # Traufpfette Firstpfette Lines
-    ax.plot(
-        (start_point1[0], end_point1[0]),
-        (start_point1[1], end_point1[1]), color=BLUE, linewidth=1)
-    ax.plot(
-        (start_point2[0], end_point2[0]),
-        (start_point2[1], end_point2[1]), color=BLUE, linewidth=1)
-
-    draw_perpendicular_lines(
-        geo.correas_lado, start_point1, ref_line_unit_vector,
-        spacing, displacement, ax)
-
-
-def add_vista_frontal_right_straps(
-    offset_along_line, perpendicular_length,
-    spacing, ax, geo: Geometry, ui: UserInputs
-) -> None:
-    """Adds the right straps to the vista frontal display."""
-    x_start = ui.ancho_nave
-    y_start = ui.altura_alero
-    x_end = ui.ancho_nave - geo.largo_riegel * math.cos(geo.angulo_radianes)
-    y_end = ui.altura_alero + geo.largo_riegel * math.sin(geo.angulo_radianes)
-
-    # Calculate the direction vector and unit vector of the new reference line
-    ref_line_direction = np.array((x_end - x_start, y_end - y_start))
-    ref_line_unit_vector = (
-        ref_line_direction / np.linalg.norm(ref_line_direction))
-
-    # Calculate the starting points of the perpendicular lines
-    start_point1 = np.array(
-        (x_start, y_start)) + ref_line_unit_vector * offset_along_line
-    start_point2 = np.array(
-        (x_end, y_end)) - ref_line_unit_vector * offset_along_line
-
-    # Rotate the unit vector by ±90 degrees to obtain the
-    # direction vectors for the perpendicular lines (-90 only needed)
-    perpendicular_direction = rotate_vector(ref_line_unit_vector, -90)
+    # Every member is drawn in one go per style
+    segmentos_modelo(estructura.vista("superior")).draw(ax)
+    return fig
 
-    # Multiply the required perp direction vectors by the desired length
-    displacement = perpendicular_direction * perpendicular_length
 
-    # Calculate the endpoints of the perpendicular lines
-    end_point1 = start_point1 + displacement
-    end_point2 = start_point2 + displacement
-
-    # Plot the perpendicular lines
-    ax.plot(
-        (start_point1[0], end_point1[0]),
-        (start_point1[1], end_point1[1]), color=BLUE, linewidth=1)
-    ax.plot(
-        (start_point2[0], end_point2[0]),
-        (start_point2[1], end_point2[1]), color=BLUE, linewidth=1)
+def display_vista_frontal(image: bytes, col2) -> None:
+    """Handles the vista frontal section."""
+    st.markdown("---")
 
-    draw_perpendicular_lines(
-        geo.correas_lado, start_point1, ref_line_unit_vector,
-        spacing, displacement, ax)
+    # Show figure inside the app
+    col2.image(image, use_column_width=True)
 
 
-def display_vista_frontal(
-    dfs: dict, geo: Geometry, ui: UserInputs, col1, col2
-) -> tuple:
-    """
-    Handles the vista frontal section. Returns any objects needed later.
-    """
+def figure_vista_frontal(estructura: modelo.Modelo, geo: Geometry, ui):
+    """Draws the Vista frontal and returns the figure."""
+    import matplotlib.pyplot as plt
     # Create figure and axes
     fig_nave, ax = plt.subplots()
     ax.set_title("Vista frontal")
     ax.set_aspect("equal")
     ax.set_xlim(-0.5, ui.ancho_nave + 0.5)
-    ax.set_ylim(
-        -0.5,
-        ui.altura_alero + 2 * geo.largo_riegel
-            * np.sin(np.deg2rad(ui.inclinacion_tejado)))
-
-    # Agregar línea roja en el eje x
-    ax.axhline(y=0, color=BLACK, linewidth=0.5, xmin=0.0, xmax=ui.ancho_nave)
-    col1.markdown("---")
-    perfilestipo_columnas = col1.selectbox(
-        "Selecciona el tipo de perfil", LISTA_VIGAS_PILARES, index=4)
-
-    df_pilar = dfs[f"{perfilestipo_columnas}.xlsx"]
-    print(df_pilar.columns)
-
-    # Update the pillar lines
-    # After getting pilar_peso_m
-    selector_pilar = col1.selectbox(
-        "Seleccionar perfil para los pilares", key="droppilar",
-        options=df_pilar["Perfil"].tolist(), index=12)
-    pilar_ancho = df_pilar.loc[
-        df_pilar["Perfil"] == selector_pilar, "Altura h [mm]"
-    ].iloc[0] / 1000  # Convert to meters
-
-    for value in (0, pilar_ancho, ui.ancho_nave, ui.ancho_nave - pilar_ancho):
-        ax.plot((value, value), (0, ui.altura_alero), color=BLUE, linewidth=1)
-
-    col1.markdown("---")
-    perfilestipo_vigas = col1.selectbox(
-        "Selecciona el tipo de perfil para las vigas",
-        LISTA_VIGAS_PILARES, index=4)
-    df_viga = dfs[f"{perfilestipo_vigas}.xlsx"]
-    selector_viga = col1.selectbox(
-        "Seleccionar perfil", key="dropviga",
-        options=df_viga["Perfil"].tolist(), index=12)
-    viga_ancho = df_viga.loc[
-        df_viga["Perfil"] == selector_viga, "Altura h [mm]"
-    ].iloc[0] / 1000  # Convert to meters
-
-    # Calculate coordinates of the inclined line
-    x_start = 0
-    y_start = ui.altura_alero
-    x_end = geo.largo_riegel * math.cos(geo.angulo_radianes)
     y_end = ui.altura_alero + geo.largo_riegel * math.sin(geo.angulo_radianes)
-    # Calculate coordinates of the second sloping line
-    x2_start = ui.ancho_nave
-    y2_start = ui.altura_alero
-    x2_end = geo.largo_riegel * np.cos(np.deg2rad(ui.inclinacion_tejado))
-    y2_end = (
-        ui.altura_alero
-            + geo.largo_riegel * np.sin(np.deg2rad(ui.inclinacion_tejado)))
-    ax.plot((x_start, x_end), (y_start, y_end), color=BLUE, linewidth=1)
-    ax.plot((x2_start, x2_end), (y2_start, y2_end), color=BLUE, linewidth=1)
-
     # Plot Limits
     ax.set_ylim(0, y_end + 0.5)
-
-    # Beam thickness
-    # Calculate the angle perpendicular to the inclined lines
-    perpendicular_angle = ui.inclinacion_tejado + 90
-
-    # Calculate the offset in x and y coordinates
-    offset_x = viga_ancho * np.cos(np.deg2rad(perpendicular_angle))
-    offset_y = viga_ancho * np.sin(np.deg2rad(perpendicular_angle))
-
-    # Calculate beam column length
-    longitud_pilar_riegel = pilar_ancho * math.tan(geo.angulo_radianes)
-    # Add lines
-    ax.plot(
-        (pilar_ancho, pilar_ancho),
-        (ui.altura_alero, ui.altura_alero + longitud_pilar_riegel),
-        color=BLUE, linewidth=1)
-    ax.plot(
-        (ui.ancho_nave - pilar_ancho, ui.ancho_nave - pilar_ancho),
-        (ui.altura_alero, ui.altura_alero + longitud_pilar_riegel),
-        color=BLUE, linewidth=1)
-
-    # Subtract the offset from the original coordinates of the inclined lines
-    x_end_offset = x_end - offset_x
-    y_end_offset = y_end - offset_y
-    y2_end_offset = y2_end - offset_y
-
-    # Add blue line first
-    ax.plot((x_end, x_end), (y_end, y_end_offset), color=BLUE, linewidth=1)
-
-    pilar_viga_interseccion_y = (
-        ui.altura_alero + longitud_pilar_riegel - offset_y)
-
-    point1 = (pilar_ancho, pilar_viga_interseccion_y)
-    point2 = (x_end_offset, y_end_offset)
-    distance = 2.3
-
-    caca1, caca2 = point_along_line(point1, point2, distance)
-
-    # Calculate the direction vector of the reference line
-    prev_line_direction = np.array(
-        (x_end - pilar_ancho, y_end_offset - pilar_viga_interseccion_y))
-
-    # Rotate the direction vector by 90 degrees
-    # minus the additional angle (roof inclination)
-    total_angle = 90
-    rotated_vector = rotate_vector(prev_line_direction, total_angle)
-
-    # Normalize the rotated vector to get a unit vector
-    unit_vector = rotated_vector / np.linalg.norm(rotated_vector)
-
-    # Multiply the unit vector by the desired length (viga_ancho)
-    displacement = unit_vector * viga_ancho
-
-    # Add the resulting vector to the endpoint of the previous line
-    # (caca1, caca2) to get the endpoint of the new line
-    new_line_endpoint = np.array([caca1, caca2]) + displacement
-
-    # Plot the parallel lines with the offset
-    ax.plot((caca1, x_end), (caca2, y_end_offset), color=BLUE, linewidth=1)
-    ax.plot(
-        (ui.ancho_nave - caca1, x2_end), (caca2, y2_end_offset),
-        color=BLUE, linewidth=1)
-
-    # Plot placas cartelas
-    ax.plot(
-        (caca1, new_line_endpoint[0]), (caca2, new_line_endpoint[1]),
-        color=BLUE, linewidth=1)
-    ax.plot(
-        (ui.ancho_nave - caca1, ui.ancho_nave - new_line_endpoint[0]),
-        (caca2, new_line_endpoint[1]), color=BLUE, linewidth=1)
-    altura_cartela = ui.altura_cartela - offset_y
-
-    # Left gusset
-    ax.plot(
-        (pilar_ancho, caca1), 
-        (pilar_viga_interseccion_y - altura_cartela, caca2),
-        color=BLUE, linewidth=1)
-    ax.plot(
-        (0, pilar_ancho),
-        ( 
-            pilar_viga_interseccion_y - altura_cartela,
-            pilar_viga_interseccion_y - altura_cartela),
-        color=BLUE, linewidth=1)
-    # Right gusset.
-    ax.plot(
-        (ui.ancho_nave - pilar_ancho, ui.ancho_nave - caca1),
-        (pilar_viga_interseccion_y - altura_cartela, caca2),
-        color=BLUE, linewidth=1)
-    ax.plot(
-        (ui.ancho_nave, ui.ancho_nave - pilar_ancho),
-        (
-            pilar_viga_interseccion_y - altura_cartela,
-            pilar_viga_interseccion_y - altura_cartela),
-        color=BLUE, linewidth=1)
-
-    # Wandriegel Lines
-    # Initial line
-    x1, x2 = 0, -0.16
-    x3, x4 = ui.ancho_nave, ui.ancho_nave + 0.16
-    y1, y2 = 0.25, 0.25
-
-    for _ in range(geo.cantidad_wandriegel + 1):
-        ax.plot((x1, x2), (y1, y2), color=BLUE, linewidth=1)
-        ax.plot((x3, x4), (y1, y2), color=BLUE, linewidth=1)
-        # Move the line in the positive y direction
-        y1 += geo.distancia_real_wandriegel
-        y2 += geo.distancia_real_wandriegel
-
-    offset_along_line = 0.2
-    perpendicular_length = 0.18
-    # Calculate the direction vector and unit vector of the reference line
-    ref_line_direction = np.array((x_end - x_start, y_end - y_start))
-    ref_line_unit_vector = (
-        ref_line_direction / np.linalg.norm(ref_line_direction))
-
-    # Calculate the starting points of the perpendicular lines
-    start_point1 = np.array(
-        (x_start, y_start)) + ref_line_unit_vector * offset_along_line
-    start_point2 = np.array(
-        (x_end, y_end)) - ref_line_unit_vector * offset_along_line
-    # Calculate the distance between the
-    # two starting points of the perpendicular lines
-    distance_between_points = np.linalg.norm(start_point2 - start_point1)
-    # Divide the distance by the number of lines you want to draw
-    # (correas_lado + 1) to obtain the spacing between the lines
-    spacing = distance_between_points / (geo.correas_lado + 1)
-
-    add_vista_frontal_left_straps(
-        ref_line_unit_vector, start_point1, start_point2,
-        perpendicular_length, spacing, ax, geo)
-    add_vista_frontal_right_straps(
-        offset_along_line, perpendicular_length,
-        spacing, ax, geo, ui)
-
-    st.markdown("---")
-
-    # Show figure inside the app
-    col2.pyplot(fig_nave)
-    # Returns required local variables for future use.
-    return df_pilar, selector_pilar, df_viga, selector_viga
+    segmentos_modelo(estructura.vista("frontal")).draw(ax)
+    return fig_nave
 
 
 def display_text(
-    df_pilar, selector_pilar, df_viga, selector_viga, line_distance,
-    longitud_arrios, geo: Geometry, ui: UserInputs, col2) -> None:
+    quote: dict, perfiles: dict, precios: CostInputs, col2
+) -> None:
     """Displays any text alongside the graphs."""
     col2.text(
         "Leyenda.\n"
         "Rojo: Arriostramientos\n"
         "Azul: Porticos\n"
         "Verde: Correas")
-    pilar_peso_m = df_pilar.loc[
-        df_pilar["Perfil"] == selector_pilar, "gk [kg/m]"].iloc[0]
-    viga_peso_m = df_viga.loc[
-        df_viga["Perfil"] == selector_viga, "gk [kg/m]"].iloc[0]
-    peso_pilares = round(
-        ui.cantidad_porticos * 2 * ui.altura_alero * pilar_peso_m * 1.12/1000,
-        2)
-    peso_vigas = round(
-        ui.cantidad_porticos * 2 * geo.largo_riegel * viga_peso_m * 1.25/1000,
-        2)
-    largo_correas = (geo.correas_lado + 2) * 2 * ui.ancho_nave
-    cantidad_arriostra = int(geo.largo_riegel / line_distance) * 8
-    st.text(f"El peso de los pilares es {peso_pilares} to")
-    st.text(f"El peso de las vigas es {peso_vigas} to")
-    st.text(f"Hay {largo_correas}m de correas en la cubierta")
-    metros_arrios = longitud_arrios * cantidad_arriostra
-    pesos_arrios = round((metros_arrios * 3.55) / 1000, 2)
+    # All the math lives in the headless quote engine.
+    st.text(f"El peso de los pilares es {quote['peso_pilares']} to")
+    st.text(f"El peso de las vigas es {quote['peso_vigas']} to")
     st.text(
-        f"Hay un total de {cantidad_arriostra} arriostramientos RD24 con "
-        f"un total de {metros_arrios} metros y {pesos_arrios} to")
+        f"Hay {quote['cantidad_correas']} correas {perfiles['perfil_correa']}"
+        f" con {quote['metros_correas']:g}m y {quote['peso_correas']} to")
+    st.text(
+        f"Hay {quote['metros_wandriegel']:g}m de wandriegel "
+        f"{perfiles['perfil_wandriegel']} con {quote['peso_wandriegel']} to")
+    st.text(
+        f"Hay un total de {quote['cantidad_arriostra']} arriostramientos "
+        f"{perfiles['perfil_arriostramiento']} con un total de "
+        f"{quote['metros_arrios']} metros y {quote['pesos_arrios']} to")
     st.markdown("---")
-    pesototal = pesos_arrios + peso_vigas + peso_pilares
     st.text(
-        "Con un total de la estructura sin contar "
-        f"con las correas es: {pesototal} to.")
-    precio_mat = 1200
-    costes_material = precio_mat * pesototal
-    precio_taller = 900
-    costes_taller = precio_taller * pesototal
-    precio_monta = 400
-    costes_montaje = precio_monta * pesototal
-    precio_planif = 150
-    costes_planif = precio_planif * pesototal
-    factor_costes_empre = 0.1
-    factor_empresa = round(
-        factor_costes_empre * (
-            costes_planif + costes_montaje + costes_taller + costes_material))
+        "Con un total de la estructura, correas y wandriegel "
+        f"incluidos, de: {quote['pesototal']} to.")
+    factor_empresa = int(quote["factor_empresa"])
 
     st.text(
-        f"Con un precio para el material de media de {precio_mat},-€ "
-        f"el coste es {costes_material} €")
+        "Con un precio para el material de media de "
+        f"{precios.precio_mat:g},-€ "
+        f"el coste es {quote['costes_material']} €")
     st.text(
-        f"Con un precio de fabricación medio de {precio_taller},-€ "
-        f"el coste es {costes_taller} €")
+        "Con un precio de fabricación medio de "
+        f"{precios.precio_taller:g},-€ "
+        f"el coste es {quote['costes_taller']} €")
     st.text(
-        f"Con un precio de montaje medio de {precio_monta},-€ "
-        f"el coste es {costes_montaje} €")
+        "Con un precio de montaje medio de "
+        f"{precios.precio_monta:g},-€ "
+        f"el coste es {quote['costes_montaje']} €")
     st.text(
-        f"Con un precio de montaje medio de {precio_planif},-€ "
-        f"el coste es {costes_planif} €")
+        "Con un precio de montaje medio de "
+        f"{precios.precio_planif:g},-€ "
+        f"el coste es {quote['costes_planif']} €")
     st.text(
-        "Se añade un facor de 10% para cubrir los costes de empresa. "
-        f"La suma asciende a {factor_empresa} €")
+        "Se añade un facor de "
+        f"{precios.factor_costes_empre * 100:g}% para cubrir los costes "
+        f"de empresa. La suma asciende a {factor_empresa} €")
     st.markdown("---")
-    costes_totales = (
-        factor_empresa + costes_planif + costes_montaje
-        + costes_taller + costes_material)
-    costes_portonelada = round(costes_totales / pesototal, 2)
     st.text(
-        f"Los costes totales ascienden a {costes_totales} € "
-        f"o lo que es lo mismo {costes_portonelada} €/to")
-
-
-def point_along_line(pt1, pt2, distance) -> list:
-    pt1_np = np.array(pt1)
-    pt2_np = np.array(pt2)
-
-    # Calculate the direction vector
-    direction = pt2_np - pt1_np
-    # Normalize the direction vector
-    unit_vector = direction / np.linalg.norm(direction)
-    # Multiply the unit vector by the desired distance
-    displacement = unit_vector * distance
-    # Add the displacement to the first point's coordinates
-    result = pt1_np + displacement
-
-    return result.tolist()
-
-
-def rotate_vector(vector, degrees):
-    radians = np.radians(degrees)
-    rotation_matrix = np.array(
-        (
-            (np.cos(radians), -np.sin(radians)),
-            (np.sin(radians), np.cos(radians))
-        )
-    )
-    return np.matmul(rotation_matrix, vector)
+        f"Los costes totales ascienden a {quote['costes_totales']} € "
+        f"o lo que es lo mismo {quote['costes_portonelada']} €/to")
+
+
+def display_listado(lineas: tuple, xlsx: bytes) -> None:
+    """Downloads of the itemized bill of materials of the quote."""
+    col_xlsx, col_csv = st.columns(2)
+    col_xlsx.download_button(
+        "Descargar listado (XLSX)", xlsx, file_name="listado.xlsx",
+        mime="application/vnd.openxmlformats-officedocument"
+             ".spreadsheetml.sheet")
+    col_csv.download_button(
+        "Descargar listado (CSV)", listado.csv_texto(lineas),
+        file_name="listado.csv", mime="text/csv")
+
+
+def display_riesgo(ejecucion: grafo.Ejecucion, col2) -> None:
+    """Monte Carlo percentiles of the costs with uncertain unit rates."""
+    expander = col2.expander("Riesgo de precios (Monte Carlo)")
+    variacion = expander.slider(
+        "Variación de los precios (%)", min_value=0, max_value=50,
+        value=round(riesgo.VARIACION * 100), step=1)
+    distribucion = expander.radio(
+        "Distribución", ("triangular", "uniforme", "normal"),
+        horizontal=True)
+    if not expander.checkbox("Simular"):
+        return
+    ejecucion.update(variacion=variacion / 100, distribucion=distribucion)
+    analisis = ejecucion["riesgo_precios"]
+    expander.text(f"{riesgo.MUESTRAS:,} escenarios de precios".replace(
+        ",", " "))
+    for p, total, por_tonelada in zip(
+        analisis["percentiles"], analisis["costes_totales"],
+        analisis["costes_portonelada"]
+    ):
+        expander.text(
+            f"P{p}: {total:,.0f} € ({por_tonelada:,.2f} €/to)".replace(
+                ",", " "))
+
+
+def display_comprobacion(ejecucion: grafo.Ejecucion, col2) -> None:
+    """
+    Utilization of every catalog profile for the current frame, and of
+    the selected ones.
+    """
+    expander = col2.expander("Comprobación de perfiles")
+    miembro = expander.radio(
+        "Comprobar como", ("viga", "pilar"), horizontal=True)
+    if not expander.checkbox("Comprobar el catálogo"):
+        return
+    ejecucion.update(miembro=miembro)
+    tabla = ejecucion["comprobacion_perfiles"]
+    seleccionado = tabla.loc[
+        (tabla["familia"] == ejecucion[f"familia_{miembro}"])
+        & (tabla["perfil"] == ejecucion[f"perfil_{miembro}"])]
+    if len(seleccionado):
+        fila = seleccionado.iloc[0]
+        expander.text(
+            f"{fila['perfil']}: aprovechamiento {fila['aprovechamiento']:.0%}"
+            + ("" if fila["valido"] else " (no cumple)"))
+    expander.text(
+        f"{int(tabla['valido'].sum())} de {len(tabla)} perfiles cumplen")
+    expander.dataframe(tabla)
+
+
+def display_variantes(ejecucion: grafo.Ejecucion, col2) -> None:
+    """
+    Saves the current inputs as a variant of the session and compares the
+    saved variants against a base one.
+    """
+    expander = col2.expander("Comparar variantes")
+    guardadas = st.session_state.setdefault("variantes", [])
+    nombre = expander.text_input(
+        "Nombre de la variante", value=f"Variante {len(guardadas) + 1}")
+    col_guardar, col_borrar = expander.columns(2)
+    if col_guardar.button("Guardar variante"):
+        perfiles = ejecucion["perfiles"]
+        variante = {
+            name: ejecucion[name] for name in variantes.CAMPOS
+            if name not in variantes.PESOS}
+        variante.update(
+            {name: float(perfiles[name]) for name in variantes.PESOS},
+            nombre=nombre)
+        error = variantes.guardar(guardadas, variante)
+        if error:
+            expander.warning(error)
+    if col_borrar.button("Borrar variantes"):
+        guardadas.clear()
+    if not guardadas:
+        expander.text("Guarda variantes para compararlas")
+        return
+    base = expander.selectbox(
+        "Variante base", [variante["nombre"] for variante in guardadas])
+    # Only the variants saved since the last rerun are quoted
+    comparacion = variantes.tabla(guardadas, variantes.evaluar(
+        guardadas, ejecucion["tablas_secundarias"],
+        ejecucion["firma_catalogo"]))
+    expander.dataframe(comparacion)
+    expander.text(f"Diferencias respecto a {base}")
+    expander.dataframe(variantes.deltas(comparacion, base))
+
+
+def display_medicion(medicion: dict, col2) -> None:
+    """Quantities measured on the drawn model, without waste factors."""
+    expander = col2.expander("Medición del modelo")
+    for perfil, nombre, cantidad, metros, peso in zip(*medicion.values()):
+        if not cantidad:
+            continue
+        texto = f"{perfil.capitalize()}: {cantidad} x {nombre or '-'}, "
+        texto += f"{metros:.1f} m"
+        if not math.isnan(peso):
+            texto += f", {peso:.2f} to"
+        expander.text(texto)
+
+
+def display_modelo_3d(glb: bytes, col2) -> None:
+    """Download of the whole hall as a 3D model."""
+    col2.download_button(
+        "Descargar modelo 3D (glTF)", glb,
+        file_name="nave.glb", mime="model/gltf-binary")
+
+
+def display_planos(planos_cad: dict, col2) -> None:
+    """Downloads of both views of the whole hall as CAD drawings."""
+    col_dxf, col_svg = col2.columns(2)
+    col_dxf.download_button(
+        "Descargar planos (DXF)", planos_cad["dxf"], file_name="nave.dxf",
+        mime="image/vnd.dxf")
+    col_svg.download_button(
+        "Descargar planos (SVG)", planos_cad["svg"], file_name="nave.svg",
+        mime="image/svg+xml")
+
+
+def display_optimizador(dfs: dict, ui: UserInputs, col1) -> None:
+    """
+    Searches the lightest pillar and beam profiles, portal count and
+    spacings for the current hall length.
+    """
+    longitud_nave = (
+        2 * ui.distancia_porticos_finales
+        + (ui.cantidad_porticos - 3) * ui.distancia_porticos_internos)
+    expander = col1.expander("Optimizador de perfiles")
+    objetivo = expander.radio(
+        "Minimizar", tuple(optimizador.OBJETIVOS), horizontal=True)
+    if not expander.button("Buscar la combinación óptima"):
+        return
+    result = optimizador.optimizar(
+        dfs, ui.ancho_nave, ui.altura_alero, ui.inclinacion_tejado,
+        longitud_nave, objetivo=objetivo)
+    if result is None:
+        expander.text(
+            f"No hay ninguna combinación válida para {longitud_nave:.1f}m")
+        return
+    expander.text(
+        f"{result['cantidad_porticos']} pórticos, "
+        f"{result['distancia_porticos_finales']}m en los extremos y "
+        f"{result['distancia_porticos_internos']}m entre los internos\n"
+        f"Pilares: {result['perfil_pilar']}\n"
+        f"Vigas: {result['perfil_viga']}\n"
+        f"Aprovechamiento: pilares {result['aprovechamiento_pilar']:.2f}, "
+        f"vigas {result['aprovechamiento_viga']:.2f}\n"
+        f"Peso total: {result['pesototal']:.2f} to\n"
+        f"Costes totales: {result['costes_totales']:.0f} €\n"
+        f"Combinaciones evaluadas: {result['configuraciones']}")
+    expander.caption(
+        "Estimación de predimensionado con cargas simplificadas "
+        "(ver Comprobación de perfiles); no sustituye al cálculo "
+        "estructural.")
+
+
+def display_perfilado(registro: dict, sidebar) -> None:
+    """Debug panel with the measurements of the last rerun."""
+    sidebar.markdown("---")
+    sidebar.text(f"Rerun: {registro['total_ms']:.1f} ms")
+    sidebar.table({
+        "Etapa": [etapa["etapa"] for etapa in registro["etapas"]],
+        "ms": [f"{etapa['ms']:.1f}" for etapa in registro["etapas"]],
+        "Artistas": [etapa["artistas"] for etapa in registro["etapas"]],
+        "Pico kB (proceso)": [
+            etapa["pico_kb"] for etapa in registro["etapas"]],
+    })
+    nodos = registro.get("nodos")
+    if nodos:
+        sidebar.text(
+            "Recalculados: " + (", ".join(nodos["recalculado"]) or "-")
+            + "\nOmitidos: " + (", ".join(nodos["omitido"]) or "-"))
+    vistas = registro.get("cache_vistas")
+    if vistas:
+        sidebar.text(
+            f"Caché de vistas: {vistas['entradas']} imágenes, "
+            f"{vistas['bytes'] / 1024:.0f} kB\n"
+            f"Aciertos {vistas['hits']}, fallos {vistas['misses']}, "
+            f"desalojos {vistas['evictions']}")
+    sidebar.caption(f"Registro en {perfilado.LOG}")
 
 
 def main() -> None:
@@ -668,18 +578,59 @@ def main() -> None:
     st.set_page_config(layout="wide")
     st.title(TITLE)
     st.markdown("---")
-
-    dfs = get_data_frames()
-    col1, col2 = st.columns(2)
-    ui = UserInputs(col1)
-    geo = Geometry(ui)
-
-    line_distance, longitud_arrios = display_vista_superior(geo, ui, col2)
-    df_pilar, selector_pilar, df_viga, selector_viga = (
-        display_vista_frontal(dfs, geo, ui, col1, col2))
-    display_text(
-        df_pilar, selector_pilar, df_viga, selector_viga,
-        line_distance, longitud_arrios, geo, ui, col2)
+    # Catalog and matplotlib load while the widgets are sent
+    arranque.precargar(DB_FOLDER)
+
+    debug = st.sidebar.checkbox("Perfilado de la ejecución")
+    perfil = perfilado.Perfilador(
+        "calculadora", debug or perfilado.activado_por_entorno(),
+        st.session_state.setdefault("sesion", uuid.uuid4().hex[:8]))
+    calculo = calculation_graph()
+    try:
+        col1, col2 = st.columns(2)
+        with perfil.etapa("UserInputs"):
+            ui = UserInputs(col1)
+            ejecucion = calculo.ejecucion(
+                firma_catalogo=catalogo.file_signature(DB_FOLDER), **vars(ui))
+        with perfil.etapa("get_data_frames"):
+            dfs = ejecucion["catalogo"]
+
+        with perfil.etapa("select_profiles"):
+            ejecucion.update(**select_profiles(dfs, col1))
+            precios = CostInputs(col1)
+            ejecucion.update(**vars(precios))
+
+        with perfil.etapa("display_vista_superior"):
+            display_vista_superior(ejecucion["vista_superior"], col2)
+        with perfil.etapa("display_vista_frontal"):
+            display_vista_frontal(ejecucion["vista_frontal"], col2)
+        with perfil.etapa("display_text"):
+            display_text(
+                ejecucion["quote"], ejecucion["perfiles_secundarios"],
+                precios, col2)
+        with perfil.etapa("display_listado"):
+            display_listado(ejecucion["lineas"], ejecucion["listado_xlsx"])
+        with perfil.etapa("display_riesgo"):
+            display_riesgo(ejecucion, col2)
+        with perfil.etapa("display_comprobacion"):
+            display_comprobacion(ejecucion, col2)
+        with perfil.etapa("display_variantes"):
+            display_variantes(ejecucion, col2)
+        with perfil.etapa("display_medicion"):
+            display_medicion(ejecucion["medicion"], col2)
+        with perfil.etapa("display_modelo_3d"):
+            display_modelo_3d(ejecucion["modelo_3d"], col2)
+        with perfil.etapa("display_planos"):
+            display_planos(ejecucion["planos_cad"], col2)
+        with perfil.etapa("display_optimizador"):
+            display_optimizador(dfs, ui, col1)
+        perfil.anotar("nodos", ejecucion.informe())
+        perfil.anotar("cache_vistas", cache_vistas.vistas.stats())
+    finally:
+        # Also on the exception Streamlit raises to stop a rerun
+        registro = perfil.terminar()
+    if debug and registro is not None:
+        display_perfilado(registro, st.sidebar)
 
 
 
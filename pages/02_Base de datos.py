@@ -1,7 +1,8 @@
+import math
+
 import streamlit as st
-import pandas as pd
-import os
 
+from nave import almacen, arranque, buscador, catalogo
 
 
 st.set_page_config(page_title="Perfiles de acero",
@@ -11,8 +12,9 @@ st.set_page_config(page_title="Perfiles de acero",
 
 
 st.markdown("<h3>Tabla seleccionada</h3>", unsafe_allow_html=True)
-# Get list of excel files in the specified directory
-excel_files = [file for file in os.listdir("DBs") if file.endswith(".xlsx")]
+# The catalog loads in the background while the sidebar is drawn
+arranque.precargar(graficos=False, almacen=True)
+excel_files = catalogo.file_names()
 excel_files_without_ext = [file.replace('.xlsx','') for file in excel_files]
 
 
@@ -21,38 +23,22 @@ st.sidebar.title("Filtros")
 
 # Add selector combobox
 selected_file = st.sidebar.selectbox("Selecciona el tipo de perfil", excel_files_without_ext)
-selected_file = f"{selected_file}.xlsx"
-# Read the selected excel file and display first sheet as dataframe
-df = pd.read_excel(os.path.join("DBs", selected_file))
-
-
-# Set the first column as the index
-df = df.set_index(df.columns[0])
-
-# Transpose the DataFrame
-df = df.T
-df.rename(columns=lambda x: x.replace("_x000D_", "_"), inplace=True)
-
-
-# Set the columns as the new index
-df.index.name = "Perfil"
-df.reset_index(inplace=True)
-df.rename(columns={'index':df.index.name}, inplace=True)
-
-# Get the first column name
-first_col = df.columns[0]
-
- 
-
+# Filter the shared columns of every family instead of the selected one
+all_families = st.sidebar.checkbox("Filtrar en todas las familias")
+familia = None if all_families else selected_file
+# Wait for the SQLite store, brought up to date in the background
+arranque.almacen_listo()
 
 # Add checkbox to select all
 select_all = st.sidebar.checkbox("Mostrar todas las columnas")
 
 # Get options for multiselect
-options = df.columns
+options = almacen.columnas(familia)
 
 # Default columns
-default_select = [options[0], "gk [kg/m]", "Superficie_revestimiento [m²/m]"]
+default_select = [column for column in (
+   almacen.FAMILIA, "Perfil", "gk [kg/m]", "Superficie_revestimiento [m²/m]")
+   if column in options]
 
 # Create multiselect
 if not select_all:
@@ -60,51 +46,44 @@ if not select_all:
 else:
    selected_rows = options
 
-# Display only the selected rows
-st.dataframe(df[selected_rows])
+# Add a range slider for every filter column with data
+st.sidebar.subheader("Rangos")
+filtros = {}
+for column, (low, high) in almacen.rangos(familia).items():
+   if low < high:
+      value = st.sidebar.slider(
+         column, min_value=low, max_value=high, value=(low, high))
+      # Untouched ranges do not filter, so families without the column
+      # are still listed
+      if tuple(value) != (low, high):
+         filtros[column] = value
+
+# Only the visible page of the matching rows is read from the store
+total = almacen.contar(filtros, familia)
+pages = max(1, math.ceil(total / almacen.TAMANO_PAGINA))
+page = 1
+if pages > 1:
+   page = st.number_input(
+      "Página", min_value=1, max_value=pages, value=1, step=1)
+st.caption(f"{total} perfiles, página {page} de {pages}")
+st.dataframe(almacen.consultar(filtros, familia, selected_rows, page - 1))
 
 
 st.markdown("<h3>Buscador de perfiles</h3>", unsafe_allow_html=True)
 # Create input box to search for value
 search_value = st.text_input("Escribe el perfil a buscar con al menos dos letras:")
 
-# Create empty dataframe to store results
-results_df = pd.DataFrame()
 if len(search_value) >=2:
-# Loop through excel files
-   for file in excel_files:
-      # Read excel file
-      df2 = pd.read_excel(os.path.join("DBs", file))
-      # Filter dataframe to include only rows with the search value in the first column
-      # Transpose the DataFrame
-      # Set the first column as the index
-      df2 = df2.set_index(df2.columns[0])
-      df2 = df2.T
-      df2.rename(columns=lambda x: x.replace("_x000D_", "_"), inplace=True)
-      # Set the columns as the new index
-      df2.index.name = "Perfil"
-      df2.reset_index(inplace=True)
-      df2.rename(columns={'index':df2.index.name}, inplace=True)
-      # Get the first column name
-      first_col = df2.columns[0]
-
-      # Rename the first column
-      df2 = df2.rename(columns={first_col: "Perfil"})
-
-      # Filter dataframe to include only rows with the search value in the first column
-      if ' ' in search_value:
-         search_values = [search_value, search_value.replace(' ', '')]
-      else:
-         search_values = [search_value]
-
-      for val in search_values:
-         filtered_df = df2[df2.iloc[:,0].str.contains(val, case=False, na=False)]
-         results_df = pd.concat([results_df, filtered_df])
-
-
+   # Load every catalog, waiting for the warm-up if it is still running
+   dfs = arranque.catalogo_listo()
+   # Look the value up in the prebuilt index of all catalogs
+   index = buscador.get_search_index(dfs)
+   hits = index.search(search_value)
+   # Build the results table in a single pass
+   results_df = index.table(hits, list(selected_rows))
 
    # Display results dataframe
-   st.dataframe(results_df[selected_rows])
+   st.dataframe(results_df)
 else: 
    st.text("Entrada insuficiente")
 
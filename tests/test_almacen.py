@@ -0,0 +1,68 @@
+import os
+import sqlite3
+import threading
+
+import pytest
+
+from nave import almacen
+
+
+def crear(path, valor):
+    tmp = path.with_name(f"{path.name}.tmp")
+    conexion = sqlite3.connect(tmp)
+    with conexion:
+        conexion.execute("CREATE TABLE meta (clave TEXT, valor TEXT)")
+        conexion.execute("INSERT INTO meta VALUES ('firma', ?)", (valor,))
+    conexion.close()
+    os.replace(tmp, path)
+    return path
+
+
+def leer(conexion):
+    return conexion.execute("SELECT valor FROM meta").fetchone()[0]
+
+
+@pytest.fixture
+def base(tmp_path):
+    return crear(tmp_path / "catalogo.sqlite", "a")
+
+
+def test_concurrent_searches_use_their_own_connection(base):
+    dentro = threading.Event()
+    salir = threading.Event()
+    conexiones = []
+
+    def buscar():
+        with almacen._conectar(base) as conexion:
+            conexiones.append(conexion)
+            dentro.set()
+            salir.wait(5)
+
+    hilo = threading.Thread(target=buscar)
+    hilo.start()
+    assert dentro.wait(5)
+    try:
+        # Not serialized behind the search in progress
+        with almacen._conectar(base) as conexion:
+            assert conexion is not conexiones[0]
+            assert leer(conexion) == "a"
+    finally:
+        salir.set()
+        hilo.join()
+
+
+def test_connections_are_reused(base):
+    with almacen._conectar(base) as primera:
+        pass
+    with almacen._conectar(base) as segunda:
+        assert segunda is primera
+
+
+def test_rebuilt_file_is_reopened(base):
+    with almacen._conectar(base) as conexion:
+        assert leer(conexion) == "a"
+    stat = base.stat()
+    crear(base, "b")
+    os.utime(base, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    with almacen._conectar(base) as conexion:
+        assert leer(conexion) == "b"
@@ -0,0 +1,60 @@
+import os
+import threading
+
+import pytest
+
+from nave import almacen, arranque, catalogo
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def guardar(path, ancho, alto):
+    Image.new("RGBA", (ancho, alto), (200, 30, 30, 255)).save(path)
+    return path
+
+
+def test_wide_image_is_scaled_into_the_cache(tmp_path):
+    original = guardar(tmp_path / "nave.png", 2000, 1000)
+    copia = arranque.imagen(original, 500, tmp_path / "cache")
+    assert copia.parent == tmp_path / "cache"
+    with Image.open(copia) as imagen:
+        assert imagen.size == (500, 250)
+    with Image.open(original) as imagen:
+        assert imagen.size == (2000, 1000)
+    # Served from the cache until the original changes
+    assert arranque.imagen(original, 500, tmp_path / "cache") == copia
+    assert [p.name for p in copia.parent.iterdir()] == [copia.name]
+
+
+def test_changed_original_is_scaled_again(tmp_path):
+    original = guardar(tmp_path / "nave.png", 2000, 1000)
+    copia = arranque.imagen(original, 500, tmp_path / "cache")
+    guardar(original, 1000, 1000)
+    stat = copia.stat()
+    os.utime(original, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    with Image.open(arranque.imagen(original, 500, tmp_path / "cache")) as i:
+        assert i.size == (500, 500)
+
+
+def test_narrow_image_is_served_as_it_is(tmp_path):
+    original = guardar(tmp_path / "nave.png", 400, 300)
+    assert arranque.imagen(original, 500, tmp_path / "cache") == original
+    assert not (tmp_path / "cache").exists()
+
+
+def test_store_is_brought_up_to_date_in_the_background(monkeypatch):
+    hilos = []
+
+    def actualizar(db_folder):
+        hilos.append(threading.current_thread().name)
+        return "base"
+
+    monkeypatch.setattr(almacen, "actualizar", actualizar)
+    monkeypatch.setattr(arranque, "_tareas", {})
+    folder = catalogo.DB_FOLDER
+    arranque.precargar(folder, graficos=False, almacen=True)
+    assert arranque.almacen_listo(folder) == "base"
+    assert arranque.almacen_listo(folder) == "base"
+    # Built once off the page's thread; later runs only check it
+    assert hilos == [
+        f"nave-almacen:{folder}", *[threading.current_thread().name] * 2]
@@ -0,0 +1,75 @@
+import pytest
+
+from nave import buscador
+
+pd = pytest.importorskip("pandas")
+
+
+@pytest.fixture(scope="module")
+def indice():
+    return buscador.SearchIndex({
+        "IPE.xlsx": pd.DataFrame({
+            "Perfil": ["IPE 300", "IPE 330", "IPE 30", None, "IPE 3000"],
+            "gk [kg/m]": [42.2, 49.1, 3.0, None, 400.0],
+        }),
+        "Otros.xlsx": pd.DataFrame({
+            "Perfil": ["HE 300 A", "XIPE 30", "ipe30"],
+            "h [mm]": [290, 30, 30],
+        }),
+    })
+
+
+def nombres(indice, entries):
+    return [indice.names[entry] for entry in entries]
+
+
+def test_normalize_ignores_case_and_spaces():
+    assert buscador.normalize(" IPE 300 ") == "ipe300"
+    assert buscador.normalize("Ipe300") == buscador.normalize("ipe 3 00")
+
+
+def test_exact_then_prefix_then_substring(indice):
+    assert nombres(indice, indice.search("IPE 30")) == [
+        # Exact, in catalog order
+        "IPE 30", "ipe30",
+        # Prefix, shorter first
+        "IPE 300", "IPE 3000",
+        # Elsewhere in the name
+        "XIPE 30"]
+
+
+def test_spellings_find_the_same_profiles(indice):
+    assert indice.search("ipe300") == indice.search("IPE 300")
+    assert nombres(indice, indice.search("Ipe 3 00")) == [
+        "IPE 300", "IPE 3000"]
+
+
+def test_substring_ranks_by_position(indice):
+    # Earlier first, then shorter
+    assert nombres(indice, indice.search("30")) == [
+        "HE 300 A", "IPE 30", "ipe30", "IPE 300", "IPE 3000", "IPE 330",
+        "XIPE 30"]
+
+
+def test_short_queries_find_nothing(indice):
+    assert indice.search("") == []
+    assert indice.search("I") == []
+    assert indice.search(" i ") == []
+    assert nombres(indice, indice.search("HE")) == ["HE 300 A"]
+
+
+def test_limit_and_missing_names(indice):
+    assert nombres(indice, indice.search("ipe", limit=2)) == [
+        "IPE 30", "ipe30"]
+    assert indice.search("HEB") == []
+    assert nombres(indice, indice.prefix("ipe 33")) == ["IPE 330"]
+
+
+def test_table_reads_the_hits_of_every_catalog(indice):
+    tabla = indice.table(indice.search("ipe30"), ["Perfil", "gk [kg/m]"])
+    assert list(tabla.columns) == [
+        buscador.CATALOG_COLUMN, "Perfil", "gk [kg/m]"]
+    assert list(tabla[buscador.CATALOG_COLUMN]) == [
+        "IPE", "Otros", "IPE", "IPE", "Otros"]
+    assert tabla["gk [kg/m]"][0] == 3.0
+    assert tabla["gk [kg/m]"].isna()[1]
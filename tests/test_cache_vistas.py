@@ -0,0 +1,44 @@
+from nave import cache_vistas
+
+
+def test_counts_hits_and_misses():
+    cache = cache_vistas.CacheVistas(100)
+    assert cache.get("a") is None
+    cache.put("a", b"x" * 10)
+    assert cache.get("a") == b"x" * 10
+    assert cache.get("a", b"") == b"x" * 10
+    assert cache.get("b", b"") == b""
+    assert cache.stats() == {
+        "entradas": 1, "bytes": 10, "hits": 2, "misses": 2, "evictions": 0}
+
+
+def test_evicts_the_least_recently_used_by_size():
+    cache = cache_vistas.CacheVistas(100)
+    for key in "abc":
+        cache.put(key, b"x" * 40)
+    # a and b do not leave room for c
+    assert list(cache.entradas) == ["b", "c"]
+    cache.get("b")
+    cache.put("d", b"x" * 60)
+    assert list(cache.entradas) == ["b", "d"]
+    cache.put("e", b"x" * 30)
+    assert list(cache.entradas) == ["d", "e"]
+    stats = cache.stats()
+    assert stats["bytes"] == 90 and stats["evictions"] == 3
+
+
+def test_replacing_a_key_frees_its_bytes():
+    cache = cache_vistas.CacheVistas(100)
+    cache.put("a", b"x" * 60)
+    cache.put("a", b"x" * 80)
+    assert cache.stats()["bytes"] == 80
+    assert cache.stats()["evictions"] == 0
+
+
+def test_images_larger_than_the_cache_are_not_kept():
+    cache = cache_vistas.CacheVistas(100)
+    cache.put("a", b"x" * 50)
+    cache.put("b", b"x" * 101)
+    assert list(cache.entradas) == ["a"]
+    cache.clear()
+    assert cache.stats()["entradas"] == cache.stats()["bytes"] == 0
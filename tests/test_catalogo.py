@@ -0,0 +1,27 @@
+import shutil
+import threading
+
+import pytest
+
+from nave import catalogo
+
+pytest.importorskip("openpyxl")
+FICHEROS = ("RD - Profile.xlsx", "T-Profil.xlsx")
+
+
+def test_pool_started_from_a_thread_parses_like_one_process(tmp_path):
+    for name in FICHEROS:
+        shutil.copy(catalogo.DB_FOLDER / name, tmp_path / name)
+    paths = sorted(tmp_path.glob("*.xlsx"))
+    resultado = {}
+
+    def parsear():
+        resultado["dfs"] = catalogo._parse(paths, 2)
+
+    # As the warm-up of nave.arranque does
+    hilo = threading.Thread(target=parsear, daemon=True)
+    hilo.start()
+    hilo.join()
+    assert len(resultado["dfs"]) == len(paths)
+    for path, df in zip(paths, resultado["dfs"]):
+        assert df.equals(catalogo.read_excel_catalog(path))
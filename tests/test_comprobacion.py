@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from nave import catalogo, comprobacion
+
+
+@pytest.fixture(scope="module")
+def secciones():
+    return comprobacion.Secciones(catalogo.load_catalog(), ("IPE",))
+
+
+@pytest.mark.parametrize("curva, chi", (
+    ("a", 0.6656), ("b", 0.5970), ("c", 0.5399), ("d", 0.4671)))
+def test_reduction_factor_of_the_buckling_curves(curva, chi):
+    # EN 1993-1-1 figure 6.4 at a relative slenderness of 1
+    assert comprobacion.reduccion_pandeo(
+        1.0, comprobacion.CURVAS[curva]) == pytest.approx(chi, abs=1e-4)
+    # Stocky members do not buckle
+    assert comprobacion.reduccion_pandeo(
+        np.array((0.0, 0.2)), comprobacion.CURVAS[curva]).tolist() == [
+            1.0, 1.0]
+
+
+def test_ipe300_by_hand(secciones):
+    """
+    IPE300: A = 53.81 cm², Iy = 8355.96 cm⁴, Wel,y = 557.06 cm³,
+    iy = 12.46 cm (curve a), iz = 3.35 cm (curve b). Frame of 18 m span,
+    4 m eaves and 6 m of roof at 1 kN/m², so q = 6 kN/m:
+
+        M = 1.5·6·18²/12 = 243 kNm       flexion = 243e3/(557.06·235)
+        w = 5·6·18000⁴/(384·210000·8355.96e4) = 467.37 mm over 90 mm
+        N = 1.5·6·18/2 = 81 kN
+        λy = 2·400/(12.46·93.91) = 0.684     χy = 0.855
+        λz = 400/(3.35·93.91) = 1.271        χz = 0.441
+        pandeo = 81/(0.441·53.81·23.5) + flexion
+    """
+    i = list(secciones.perfil).index("IPE300")
+    resultados = comprobacion.aprovechamientos(secciones, 18.0, 4.0, 6.0)
+    assert resultados["flexion"][i] == pytest.approx(1.85625, rel=1e-4)
+    assert resultados["flecha"][i] == pytest.approx(5.19304, rel=1e-4)
+    assert resultados["pandeo"][i] == pytest.approx(2.00153, rel=1e-4)
+
+
+def test_table_puts_the_lightest_valid_profiles_first(secciones):
+    tabla = comprobacion.comprobar(
+        None, 18.0, 4.0, 5, 5.5, 6.0, "viga", secciones=secciones)
+    assert len(tabla) == len(secciones)
+    validos = tabla["valido"].to_numpy()
+    # Valid ones first, each group by weight
+    assert (np.diff(validos.astype(int)) <= 0).all()
+    for grupo in (tabla[validos], tabla[~validos]):
+        assert grupo["gk [kg/m]"].is_monotonic_increasing
+    assert (tabla["aprovechamiento"][validos] <= 1).all()
+    np.testing.assert_array_equal(
+        tabla["aprovechamiento"],
+        tabla[["flexion", "flecha"]].max(axis=1))
+
+
+def test_unknown_member_is_rejected(secciones):
+    with pytest.raises(ValueError):
+        comprobacion.comprobar(
+            None, 18.0, 4.0, 5, 5.5, 6.0, "correa", secciones=secciones)
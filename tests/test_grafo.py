@@ -0,0 +1,84 @@
+import pytest
+
+from nave import grafo
+
+
+@pytest.fixture
+def calculo():
+    """A graph a -> doble -> suma <- b, counting the calls of each node."""
+    g = grafo.Grafo("prueba")
+    llamadas = {"doble": 0, "suma": 0, "nada": 0}
+
+    @g.nodo("a")
+    def doble(e):
+        llamadas["doble"] += 1
+        return 2 * e.a
+
+    @g.nodo("doble", "b")
+    def suma(e):
+        llamadas["suma"] += 1
+        return e.doble + e.b
+
+    @g.nodo("a")
+    def nada(e):
+        llamadas["nada"] += 1
+        return None
+
+    return g, llamadas
+
+
+def test_nodes_are_computed_once_per_input(calculo):
+    g, llamadas = calculo
+    assert g.ejecucion(a=1, b=10)["suma"] == 12
+    ejecucion = g.ejecucion(a=1, b=10)
+    assert ejecucion["suma"] == 12
+    assert llamadas == {"doble": 1, "suma": 1, "nada": 0}
+    assert ejecucion.informe() == {"recalculado": [], "omitido": ["suma"]}
+
+
+def test_a_change_recomputes_only_what_depends_on_it(calculo):
+    g, llamadas = calculo
+    g.ejecucion(a=1, b=10)["suma"]
+    ejecucion = g.ejecucion(a=1, b=20)
+    assert ejecucion["suma"] == 22
+    assert llamadas == {"doble": 1, "suma": 2, "nada": 0}
+    assert ejecucion.informe() == {
+        "recalculado": ["suma"], "omitido": ["doble"]}
+
+
+def test_none_values_are_memoized(calculo):
+    g, llamadas = calculo
+    assert g.ejecucion(a=1)["nada"] is None
+    ejecucion = g.ejecucion(a=1)
+    assert ejecucion["nada"] is None
+    assert llamadas["nada"] == 1
+    assert ejecucion.informe()["omitido"] == ["nada"]
+
+
+def test_redefined_function_is_not_served_stale_values(calculo):
+    g, llamadas = calculo
+    assert g.ejecucion(a=1)["doble"] == 2
+    g.definir("doble", lambda e: 3 * e.a, ("a",))
+    assert g.ejecucion(a=1)["doble"] == 3
+
+
+def test_used_values_can_not_change(calculo):
+    g, _ = calculo
+    ejecucion = g.ejecucion(a=1, b=10)
+    ejecucion.update(b=10, c=5)
+    with pytest.raises(ValueError):
+        ejecucion.update(a=2)
+
+
+def test_memo_keeps_the_latest_values():
+    memo = grafo.Memo(2)
+    memo.put("a", 1)
+    memo.put("b", None)
+    assert memo.get("a") == 1
+    memo.put("c", 3)
+    # b was used least recently
+    assert memo.get("b", "falta") == "falta"
+    assert memo.get("a") == 1 and memo.get("c") == 3
+    memo.put("d", None)
+    assert memo.get("d", "falta") is None
+    assert list(memo.entradas) == ["c", "d"]
@@ -0,0 +1,44 @@
+import pytest
+
+from nave import lote
+from nave.buscador import normalize
+
+PESOS = {normalize("IPE300"): 42.2}
+
+
+def fila(**cambios):
+    return {"perfil_pilar": "IPE300", "perfil_viga": "ipe 300", **cambios}
+
+
+@pytest.mark.parametrize("valor", ("7", "7.0", 7, 7.0))
+def test_whole_numbers_are_integers(valor):
+    args = lote.parsear(fila(cantidad_porticos=valor), PESOS)
+    assert args["cantidad_porticos"] == 7
+    assert isinstance(args["cantidad_porticos"], int)
+
+
+@pytest.mark.parametrize("name, valor", (
+    ("cantidad_porticos", "7.5"), ("cantidad_porticos", 6.999),
+    ("inclinacion_tejado", "12.3")))
+def test_fractional_counts_are_rejected(name, valor):
+    with pytest.raises(ValueError, match=name):
+        lote.parsear(fila(**{name: valor}), PESOS)
+
+
+@pytest.mark.parametrize("valor", ("nan", "inf", "x", 1000))
+def test_out_of_bounds_values_are_rejected(valor):
+    with pytest.raises(ValueError):
+        lote.parsear(fila(cantidad_porticos=valor), PESOS)
+
+
+def test_profiles_are_weighed_by_name():
+    args = lote.parsear(fila(), PESOS)
+    assert args["pilar_peso_m"] == args["viga_peso_m"] == 42.2
+    with pytest.raises(ValueError, match="Perfil desconocido"):
+        lote.parsear(fila(perfil_viga="IPE 301"), PESOS)
+
+
+@pytest.mark.parametrize("valor", ("inf", "nan", "-1"))
+def test_weights_must_be_finite(valor):
+    with pytest.raises(ValueError, match="pilar_peso_m"):
+        lote.parsear(fila(pilar_peso_m=valor), PESOS)
@@ -0,0 +1,72 @@
+import math
+import os
+
+import numpy as np
+import pytest
+
+from nave import mapeado
+
+pd = pytest.importorskip("pandas")
+
+
+def frames():
+    return {
+        "IPE.xlsx": pd.DataFrame({
+            "Perfil": ["IPE 300", "Perfil", None, "IPE ñ"],
+            "gk [kg/m]": [42.2, "gk [kg/m]", float("nan"), 1e-3],
+            "Norma": ["EN 10365", None, "", "DIN 1025-5"],
+            "h [mm]": [300, 330, 360, 400],
+        }),
+        "Vacio.xlsx": pd.DataFrame({"Perfil": pd.Series([], dtype=object)}),
+    }
+
+
+def textos(values):
+    """Text of a column; missing values as None."""
+    return [value if isinstance(value, str) else None for value in values]
+
+
+def test_round_trip(tmp_path):
+    path = mapeado.escribir(frames(), tmp_path / "catalogo.col", "firma")
+    dfs = mapeado.abrir(path, "firma")
+    assert list(dfs) == ["IPE.xlsx", "Vacio.xlsx"]
+    ipe = dfs["IPE.xlsx"]
+    assert list(ipe.columns) == ["Perfil", "gk [kg/m]", "Norma", "h [mm]"]
+    assert textos(ipe["Perfil"]) == ["IPE 300", "Perfil", None, "IPE ñ"]
+    assert ipe["Perfil"].isna().tolist() == [False, False, True, False]
+    # Text in a numeric column reads as NaN
+    gk = ipe["gk [kg/m]"].to_numpy()
+    assert gk.dtype == np.float64
+    assert gk[0] == 42.2 and gk[3] == 1e-3
+    assert math.isnan(gk[1]) and math.isnan(gk[2])
+    assert textos(ipe["Norma"]) == ["EN 10365", None, None, "DIN 1025-5"]
+    assert ipe["h [mm]"].tolist() == [300.0, 330.0, 360.0, 400.0]
+    assert len(dfs["Vacio.xlsx"]) == 0
+
+
+def test_numbers_are_views_of_the_mapping(tmp_path):
+    path = mapeado.escribir(frames(), tmp_path / "catalogo.col", "firma")
+    gk = mapeado.abrir(path, "firma")["IPE.xlsx"]["gk [kg/m]"].to_numpy()
+    assert not gk.flags.owndata and not gk.flags.writeable
+    # Every caller of the process shares one mapping
+    assert mapeado.abrir(path, "firma") is mapeado.abrir(path, "firma")
+
+
+def test_other_key_or_file_is_not_read(tmp_path):
+    path = mapeado.escribir(frames(), tmp_path / "catalogo.col", "firma")
+    assert mapeado.abrir(path, "otra") is None
+    assert mapeado.abrir(tmp_path / "falta.col", "firma") is None
+    (tmp_path / "roto.col").write_bytes(b"no es un catalogo")
+    assert mapeado.abrir(tmp_path / "roto.col", "firma") is None
+
+
+def test_rewrite_replaces_the_file(tmp_path):
+    path = mapeado.escribir(frames(), tmp_path / "catalogo.col", "vieja")
+    antes = mapeado.abrir(path, "vieja")
+    nuevos = frames()
+    nuevos["IPE.xlsx"].loc[0, "gk [kg/m]"] = 50.0
+    mapeado.escribir(nuevos, path, "nueva")
+    assert mapeado.abrir(path, "nueva")["IPE.xlsx"]["gk [kg/m]"][0] == 50.0
+    # The previous mapping is still readable
+    assert antes["IPE.xlsx"]["gk [kg/m]"][0] == 42.2
+    assert os.listdir(tmp_path) == ["catalogo.col"]
@@ -0,0 +1,112 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from nave import listado, modelo, modelo3d, parametros, presupuesto
+
+
+VALORES = {
+    name: limits["value"] for name, limits in parametros.LIMITES.items()}
+ANCHO_PERFIL = 0.3
+# Halls of every shape the bracing rule has to follow.
+NAVES = [
+    {**VALORES, "cantidad_porticos": porticos, "ancho_nave": ancho,
+     "inclinacion_tejado": inclinacion, "distancia_porticos_finales": d_fin}
+    for porticos, ancho, inclinacion, d_fin in itertools.product(
+        (3, 5, 12), (8.0, 18.0, 31.5), (3, 12, 25), (4.0, 5.5))]
+ALEROS = (3.0, 4.0, 6.5, 9.8, 12.0)
+
+
+def construir(args):
+    return modelo.construir(
+        **args, pilar_ancho=ANCHO_PERFIL, viga_ancho=ANCHO_PERFIL)
+
+
+def tipo(estructura, nombre, vista="superior"):
+    miembros = estructura.vista(vista)
+    return miembros[miembros["tipo"] == modelo.TIPOS.index(nombre)]
+
+
+def test_default_hall_has_48_braces():
+    braces = tipo(construir(VALORES), "arriostramiento")
+    assert len(braces) == 48
+
+
+@pytest.mark.parametrize("args", NAVES)
+def test_every_brace_is_drawn_once(args):
+    braces = tipo(construir(args), "arriostramiento")
+    extremos = np.column_stack(
+        (braces["x0"], braces["y0"], braces["x1"], braces["y1"]))
+    assert len(np.unique(extremos.round(6), axis=0)) == len(braces)
+
+
+@pytest.mark.parametrize("args", NAVES)
+def test_quote_bracing_matches_the_model(args):
+    medida = modelo.medicion(construir(args))
+    quote = presupuesto.pesos(**args, pilar_peso_m=0.0, viga_peso_m=0.0)
+    assert quote["cantidad_arriostra"] == (
+        medida["cantidad"][modelo.ARRIOSTRAMIENTO])
+    assert quote["metros_arrios"] == pytest.approx(
+        medida["metros"][modelo.ARRIOSTRAMIENTO], abs=0.005)
+
+
+@pytest.mark.parametrize("args", NAVES[::5])
+@pytest.mark.parametrize("altura_alero", ALEROS)
+def test_quote_measured_on_the_model(args, altura_alero):
+    args = {
+        **args, "altura_alero": altura_alero, "pilar_peso_m": 42.2,
+        "viga_peso_m": 30.7, "correa_peso_m": 10.4,
+        "wandriegel_peso_m": 8.6}
+    estructura = construir(args)
+    medida = modelo.medicion(estructura)
+    quote = presupuesto.pesos(**args)
+    longitud = presupuesto.longitud_nave(
+        args["cantidad_porticos"], args["distancia_porticos_finales"],
+        args["distancia_porticos_internos"])
+    assert medida["cantidad"][modelo.WANDRIEGEL] == (
+        quote["filas_wandriegel"] * 2)
+    assert medida["metros"][modelo.WANDRIEGEL] == pytest.approx(
+        quote["metros_wandriegel"])
+    assert medida["metros"][modelo.WANDRIEGEL] == pytest.approx(
+        len(tipo(estructura, "wandriegel", "frontal")) * longitud)
+    medido = modelo.pesos(estructura, **args)
+    assert medido.keys() == quote.keys()
+    for name, value in quote.items():
+        assert medido[name] == pytest.approx(value, abs=0.01), name
+
+
+def test_vectorized_bracing_matches_the_model():
+    columnas = {
+        name: np.array([args[name] for args in NAVES]) for name in VALORES}
+    quote = presupuesto.pesos(**columnas, pilar_peso_m=0.0, viga_peso_m=0.0)
+    medidas = [modelo.medicion(construir(args)) for args in NAVES]
+    np.testing.assert_array_equal(
+        quote["cantidad_arriostra"],
+        [medida["cantidad"][modelo.ARRIOSTRAMIENTO] for medida in medidas])
+    np.testing.assert_allclose(
+        quote["metros_arrios"],
+        [medida["metros"][modelo.ARRIOSTRAMIENTO] for medida in medidas],
+        atol=0.005)
+
+
+@pytest.mark.parametrize("altura_alero", ALEROS)
+def test_quote_wall_rails_match_the_drawing(altura_alero):
+    args = {**VALORES, "altura_alero": altura_alero}
+    # Rail ticks of one portal frame, on both walls
+    rails = len(tipo(construir(args), "wandriegel", "frontal"))
+    quote = presupuesto.presupuesto(
+        **args, pilar_peso_m=1.0, viga_peso_m=1.0, wandriegel_peso_m=1.0)
+    longitud = presupuesto.longitud_nave(
+        args["cantidad_porticos"], args["distancia_porticos_finales"],
+        args["distancia_porticos_internos"])
+    assert quote["filas_wandriegel"] * 2 == rails
+    assert quote["metros_wandriegel"] == pytest.approx(rails * longitud)
+
+    tabla = listado.partidas(
+        {**args, "pilar_peso_m": 1.0, "viga_peso_m": 1.0}, quote)
+    assert tabla["cantidad"][listado.PARTIDAS.index("Wandriegel")] == rails
+
+    vertices = modelo3d.construir(**args).mallas["wandriegel"][0]
+    caja = modelo3d.cajas((0, 0, 0), (0, 0, 1), 1, 1)[0]
+    assert len(vertices) // len(caja) == rails
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from nave import catalogo, comprobacion, optimizador, presupuesto
+from nave import secundarias
+
+
+# A hall of 27 m and the optimum found for it.
+NAVE = {"ancho_nave": 18.0, "altura_alero": 4.0, "inclinacion_tejado": 12.0}
+LONGITUD = 27.0
+
+
+@pytest.fixture(scope="module")
+def dfs():
+    return catalogo.load_catalog()
+
+
+@pytest.fixture(scope="module")
+def secciones(dfs):
+    return comprobacion.Secciones(dfs, catalogo.FAMILIAS_PORTICO)
+
+
+def test_known_optimum(dfs):
+    result = optimizador.optimizar(dfs, **NAVE, longitud_nave=LONGITUD)
+    assert (
+        result["cantidad_porticos"], result["distancia_porticos_finales"],
+        result["distancia_porticos_internos"]) == (6, 5.4, 5.4)
+    assert (result["perfil_pilar"], result["perfil_viga"]) == (
+        "IPE400", "IPE500")
+    assert result["pesototal"] == pytest.approx(21.15)
+    assert 0 < result["aprovechamiento_pilar"] <= 1
+    assert 0 < result["aprovechamiento_viga"] <= 1
+
+
+def test_profiles_are_the_lightest_that_pass_the_checks(dfs, secciones):
+    result = optimizador.optimizar(dfs, **NAVE, longitud_nave=LONGITUD)
+    hall = {
+        name: result[name] for name in (
+            "cantidad_porticos", "distancia_porticos_finales",
+            "distancia_porticos_internos")}
+    for miembro in ("pilar", "viga"):
+        tabla = comprobacion.comprobar(
+            None, **NAVE, **hall, miembro=miembro, secciones=secciones)
+        validos = tabla[tabla["valido"]]
+        ligeros = validos["gk [kg/m]"] == validos["gk [kg/m]"].min()
+        assert result[f"perfil_{miembro}"] in set(
+            validos.loc[ligeros, "perfil"])
+
+
+def test_no_configuration_is_lighter(dfs, secciones):
+    result = optimizador.optimizar(dfs, **NAVE, longitud_nave=LONGITUD)
+    configs = optimizador.configuraciones(LONGITUD)
+    tablas = secundarias.tablas(dfs)
+    for i in range(len(configs["cantidad_porticos"])):
+        hall = {name: values[i].item() for name, values in configs.items()}
+        pesos = {}
+        for miembro in ("pilar", "viga"):
+            tabla = comprobacion.comprobar(
+                None, **NAVE, **hall, miembro=miembro, secciones=secciones)
+            pesos[f"{miembro}_peso_m"] = tabla.loc[
+                tabla["valido"], "gk [kg/m]"].min()
+        args = {**NAVE, **hall, **pesos}
+        quote = presupuesto.presupuesto(
+            **args, **secundarias.dimensionar(tablas, **args))
+        assert quote["pesototal"] >= result["pesototal"] - 1e-9
+
+
+def test_capacity_is_the_load_at_full_utilization(secciones):
+    separacion = 5.7
+    for miembro in ("pilar", "viga"):
+        capacidad = comprobacion.capacidad(
+            secciones, NAVE["ancho_nave"], NAVE["altura_alero"], miembro)
+        resultados = comprobacion.aprovechamientos(
+            secciones, NAVE["ancho_nave"], NAVE["altura_alero"], separacion)
+        aprovechamiento = np.max(
+            [resultados[name] for name in comprobacion.MIEMBROS[miembro]],
+            axis=0)
+        np.testing.assert_allclose(
+            aprovechamiento, separacion / capacidad, rtol=1e-12)
+
+
+def test_nothing_passes_an_impossible_load(dfs):
+    assert optimizador.optimizar(
+        dfs, **NAVE, longitud_nave=LONGITUD, carga=1000.0) is None
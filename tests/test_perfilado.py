@@ -0,0 +1,66 @@
+import threading
+import tracemalloc
+
+import pytest
+
+from nave import cache_vistas, perfilado
+
+plt = pytest.importorskip("matplotlib.pyplot")
+
+
+def figura():
+    fig, ax = plt.subplots()
+    ax.plot((0, 1), (0, 1))
+    return fig
+
+
+def test_counts_the_artists_of_its_own_figures(tmp_path):
+    init = plt.Artist.__init__
+    perfil = perfilado.Perfilador("prueba", True)
+    with perfil.etapa("dibujo"):
+        fig = figura()
+        cache_vistas.render(fig)
+        artistas = len(fig.findobj())
+    with perfil.etapa("otro hilo"):
+        # A figure of another session does not count
+        hilo = threading.Thread(target=lambda: cache_vistas.render(figura()))
+        hilo.start()
+        hilo.join()
+    registro = perfil.terminar(tmp_path / "perfilado.jsonl")
+    assert [etapa["artistas"] for etapa in registro["etapas"]] == [
+        artistas, 0]
+    assert plt.Artist.__init__ is init
+
+
+def test_records_the_peak_of_each_stage(tmp_path):
+    perfil = perfilado.Perfilador("prueba", True)
+    with perfil.etapa("bloque"):
+        bloque = bytearray(4 * 1024 * 1024)
+        del bloque
+    with perfil.etapa("nada"):
+        pass
+    registro = perfil.terminar(tmp_path / "perfilado.jsonl")
+    bloque, nada = registro["etapas"]
+    # Freed before the stage ended, but still its peak
+    assert bloque["pico_kb"] >= 4 * 1024
+    assert nada["pico_kb"] < 1024
+
+
+def test_leaves_a_running_trace_on(tmp_path):
+    tracemalloc.start()
+    try:
+        perfil = perfilado.Perfilador("prueba", True)
+        with perfil.etapa("nada"):
+            pass
+        perfil.terminar(tmp_path / "perfilado.jsonl")
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+
+def test_off_records_nothing(tmp_path):
+    perfil = perfilado.Perfilador("prueba")
+    with perfil.etapa("dibujo"):
+        cache_vistas.render(figura())
+    assert perfil.terminar(tmp_path / "perfilado.jsonl") is None
+    assert not (tmp_path / "perfilado.jsonl").exists()
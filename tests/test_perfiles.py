@@ -0,0 +1,68 @@
+import math
+
+import pytest
+
+from nave import perfiles
+
+pd = pytest.importorskip("pandas")
+
+
+@pytest.fixture
+def catalogo():
+    return perfiles.ProfileCatalog({
+        "IPE.xlsx": pd.DataFrame({
+            "Perfil": ["IPE300", None, "IPE 330", "ipe300"],
+            "gk [kg/m]": [42.2, float("nan"), 49.1, 0.0],
+            "Altura h [mm]": [300.0, float("nan"), 330.0, 0.0],
+            "Norma": ["EN 10365", None, "EN 10365", "otra"],
+        }),
+        "HEA.xlsx": pd.DataFrame({
+            "Perfil": ["HEA 300"], "gk [kg/m]": [88.3]}),
+    })
+
+
+@pytest.mark.parametrize("nombre", ("IPE300", "IPE 300", "ipe 300", "Ipe300"))
+def test_lookup_by_normalized_name(catalogo, nombre):
+    perfil = catalogo["IPE"][nombre]
+    # The first of repeated names, under its own spelling
+    assert perfil.name == "IPE300" and perfil.row == 0
+    assert perfil.gk == 42.2 and isinstance(perfil.gk, float)
+    assert perfil.h == 300.0
+    assert perfil["Norma"] == "EN 10365"
+    assert nombre in catalogo["IPE"]
+
+
+def test_families_by_name_with_or_without_extension(catalogo):
+    assert catalogo["IPE.xlsx"] is catalogo["IPE"]
+    assert catalogo["IPE"]["ipe330"].gk == 49.1
+    assert list(catalogo) == ["IPE", "HEA"]
+    assert "HEA" in catalogo and "HEA.xlsx" in catalogo
+    # Rows without a name are not profiles
+    assert len(catalogo["IPE"]) == 2
+
+
+def test_unknown_names(catalogo):
+    with pytest.raises(KeyError, match="IPE 400"):
+        catalogo["IPE"]["IPE 400"]
+    with pytest.raises(KeyError, match="HEB"):
+        catalogo["HEB"]
+    assert "IPE 400" not in catalogo["IPE"]
+    assert "HEB" not in catalogo
+    perfil = catalogo["HEA"]["hea300"]
+    with pytest.raises(AttributeError):
+        perfil.Iy
+    with pytest.raises(AttributeError):
+        perfil.desconocida
+
+
+def test_missing_values_read_as_nan():
+    family = perfiles.Family("X", pd.DataFrame({
+        "Perfil": ["X1"], "gk [kg/m]": [float("nan")]}))
+    assert math.isnan(family["x1"].gk)
+
+
+def test_catalog_is_built_once_per_frames():
+    dfs = {"IPE.xlsx": pd.DataFrame({"Perfil": ["IPE300"]})}
+    catalogo = perfiles.get_profile_catalog(dfs)
+    assert perfiles.get_profile_catalog(dfs) is catalogo
+    assert perfiles.get_profile_catalog(dict(dfs)) is not catalogo
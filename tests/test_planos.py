@@ -0,0 +1,60 @@
+import re
+
+import numpy as np
+import pytest
+
+from nave import modelo, parametros, planos
+
+
+VALORES = {
+    name: limits["value"] for name, limits in parametros.LIMITES.items()}
+CAMINO_SVG = re.compile(r'<g id="(\w+)".*?d="(.*?)"', re.S)
+
+
+@pytest.fixture(scope="module")
+def estructura():
+    return modelo.construir(**VALORES, pilar_ancho=0.3, viga_ancho=0.3)
+
+
+def lineas_dxf(texto):
+    """(layer, x0, y0, x1, y1) of every LINE entity."""
+    entidades = texto.split("ENTITIES\n", 1)[1].split("0\nLINE\n")[1:]
+    return [tuple(entidad.split("\n")[1:12:2]) for entidad in entidades]
+
+
+def lineas_svg(texto):
+    """(layer, segment) of every segment of the paths."""
+    return [
+        (capa, segmento)
+        for capa, camino in CAMINO_SVG.findall(texto)
+        for segmento in camino.split("\n") if segmento]
+
+
+@pytest.mark.parametrize("vista", planos.VISTAS)
+def test_dxf_lines_are_unique(estructura, vista):
+    lineas = lineas_dxf(
+        planos.contenido(estructura, "dxf", vista).decode("utf-8"))
+    assert len(lineas) == len(planos.filas(estructura, vista))
+    assert len(set(lineas)) == len(lineas)
+
+
+@pytest.mark.parametrize("vista", planos.VISTAS)
+def test_svg_segments_are_unique(estructura, vista):
+    segmentos = lineas_svg(
+        planos.contenido(estructura, "svg", vista).decode("utf-8"))
+    assert len(segmentos) == len(planos.filas(estructura, vista))
+    assert len(set(segmentos)) == len(segmentos)
+
+
+def test_default_sheet_has_110_lines(estructura):
+    texto = planos.contenido(estructura, "dxf").decode("utf-8")
+    assert len(lineas_dxf(texto)) == 110
+
+
+def test_repeated_and_reversed_rows_are_dropped(estructura):
+    rows = estructura.vista("superior")
+    alreves = rows[:3].copy()
+    alreves["x0"], alreves["x1"] = rows["x1"][:3], rows["x0"][:3]
+    alreves["y0"], alreves["y1"] = rows["y1"][:3], rows["y0"][:3]
+    repetidas = np.concatenate((rows, rows[:5], alreves))
+    np.testing.assert_array_equal(planos.unicas(repetidas), rows)
@@ -0,0 +1,127 @@
+import math
+
+import numpy as np
+import pytest
+
+from nave import parametros, presupuesto
+
+
+def referencia(
+    cantidad_porticos, distancia_porticos_finales,
+    distancia_porticos_internos, ancho_nave, altura_alero,
+    inclinacion_tejado, pilar_peso_m, viga_peso_m, **_
+):
+    """
+    The scalar code of the original page (Geometry, display_vista_superior
+    and display_text), kept as the reference of the engine.
+    """
+    angulo_radianes = math.radians(inclinacion_tejado)
+    largo_riegel = round((ancho_nave / 2) / math.cos(angulo_radianes), 2)
+    correas_internas_cantidad = 2 * math.ceil((largo_riegel - 0.2) / 2)
+    correas_lado = int(correas_internas_cantidad / 2)
+    cantidad_wandriegel = round((altura_alero - 0.4) / 2.2)
+    distancia_real_wandriegel = (altura_alero - 0.4) / cantidad_wandriegel
+
+    last_x = (
+        distancia_porticos_internos * (cantidad_porticos - 3)
+        + 2 * distancia_porticos_finales)
+    total_distance = (ancho_nave - 0.2) - 0.2
+    espacio_correas = (total_distance / 2) - 0.2 - 1.2
+    line_distance = espacio_correas / correas_lado
+    x1e = last_x + 0.5
+    x2e = x1e - distancia_porticos_finales - 0.5
+    longitud_arrios = round(math.hypot(x2e - x1e, line_distance), 2)
+
+    peso_pilares = round(
+        cantidad_porticos * 2 * altura_alero * pilar_peso_m * 1.12 / 1000, 2)
+    peso_vigas = round(
+        cantidad_porticos * 2 * largo_riegel * viga_peso_m * 1.25 / 1000, 2)
+    largo_correas = (correas_lado + 2) * 2 * ancho_nave
+    return {
+        "angulo_radianes": angulo_radianes,
+        "largo_riegel": largo_riegel,
+        "correas_internas_cantidad": correas_internas_cantidad,
+        "correas_lado": correas_lado,
+        "cantidad_wandriegel": cantidad_wandriegel,
+        "distancia_real_wandriegel": distancia_real_wandriegel,
+        "line_distance": line_distance,
+        "longitud_arrios": longitud_arrios,
+        "peso_pilares": peso_pilares,
+        "peso_vigas": peso_vigas,
+        "largo_correas": largo_correas,
+    }
+
+
+def costes_referencia(pesototal):
+    """The cost math of display_text at the default rates."""
+    costes_material = 1200 * pesototal
+    costes_taller = 900 * pesototal
+    costes_montaje = 400 * pesototal
+    costes_planif = 150 * pesototal
+    factor_empresa = round(0.1 * (
+        costes_planif + costes_montaje + costes_taller + costes_material))
+    costes_totales = (
+        factor_empresa + costes_planif + costes_montaje
+        + costes_taller + costes_material)
+    return {
+        "factor_empresa": factor_empresa,
+        "costes_totales": costes_totales,
+        "costes_portonelada": round(costes_totales / pesototal, 2),
+    }
+
+
+@pytest.fixture(scope="module")
+def naves():
+    """Halls sampled over the whole range of every widget."""
+    rng = np.random.default_rng(0)
+    count = 500
+    naves = {
+        name: rng.choice(parametros.rango(name), count)
+        for name in parametros.LIMITES}
+    naves["pilar_peso_m"] = rng.uniform(5, 200, count).round(1)
+    naves["viga_peso_m"] = rng.uniform(5, 200, count).round(1)
+    return naves
+
+
+def nave(naves, i):
+    """The values of one hall as Python scalars."""
+    return {name: values[i].item() for name, values in naves.items()}
+
+
+# The bracing and the wall rails are quoted as the drawings place them
+# instead (see test_modelo).
+def test_engine_matches_the_scalar_code(naves):
+    quote = presupuesto.pesos(**naves)
+    filas = [
+        referencia(**nave(naves, i)) for i in range(len(naves["ancho_nave"]))]
+    for name in filas[0]:
+        esperado = np.array([fila[name] for fila in filas])
+        np.testing.assert_allclose(
+            quote[name], esperado, rtol=1e-12, err_msg=name)
+
+
+def test_costs_match_the_scalar_code(naves):
+    quote = presupuesto.presupuesto(**naves)
+    filas = [
+        costes_referencia(value) for value in quote["pesototal"].tolist()]
+    for name in filas[0]:
+        np.testing.assert_allclose(
+            quote[name], [fila[name] for fila in filas], rtol=1e-12,
+            err_msg=name)
+
+
+def test_scalars_give_the_same_quote_as_arrays(naves):
+    quote = presupuesto.presupuesto(**naves)
+    for i in (0, 17, 499):
+        escalar = presupuesto.presupuesto(**nave(naves, i))
+        for name, value in escalar.items():
+            assert np.ndim(value) == 0, name
+            assert value == pytest.approx(quote[name][i], rel=1e-12), name
+
+
+def test_redondear_rounds_like_round():
+    values = np.array((0.125, 0.375, 2.675, 1.005, -0.125, 1234.5))
+    np.testing.assert_array_equal(
+        presupuesto.redondear(values, 2),
+        [round(value, 2) for value in values.tolist()])
+    assert presupuesto.redondear(2.5) == round(2.5)
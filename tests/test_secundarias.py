@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from nave import catalogo, parametros, secundarias
+
+
+@pytest.fixture(scope="module")
+def tablas():
+    return secundarias.tablas(catalogo.load_catalog())
+
+
+@pytest.fixture(scope="module")
+def naves():
+    rng = np.random.default_rng(1)
+    return {
+        name: rng.choice(parametros.rango(name), 200)
+        for name in parametros.LIMITES}
+
+
+def test_profiles_are_the_lightest_that_reach_the_requirement(tablas, naves):
+    requisitos = secundarias.requisitos(**naves)
+    dimensionado = secundarias.dimensionar(tablas, **naves)
+    for miembro, requerido in requisitos.items():
+        tabla = tablas[miembro]
+        perfiles = dimensionado[f"perfil_{miembro}"]
+        pesos = dimensionado[f"{miembro}_peso_m"]
+        for i, valor in enumerate(requerido.tolist()):
+            validos = tabla.w >= valor
+            if not validos.any():
+                assert perfiles[i] == "" and np.isnan(pesos[i])
+                continue
+            assert pesos[i] == tabla.gk[validos].min()
+            elegido = np.flatnonzero(tabla.perfil == perfiles[i])
+            assert (tabla.w[elegido] >= valor).any(), perfiles[i]
+
+
+def test_default_hall(tablas):
+    dimensionado = secundarias.dimensionar(
+        tablas, **parametros.valores_por_defecto())
+    for miembro in ("correa", "wandriegel", "arriostramiento"):
+        assert dimensionado[f"perfil_{miembro}"] != ""
+        assert dimensionado[f"{miembro}_peso_m"] > 0
+    assert str(dimensionado["perfil_arriostramiento"]).startswith("RD")
+
+
+def test_requirements_grow_with_the_span():
+    corto = secundarias.requisitos(
+        **{**parametros.valores_por_defecto(),
+           "distancia_porticos_internos": 5.0})
+    largo = secundarias.requisitos(
+        **{**parametros.valores_por_defecto(),
+           "distancia_porticos_internos": 7.0})
+    assert largo["correa"] > corto["correa"]
+    assert largo["wandriegel"] > corto["wandriegel"]
+
+
+def test_bracing_has_a_minimum_bar():
+    requisitos = secundarias.requisitos(
+        **{**parametros.valores_por_defecto(), "ancho_nave": 8.0})
+    assert requisitos["arriostramiento"] >= (
+        secundarias.AREA_MINIMA_ARRIOSTRAMIENTO)
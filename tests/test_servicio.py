@@ -0,0 +1,135 @@
+import asyncio
+
+import pytest
+
+from nave import servicio
+
+
+@pytest.fixture(scope="module")
+def catalogo():
+    servicio.preparar()
+
+
+def peticion(**cambios):
+    return {"perfil_pilar": "IPE300", "perfil_viga": "IPE 300", **cambios}
+
+
+@pytest.mark.parametrize("valor", ("inf", "-inf", "nan", "1e400", -1, "x"))
+def test_rates_must_be_finite_and_positive(catalogo, valor):
+    with pytest.raises(servicio.ErrorPeticion) as error:
+        servicio.normalizar(peticion(precio_mat=valor))
+    assert error.value.status == 400
+
+
+def test_rates_are_floats(catalogo):
+    clave = dict(servicio.normalizar(peticion(precio_mat="1500")))
+    assert clave["precio_mat"] == 1500.0
+
+
+def test_spellings_of_one_request_share_a_key(catalogo):
+    clave = servicio.normalizar(peticion())
+    assert servicio.normalizar(
+        {"perfil_pilar": " ipe 300", "perfil_viga": "IPE300"}) == clave
+    # Missing fields take the default of their widget
+    assert servicio.normalizar(peticion(
+        cantidad_porticos="5", ancho_nave=18, inclinacion_tejado=12.0,
+        precio_mat="")) == clave
+    assert servicio.normalizar(peticion(ancho_nave=20)) != clave
+
+
+def test_key_holds_the_engine_arguments(catalogo):
+    clave = servicio.normalizar(peticion(precio_taller=950))
+    assert list(clave) == sorted(clave)
+    args = dict(clave)
+    assert args["perfil_pilar"] == args["perfil_viga"]
+    assert args["pilar_peso_m"] == args["viga_peso_m"] > 0
+    assert args["precio_taller"] == 950.0
+    assert isinstance(args["cantidad_porticos"], int)
+
+
+def test_geometry_takes_the_hall_only(catalogo):
+    clave = servicio.normalizar({"ancho_nave": "20"}, "geometria")
+    assert dict(clave) == {
+        **servicio.parametros.valores_por_defecto(), "ancho_nave": 20.0}
+    assert servicio.normalizar(
+        {"ancho_nave": 20, "perfil_pilar": "x"}, "geometria") == clave
+
+
+@pytest.mark.parametrize("entrada", (
+    [], peticion(perfil_pilar="IPE 301"), {"perfil_viga": "IPE300"},
+    peticion(cantidad_porticos=50), peticion(cantidad_porticos=5.5)))
+def test_invalid_requests_are_a_400(catalogo, entrada):
+    with pytest.raises(servicio.ErrorPeticion) as error:
+        servicio.normalizar(entrada)
+    assert error.value.status == 400
+
+
+def intercambiar(datos: bytes) -> bytes:
+    """Sends raw bytes to a server of the service, returns its answer."""
+
+    async def ida_y_vuelta():
+        server = await asyncio.start_server(
+            servicio._conexion, "127.0.0.1", 0)
+        async with server:
+            port = server.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(datos)
+            await writer.drain()
+            respuesta = await asyncio.wait_for(reader.read(), 5)
+            writer.close()
+            return respuesta
+
+    return asyncio.run(ida_y_vuelta())
+
+
+@pytest.mark.parametrize("linea", (
+    b"GET\r\n", b"GET /salud\r\n", b"GET /salud HTTP/1.1 x\r\n"))
+def test_malformed_request_line_is_a_400(linea):
+    respuesta = intercambiar(linea + b"host: x\r\n\r\n")
+    assert respuesta.startswith(b"HTTP/1.1 400 ")
+    assert b"connection: close" in respuesta
+
+
+def test_bad_content_length_is_a_400():
+    respuesta = intercambiar(
+        b"POST /presupuesto HTTP/1.1\r\ncontent-length: -5\r\n\r\n")
+    assert respuesta.startswith(b"HTTP/1.1 400 ")
+
+
+def test_body_over_the_limit_is_a_413():
+    length = servicio.MAXIMO_CUERPO + 1
+    respuesta = intercambiar(
+        b"POST /presupuesto HTTP/1.1\r\n"
+        + f"content-length: {length}\r\n\r\n".encode())
+    assert respuesta.startswith(b"HTTP/1.1 413 ")
+    assert b'"error"' in respuesta
+
+
+def test_well_formed_request_is_answered(catalogo):
+    respuesta = intercambiar(
+        b"GET /geometria?ancho_nave=20 HTTP/1.1\r\nconnection: close\r\n\r\n")
+    assert respuesta.startswith(b"HTTP/1.1 200 OK\r\n")
+    assert b'"largo_riegel"' in respuesta
+
+
+def test_chunked_body_is_a_411():
+    respuesta = intercambiar(
+        b"POST /presupuesto HTTP/1.1\r\ntransfer-encoding: chunked\r\n\r\n"
+        b"5\r\n{}   \r\n0\r\n\r\n")
+    assert respuesta.startswith(b"HTTP/1.1 411 ")
+    assert b"connection: close" in respuesta
+
+
+def test_internal_errors_are_not_told_to_the_client(
+    catalogo, monkeypatch, caplog
+):
+    def fallar(ruta, claves):
+        raise RuntimeError("/srv/secreto.xlsx")
+
+    monkeypatch.setattr(servicio, "calcular", fallar)
+    respuesta = intercambiar(
+        b"GET /presupuesto?ancho_nave=21&perfil_pilar=IPE300"
+        b"&perfil_viga=IPE300 HTTP/1.1\r\nconnection: close\r\n\r\n")
+    assert respuesta.startswith(b"HTTP/1.1 500 ")
+    assert b"secreto" not in respuesta
+    assert "secreto" in caplog.text
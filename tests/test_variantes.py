@@ -0,0 +1,121 @@
+import pytest
+
+from nave import catalogo, grafo, parametros, presupuesto, secundarias
+from nave import variantes
+
+
+@pytest.fixture(scope="module")
+def tablas():
+    return secundarias.tablas(catalogo.load_catalog())
+
+
+@pytest.fixture(autouse=True)
+def memo(monkeypatch):
+    """A memo of the test's own, as small as the test needs."""
+    memo = grafo.Memo(variantes.MAX_RESULTADOS)
+    monkeypatch.setattr(variantes, "_resultados", memo)
+    return memo
+
+
+def variante(nombre, **cambios):
+    return {
+        **parametros.valores_por_defecto(),
+        "familia_pilar": "IPE", "perfil_pilar": "IPE 300",
+        "familia_viga": "IPE", "perfil_viga": "IPE 300",
+        "pilar_peso_m": 42.2, "viga_peso_m": 42.2,
+        "precio_mat": 1200.0, "precio_taller": 900.0, "precio_monta": 400.0,
+        "precio_planif": 150.0, "factor_costes_empre": 0.1,
+        "nombre": nombre, **cambios}
+
+
+def test_results_are_the_quote_of_each_variant(tablas):
+    guardadas = [
+        variante("A"), variante("B", ancho_nave=24.0),
+        variante("C", precio_mat=1500.0)]
+    resultados = variantes.evaluar(guardadas, tablas)
+    for guardada, resultado in zip(guardadas, resultados):
+        args = {
+            name: guardada[name] for name in variantes.CAMPOS
+            if name not in variantes.PERFILES}
+        args.update({
+            name: value.item() for name, value in
+            secundarias.dimensionar(tablas, **args).items()})
+        quote = presupuesto.presupuesto(**args)
+        assert resultado["pesototal"] == pytest.approx(quote["pesototal"])
+        assert resultado["costes_totales"] == pytest.approx(
+            quote["costes_totales"])
+        assert resultado["perfil_correa"] == args["perfil_correa"]
+
+
+def test_known_variants_are_not_quoted_again(tablas, memo, monkeypatch):
+    guardadas = [variante("A"), variante("B", ancho_nave=24.0)]
+    primeros = variantes.evaluar(guardadas, tablas)
+    llamadas = []
+    quote = presupuesto.presupuesto
+
+    def contar(**columnas):
+        llamadas.append(len(columnas["ancho_nave"]))
+        return quote(**columnas)
+
+    monkeypatch.setattr(presupuesto, "presupuesto", contar)
+    guardadas.append(variante("C", altura_alero=8.0))
+    assert variantes.evaluar(guardadas, tablas)[:2] == primeros
+    assert llamadas == [1]
+    # Another catalog quotes them all again
+    variantes.evaluar(guardadas, tablas, firma="otro")
+    assert llamadas == [1, 3]
+
+
+def test_more_variants_than_the_memo_holds(tablas, monkeypatch):
+    monkeypatch.setattr(variantes, "_resultados", grafo.Memo(2))
+    guardadas = [
+        variante(str(porticos), cantidad_porticos=porticos)
+        for porticos in range(3, 9)]
+    resultados = variantes.evaluar(guardadas, tablas)
+    assert None not in resultados
+    pesos = [resultado["pesototal"] for resultado in resultados]
+    assert pesos == sorted(pesos) and len(set(pesos)) == len(pesos)
+    comparacion = variantes.tabla(guardadas, resultados)
+    assert list(comparacion.index) == [
+        guardada["nombre"] for guardada in guardadas]
+
+
+def test_results_evicted_by_another_session(tablas, memo, monkeypatch):
+    guardadas = [variante("A"), variante("B", ancho_nave=24.0)]
+    put = memo.put
+
+    def put_y_vaciar(key, value):
+        put(key, value)
+        # Another session fills the memo meanwhile
+        memo.entradas.clear()
+
+    monkeypatch.setattr(memo, "put", put_y_vaciar)
+    resultados = variantes.evaluar(guardadas, tablas)
+    assert None not in resultados
+    variantes.tabla(guardadas, resultados)
+
+
+def test_deltas_against_the_base(tablas):
+    guardadas = [variante("A"), variante("B", ancho_nave=24.0)]
+    comparacion = variantes.tabla(
+        guardadas, variantes.evaluar(guardadas, tablas))
+    diferencias = variantes.deltas(comparacion, "A")
+    assert (diferencias.loc["A"] == 0).all()
+    peso = variantes.COLUMNAS["pesototal"]
+    esperado = (
+        comparacion.loc["B", peso] / comparacion.loc["A", peso] - 1) * 100
+    assert diferencias.loc["B", f"{peso} Δ%"] == pytest.approx(
+        esperado, abs=0.05)
+    assert diferencias.loc["B", peso] > 0
+
+
+def test_guardar_replaces_by_name_and_is_bounded():
+    guardadas = []
+    assert variantes.guardar(guardadas, variante("A")) == ""
+    assert variantes.guardar(guardadas, variante("A", ancho_nave=24.0)) == ""
+    assert len(guardadas) == 1 and guardadas[0]["ancho_nave"] == 24.0
+    for i in range(variantes.MAX_VARIANTES - 1):
+        assert variantes.guardar(guardadas, variante(str(i))) == ""
+    assert variantes.guardar(guardadas, variante("otra"))
+    assert len(guardadas) == variantes.MAX_VARIANTES
+    assert [guardada["nombre"] for guardada in guardadas[:2]] == ["A", "0"]